@@ -0,0 +1,181 @@
+# @author: MembaCo.
+
+import logging
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+import config
+from database import get_connection, pooled_connection
+
+logger = logging.getLogger(__name__)
+
+
+def host_of(url):
+    return (urlparse(url).hostname or "").lower()
+
+
+def connections_for(conn, host, max_connections):
+    """İşçi tarafında: bu CDN için denetleyicinin seçtiği bağlantı sayısı."""
+    row = conn.execute(
+        "SELECT connections FROM host_limits WHERE host = ?", (host,)
+    ).fetchone()
+    if not row:
+        return _initial_connections(max_connections)
+    return max(1, min(row[0], max_connections))
+
+
+def _initial_connections(max_connections):
+    return max(1, max_connections // 2)
+
+
+class AdaptiveController:
+    """
+    CDN sunucusu başına AIMD denetleyici. İndirme motorlarından gelen her iş
+    örneğinde (bayt, süre, istek/hata sayısı, kısıtlama yanıtları):
+
+    - kısıtlama (429/503) veya yüksek hata oranı görülürse eşzamanlı iş ve bağlantı
+      sayıları çarpımsal olarak azaltılır,
+    - başarılı ve toplam verim düşmemişse birer artırılır,
+    - verim düştüyse (hat doymuş) olduğu gibi bırakılır.
+
+    Sınırlar: alt sınırlar config'ten, üst sınırlar kullanıcının CONCURRENT_DOWNLOADS
+    ve HLS_CONNECTIONS ayarlarından gelir. Durum host_limits tablosunda tutulur.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._loaded = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        try:
+            with pooled_connection() as conn:
+                for row in conn.execute("SELECT * FROM host_limits"):
+                    self._hosts[row["host"]] = dict(row)
+        except sqlite3.Error as e:
+            logger.error(f"Uyarlanabilir eşzamanlılık durumu okunamadı: {e}")
+        self._loaded = True
+
+    def record(self, sample):
+        """Bir indirme örneğini işler; iş limiti değiştiyse True döner."""
+        host = sample.get("host")
+        if not host:
+            return False
+        with self._lock:
+            self._load()
+            max_jobs = max(config.ADAPTIVE_MIN_JOBS, sample.get("max_jobs") or 1)
+            max_connections = max(1, sample.get("max_connections") or 1)
+            state = self._hosts.get(host) or {
+                "host": host,
+                "jobs": config.ADAPTIVE_MIN_JOBS,
+                "connections": _initial_connections(max_connections),
+                "throughput": None,
+                "error_rate": 0.0,
+                "samples": 0,
+                "updated_at": None,
+            }
+            old_jobs = state["jobs"]
+
+            seconds = max(sample.get("seconds") or 0, 0.001)
+            throughput = (sample.get("bytes") or 0) / seconds
+            error_rate = (sample.get("errors") or 0) / max(1, sample.get("requests") or 1)
+            state["error_rate"] = round(
+                (1 - config.ADAPTIVE_EWMA) * state["error_rate"]
+                + config.ADAPTIVE_EWMA * error_rate,
+                4,
+            )
+
+            if sample.get("throttled") or error_rate > config.ADAPTIVE_ERROR_RATE:
+                state["jobs"] = max(
+                    config.ADAPTIVE_MIN_JOBS, int(state["jobs"] * config.ADAPTIVE_DECREASE)
+                )
+                state["connections"] = max(
+                    1, int(state["connections"] * config.ADAPTIVE_DECREASE)
+                )
+                decision = "azaltıldı"
+            elif sample.get("success"):
+                # İş başına verim x eşzamanlı iş: sunucudan alınan toplam verimin tahmini
+                aggregate = throughput * state["jobs"]
+                previous = state["throughput"]
+                if previous is None or aggregate >= previous * config.ADAPTIVE_GAIN_TOLERANCE:
+                    state["jobs"] += 1
+                    state["connections"] += 1
+                    decision = "artırıldı"
+                else:
+                    decision = "korundu"
+                state["throughput"] = (
+                    aggregate
+                    if previous is None
+                    else (1 - config.ADAPTIVE_EWMA) * previous
+                    + config.ADAPTIVE_EWMA * aggregate
+                )
+            else:
+                # Kaynak/çözümleme hataları sunucu yükü hakkında bilgi vermez
+                return False
+
+            state["jobs"] = min(state["jobs"], max_jobs)
+            state["connections"] = min(state["connections"], max_connections)
+            state["samples"] += 1
+            state["updated_at"] = time.time()
+            self._hosts[host] = state
+            self._save(state)
+            logger.info(
+                f"[Adaptive] {host}: {state['jobs']} iş / {state['connections']} bağlantı "
+                f"({decision}; {throughput / 1024 / 1024:.2f} MB/s, hata %{error_rate * 100:.1f})"
+            )
+            return state["jobs"] != old_jobs
+
+    def _save(self, state):
+        try:
+            conn = get_connection()
+            conn.execute(
+                "REPLACE INTO host_limits (host, jobs, connections, throughput, error_rate, samples, updated_at) "
+                "VALUES (:host, :jobs, :connections, :throughput, :error_rate, :samples, :updated_at)",
+                state,
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Uyarlanabilir eşzamanlılık durumu yazılamadı: {e}")
+
+    def job_limit(self, max_jobs):
+        """
+        Zamanlayıcının kullanacağı eşzamanlı iş sayısı. Son ADAPTIVE_HOST_WINDOW
+        saniyede kullanılan sunucuların en temkinlisi esas alınır.
+        """
+        with self._lock:
+            self._load()
+            if not self._hosts:
+                return max(1, min(config.ADAPTIVE_MIN_JOBS, max_jobs))
+            now = time.time()
+            recent = [
+                state
+                for state in self._hosts.values()
+                if now - (state["updated_at"] or 0) <= config.ADAPTIVE_HOST_WINDOW
+            ]
+            if not recent:
+                recent = [max(self._hosts.values(), key=lambda s: s["updated_at"] or 0)]
+            return max(1, min(min(state["jobs"] for state in recent), max_jobs))
+
+
+def get_host_limits(conn):
+    """Ayarlar sayfası için sunucu başına seçilmiş değerler."""
+    return [
+        dict(row)
+        for row in conn.execute("SELECT * FROM host_limits ORDER BY updated_at DESC")
+    ]
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdaptiveController()
+        return _controller
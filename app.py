@@ -5,13 +5,13 @@ import os
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import hmac
 import logging
 import threading
-import time
-from multiprocessing import Process
 
 from flask import (
     Flask,
+    Response,
     render_template,
     request,
     redirect,
@@ -19,11 +19,16 @@ from flask import (
     flash,
     session,
     jsonify,
+    send_file,
 )
 from werkzeug.security import check_password_hash, generate_password_hash
 from dotenv import load_dotenv
 
 import config
+import metrics
+import profiling
+from adaptive import get_host_limits
+from browser_pool import get_driver_pool
 from database import (
     get_db,
     setup_database,
@@ -34,7 +39,15 @@ from database import (
     get_setting,
 )
 from logging_config import setup_logging
+from events import format_sse, get_event_bus
+from progress import get_progress_channel
+from resolver import get_source_resolver
+from scheduler import start_scheduler
+from series_import import parse_urls, start_importer
+from watchlist import start_watchlist
+from worker_pool import get_worker_pool
 import services
+import tracing
 
 logger = setup_logging()
 app = Flask(__name__)
@@ -45,8 +58,24 @@ if app.logger.handlers:
     app.logger.removeHandler(app.logger.handlers[0])
 app.logger = logger
 
-active_processes = {}
-auto_download_manager_state = {"enabled": False, "thread": None}
+# Arka plan servisleri start_background_services() ile, veritabanı
+# hazırlandıktan sonra başlatılır
+download_scheduler = None
+series_importer = None
+
+
+def start_background_services():
+    """Zamanlayıcıyı, takip listesi yenileyicisini ve içe aktarma havuzunu başlatır."""
+    global download_scheduler, series_importer
+    # Otomatik indirmeler olay güdümlü zamanlayıcı tarafından yönetilir;
+    # indirmeler kalıcı işçi havuzunda çalışır.
+    download_scheduler = start_scheduler(
+        app, services.run_auto_download_cycle, get_worker_pool()
+    )
+    # Takip edilen diziler zamanı geldikçe sınırlı eşzamanlılıkla yenilenir
+    start_watchlist(app, services.refresh_series)
+    # Dizi ekleme istekleri sınırlı bir tarayıcı/iş parçacığı havuzunda işlenir
+    series_importer = start_importer(app, services.add_series_to_queue)
 
 
 def sync_password_hash_from_env():
@@ -72,22 +101,13 @@ def sync_password_hash_from_env():
         logger.error(f"Parola hash senkronizasyonu sırasında hata: {e}", exc_info=True)
 
 
-def auto_download_manager():
-    """Arka planda çalışarak otomatik indirmeleri yöneten thread."""
-    logger.info("Otomatik indirme yöneticisi thread'i başlatıldı.")
-    while auto_download_manager_state.get("enabled", False):
-        try:
-            with app.app_context():
-                services.run_auto_download_cycle(active_processes)
-        except Exception as e:
-            logger.error(f"Otomatik indirme yöneticisinde hata: {e}", exc_info=True)
-        time.sleep(config.AUTO_DOWNLOAD_POLL_INTERVAL)
-    logger.info("Otomatik indirme yöneticisi thread'i durduruldu.")
-
-
 @app.before_request
 def require_login():
-    if not session.get("logged_in") and request.endpoint not in ["login", "static"]:
+    if not session.get("logged_in") and request.endpoint not in [
+        "login",
+        "static",
+        "metrics_api",
+    ]:
         return redirect(url_for("login"))
 
 
@@ -128,27 +148,55 @@ def index():
 # --- DİZİ ROTALARI ---
 @app.route("/add_series", methods=["POST"])
 def add_series():
-    series_url = request.form["series_url"]
+    series_url = request.form["series_url"].strip()
     if config.ALLOWED_DOMAIN not in series_url:
         flash(f"Lütfen geçerli bir {config.ALLOWED_DOMAIN} linki girin.", "warning")
         return redirect(url_for("index"))
 
-    thread = threading.Thread(
-        target=services.add_series_to_queue_async, args=(app, series_url)
-    )
-    thread.daemon = True
-    thread.start()
+    # Tekil ekleme kayıtlı diziyi de yeniden çeker; takip listesinde olmayan bir
+    # dizinin yeni bölümlerini almanın elle yolu budur
+    queued, _ = series_importer.submit(parse_urls(series_url), get_db(), refresh=True)
+    if queued:
+        flash(
+            "Dizi ekleme işlemi arka planda başlatıldı. Bölümler kısa süre içinde listelenecektir.",
+            "info",
+        )
+    else:
+        flash("Bu dizi şu anda ekleniyor.", "warning")
+    return redirect(url_for("index"))
 
-    flash(
-        "Dizi ekleme işlemi arka planda başlatıldı. Bölümler kısa süre içinde listelenecektir.",
-        "info",
-    )
+
+@app.route("/series/import", methods=["POST"])
+def import_series():
+    """Çok sayıda dizi linkini (textarea veya JSON {"urls": [...]}) içe aktarır."""
+    if request.is_json:
+        payload = request.get_json(silent=True) or {}
+        urls = parse_urls(" ".join(str(url) for url in payload.get("urls") or []))
+    else:
+        urls = parse_urls(request.form.get("series_urls"))
+    invalid = [url for url in urls if config.ALLOWED_DOMAIN not in url]
+    urls = [url for url in urls if config.ALLOWED_DOMAIN in url]
+    queued, skipped = series_importer.submit(urls, get_db())
+
+    if request.is_json:
+        return jsonify({"queued": queued, "skipped": skipped, "invalid": invalid})
+    message = f"{len(queued)} dizi içe aktarma kuyruğuna alındı."
+    if skipped:
+        message += f" {len(skipped)} dizi zaten ekli veya ekleniyor."
+    if invalid:
+        message += f" {len(invalid)} link {config.ALLOWED_DOMAIN} adresine ait değil."
+    flash(message, "info" if queued else "warning")
     return redirect(url_for("index"))
 
 
+@app.route("/series/import/status")
+def import_status():
+    return jsonify(series_importer.snapshot())
+
+
 @app.route("/series/delete/<int:series_id>", methods=["POST"])
 def delete_series(series_id):
-    success, message = services.delete_series_record(series_id, active_processes)
+    success, message = services.delete_series_record(series_id)
     flash(message, "success" if success else "danger")
     return redirect(url_for("index"))
 
@@ -157,20 +205,27 @@ def delete_series(series_id):
 def start_series_download(series_id):
     success, message = services.start_all_episodes_for_series(series_id)
 
-    if success:
-        try:
-            logger.info(f"Kuyruğa ekleme sonrası indirme döngüsü tetikleniyor...")
-            services.run_auto_download_cycle(active_processes)
-        except Exception as e:
-            logger.error(f"İndirme döngüsü tetiklenirken hata: {e}", exc_info=True)
+    flash(message, "success" if success else "warning")
+    return redirect(url_for("index"))
+
+
+@app.route("/series/bump/<int:series_id>", methods=["POST"])
+def bump_series(series_id):
+    success, message = services.bump_series(series_id)
+    flash(message, "success" if success else "warning")
+    return redirect(url_for("index"))
 
+
+@app.route("/series/watch/<int:series_id>", methods=["POST"])
+def watch_series(series_id):
+    success, message = services.toggle_watch_series(series_id)
     flash(message, "success" if success else "warning")
     return redirect(url_for("index"))
 
 
 @app.route("/episode/start/<int:episode_id>", methods=["POST"])
 def start_episode_download(episode_id):
-    success, message = services.start_download(episode_id, active_processes)
+    success, message = services.start_download(episode_id)
     flash(message, "info" if success else "warning")
     return redirect(url_for("index"))
 
@@ -182,9 +237,16 @@ def stop_episode_download(episode_id):
     return redirect(url_for("index"))
 
 
+@app.route("/episode/bump/<int:episode_id>", methods=["POST"])
+def bump_episode(episode_id):
+    success, message = services.bump_episode(episode_id)
+    flash(message, "success" if success else "warning")
+    return redirect(url_for("index"))
+
+
 @app.route("/episode/delete/<int:episode_id>", methods=["POST"])
 def delete_episode(episode_id):
-    services.delete_record(episode_id, active_processes)
+    services.delete_record(episode_id)
     flash("Bölüm kaydı başarıyla silindi.", "success")
     return redirect(url_for("index"))
 
@@ -207,6 +269,21 @@ def settings():
         )
         update_setting("CONCURRENT_DOWNLOADS", request.form["concurrent_downloads"], db)
         update_setting("SPEED_LIMIT", request.form["speed_limit"], db)
+        update_setting("SPEED_PROFILES", request.form["speed_profiles"], db)
+        update_setting("SOURCE_CACHE_TTL", request.form["source_cache_ttl"], db)
+        update_setting("RESOLVE_AHEAD", request.form["resolve_ahead"], db)
+        update_setting("RESOLVE_CONCURRENCY", request.form["resolve_concurrency"], db)
+        update_setting("DOWNLOAD_ENGINE", request.form["download_engine"], db)
+        update_setting("HLS_CONNECTIONS", request.form["hls_connections"], db)
+        update_setting(
+            "ADAPTIVE_CONCURRENCY", request.form.get("adaptive_concurrency", "0"), db
+        )
+        update_setting(
+            "WATCHLIST_INTERVAL_HOURS", request.form["watchlist_interval_hours"], db
+        )
+        update_setting(
+            "WATCHLIST_AUTO_QUEUE", request.form.get("watchlist_auto_queue", "1"), db
+        )
         settings_updated = True
 
         current_password = request.form.get("current_password")
@@ -232,26 +309,93 @@ def settings():
         if settings_updated:
             flash("Ayarlar başarıyla kaydedildi.", "success")
         db.commit()
+        # Eşzamanlı indirme limiti değişmiş olabilir
+        download_scheduler.notify("settings")
         return redirect(url_for("settings"))
 
     current_settings = get_all_settings(db)
-    return render_template("settings.html", settings=current_settings)
+    return render_template(
+        "settings.html",
+        settings=current_settings,
+        host_limits=get_host_limits(db),
+        profiles=profiling.list_profiles(),
+        web_profile=profiling.web_capture_status(),
+        profile_max_seconds=config.PROFILE_MAX_SECONDS,
+        profile_max_jobs=config.PROFILE_MAX_JOBS,
+    )
+
+
+@app.route("/profiles/web", methods=["POST"])
+def profile_web():
+    seconds = request.form.get("seconds", 30, type=int)
+    if profiling.start_web_capture(seconds):
+        flash("Web prosesi profilleniyor; süre dolunca dosya listede görünecek.", "success")
+    else:
+        flash("Web prosesi zaten profilleniyor.", "warning")
+    return redirect(url_for("settings"))
+
+
+@app.route("/profiles/jobs", methods=["POST"])
+def profile_jobs():
+    count = profiling.request_job_captures(
+        get_db(), request.form.get("count", 1, type=int)
+    )
+    if count:
+        flash(f"Sıradaki {count} indirme işi profillenecek.", "success")
+    else:
+        flash("Bekleyen iş profili isteği iptal edildi.", "info")
+    return redirect(url_for("settings"))
+
+
+@app.route("/profiles/<name>")
+def download_profile(name):
+    path = profiling.profile_path(name)
+    if not path:
+        return "Profil bulunamadı.", 404
+    return send_file(path, as_attachment=True, download_name=name)
+
+
+@app.route("/profiles/delete/<name>", methods=["POST"])
+def delete_profile(name):
+    path = profiling.profile_path(name)
+    if path:
+        os.remove(path)
+        flash(f"{name} silindi.", "success")
+    return redirect(url_for("settings"))
+
+
+@app.route("/traces")
+def traces():
+    """Son denemelerde aşama başına süre raporu; episode verilirse bölümün zaman çizelgesi."""
+    db = get_db()
+    limit = min(max(request.args.get("limit", 200, type=int), 1), config.TRACE_HISTORY_JOBS)
+    episode_id = request.args.get("episode", type=int)
+    episode = None
+    episode_traces = []
+    if episode_id is not None:
+        episode = db.execute(
+            "SELECT e.id, e.title, e.episode_number, e.status, s.season_number, ser.title AS series_title FROM episodes e JOIN seasons s ON e.season_id = s.id JOIN series ser ON s.series_id = ser.id WHERE e.id = ?",
+            (episode_id,),
+        ).fetchone()
+        if episode:
+            episode_traces = tracing.get_episode_traces(db, episode_id)
+    return render_template(
+        "traces.html",
+        report=tracing.get_stage_report(db, limit),
+        limit=limit,
+        episode=episode,
+        episode_traces=episode_traces,
+    )
 
 
 @app.route("/toggle_auto_download", methods=["POST"])
 def toggle_auto_download():
-    is_enabled = auto_download_manager_state["enabled"]
-    if is_enabled:
-        auto_download_manager_state["enabled"] = False
-        if auto_download_manager_state["thread"]:
-            auto_download_manager_state["thread"].join()
+    if download_scheduler.enabled:
+        download_scheduler.set_enabled(False)
         flash("Otomatik indirme pasif hale getirildi.", "info")
         logger.info("Otomatik indirme durumu: PASİF")
     else:
-        auto_download_manager_state["enabled"] = True
-        thread = threading.Thread(target=auto_download_manager, daemon=True)
-        auto_download_manager_state["thread"] = thread
-        thread.start()
+        download_scheduler.set_enabled(True)
         flash("Otomatik indirme aktif hale getirildi.", "info")
         logger.info("Otomatik indirme durumu: AKTİF")
     return redirect(url_for("index"))
@@ -262,13 +406,115 @@ def status_api():
     if not session.get("logged_in"):
         return jsonify({"error": "Unauthorized"}), 401
 
-    series_data = services.get_all_series_status()
+    db = get_db()
+    version = services.get_change_version(db)
+    scheduler_stats = download_scheduler.stats(db)
+    resolver_stats = get_source_resolver().snapshot()
+    auto_enabled = scheduler_stats["enabled"]
+    etag = (
+        f"{version}-{get_progress_channel().version}-{int(auto_enabled)}"
+        f"-{scheduler_stats['active']}-{resolver_stats['ready']}-{resolver_stats['resolving']}"
+    )
+    if request.if_none_match.contains(etag):
+        return "", 304
 
-    return jsonify(
-        {
-            "series": series_data,
-            "auto_download_enabled": auto_download_manager_state["enabled"],
+    since = request.args.get("since", type=int)
+    delta = services.get_status_delta(since, db) if since is not None else None
+    if delta is not None:
+        payload = dict(delta, full=False)
+    else:
+        payload = {
+            "version": version,
+            "full": True,
+            "series": services.get_all_series_status(db),
         }
+    payload["auto_download_enabled"] = auto_enabled
+    payload["scheduler"] = scheduler_stats
+    payload["resolver"] = resolver_stats
+    payload["live"] = get_progress_channel().live_snapshot()
+
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@app.route("/metrics")
+def metrics_api():
+    """İndirme sisteminin Prometheus metin biçimindeki metrikleri (tüm işçiler dahil)."""
+    if config.METRICS_TOKEN:
+        expected = f"Bearer {config.METRICS_TOKEN}"
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+            return "Unauthorized\n", 401
+    elif not session.get("logged_in"):
+        return "Unauthorized\n", 401
+
+    db = get_db()
+    stats = download_scheduler.stats(db)
+    try:
+        configured = int(get_setting("CONCURRENT_DOWNLOADS", db))
+    except (ValueError, TypeError):
+        configured = 1
+    registry = metrics.get_registry()
+    resolver_stats = get_source_resolver().snapshot()
+    gauges = [
+        (
+            "episodes",
+            "Duruma göre bölüm sayısı",
+            [({"status": status}, count) for status, count in services.get_status_counts(db).items()],
+        ),
+        ("retry_waiting", "Yeniden deneme beklemesindeki bölümler", [({}, stats["retry_waiting"])]),
+        ("workers_active", "İndirme yapan işçi sayısı", [({}, stats["active"])]),
+        ("workers", "Canlı işçi proses sayısı", [({}, stats["workers"])]),
+        ("download_slots", "Geçerli eşzamanlı indirme limiti", [({}, stats["slots"])]),
+        ("concurrent_downloads", "CONCURRENT_DOWNLOADS ayarı", [({}, configured)]),
+        ("auto_download_enabled", "Otomatik indirme açık mı", [({}, int(stats["enabled"]))]),
+        ("sources_ready", "Kaynağı önceden çözülmüş sıradaki bölümler", [({}, resolver_stats["ready"])]),
+        ("sources_resolving", "Önden çözümlemesi süren bölümler", [({}, resolver_stats["resolving"])]),
+        (
+            "throughput_bytes_per_second",
+            f"Son {config.METRICS_THROUGHPUT_WINDOW} sn'deki toplam indirme hızı",
+            [({}, round(registry.throughput(), 1))],
+        ),
+    ]
+    return Response(
+        registry.render(gauges), mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.route("/events")
+def events_stream():
+    """İndirme durum/ilerleme değişikliklerini Server-Sent Events ile iletir."""
+    if not session.get("logged_in"):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id"
+    )
+    bus = get_event_bus()
+    subscription = bus.subscribe(last_event_id)
+
+    def stream():
+        try:
+            yield f"retry: {config.SSE_RETRY_MS}\n\n"
+            if subscription.missed:
+                yield "event: resync\ndata: {}\n\n"
+            while True:
+                event = subscription.get(timeout=config.SSE_HEARTBEAT_INTERVAL)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield "event: resync\ndata: {}\n\n"
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            bus.unsubscribe(subscription)
+
+    return Response(
+        stream(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -281,5 +527,8 @@ if __name__ == "__main__":
         downloads_folder = get_setting("DOWNLOADS_FOLDER")
         if downloads_folder and not os.path.exists(downloads_folder):
             os.makedirs(downloads_folder)
+    start_background_services()
+    # Dizi sayfası çekimleri soğuk başlatma beklemesin diye tarayıcı havuzunu ısıt
+    threading.Thread(target=get_driver_pool().warm_up, daemon=True).start()
     logger.info("Uygulama başlatılıyor...")
     app.run(debug=True, host="0.0.0.0", port=5000, use_reloader=False)
@@ -0,0 +1,185 @@
+# @author: MembaCo.
+
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from hls_downloader import parse_rate
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(\S*)\s*$")
+
+
+def parse_speed_profiles(text):
+    """
+    '01:00-08:00=0, 18:00-23:30=1M' biçimindeki zaman dilimi profillerini
+    (başlangıç dakikası, bitiş dakikası, bayt/sn) listesine çevirir. 0 veya boş
+    değer o dilimde limit olmadığı anlamına gelir. Gece yarısını aşan dilimler
+    (23:00-06:00) desteklenir; hatalı girdiler atlanır.
+    """
+    profiles = []
+    for part in (text or "").replace(";", ",").split(","):
+        if not part.strip():
+            continue
+        match = PROFILE_RE.match(part)
+        if not match:
+            logger.warning(f"Geçersiz hız profili atlandı: {part.strip()!r}")
+            continue
+        h1, m1, h2, m2, rate = match.groups()
+        profiles.append(
+            (int(h1) * 60 + int(m1), int(h2) * 60 + int(m2), parse_rate(rate) or 0)
+        )
+    return profiles
+
+
+def current_rate(settings, now=None):
+    """Ayarlara ve saate göre geçerli toplam hız limitini (bayt/sn, 0 = limitsiz) döndürür."""
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for start, end, rate in parse_speed_profiles(settings.get("SPEED_PROFILES")):
+        inside = start <= minute < end if start <= end else minute >= start or minute < end
+        if inside:
+            return rate
+    return parse_rate(settings.get("SPEED_LIMIT")) or 0
+
+
+class BandwidthShare:
+    """
+    Bir işçi prosese ayrılan bant genişliği payı. Pay paylaşımlı bellekte durur ve
+    yalnızca ebeveyndeki BandwidthAllocator tarafından yazılır; işçi her parçada
+    güncel değeri okuyarak kendi token bucket'ını doldurur. Süreçler arası kilit
+    kullanılmadığından durdurulan (öldürülen) bir işçi diğerlerini kilitleyemez.
+    """
+
+    BURST_SECONDS = 0.25
+
+    def __init__(self):
+        # Bayt/sn; 0 limitsiz demektir
+        self._rate = multiprocessing.Value("d", 0.0, lock=False)
+        # Hızı sonradan değiştirilemeyen (yt-dlp) indirmenin sabitlediği pay
+        self._fixed = multiprocessing.Value("d", 0.0, lock=False)
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # İşçiye yalnızca paylaşımlı değerler gider; token bucket işçide sıfırdan başlar
+        return {"_rate": self._rate, "_fixed": self._fixed}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._rate.value
+
+    @property
+    def fixed(self):
+        return self._fixed.value
+
+    def set_rate(self, rate):
+        self._rate.value = float(rate or 0)
+
+    def consume(self, amount):
+        """amount bayt için gerekirse bekler (HLSDownloader limiter arayüzü)."""
+        while True:
+            rate = self._rate.value
+            if rate <= 0:
+                return
+            # Boşta geçen süre büyük bir patlamaya dönüşmesin diye kova kısa tutulur
+            capacity = max(rate * self.BURST_SECONDS, amount)
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(capacity, self._tokens + (now - self._last) * rate)
+                self._last = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / rate
+            # Kısa uykular: pay yeniden dağıtılınca yeni hız hemen devreye girer
+            time.sleep(min(wait, 0.25))
+
+    @contextmanager
+    def fixed_rate(self):
+        """
+        yt-dlp gibi hızı çalışırken değiştirilemeyen indirmeler için o anki payı
+        sabitler; dağıtıcı bu payı diğerlerine vermez. Limit yoksa 0 döner.
+        """
+        rate = self._rate.value
+        self._fixed.value = rate
+        try:
+            yield rate
+        finally:
+            self._fixed.value = 0.0
+
+
+class BandwidthAllocator:
+    """
+    Toplam bütçeyi (bayt/sn) o an indirme yapan işçiler arasında eşit böler.
+    Sabitlenmiş (yt-dlp) paylar önce düşülür, kalan bütçe diğer indirmelere
+    dağıtılır; ancak hiçbir pay, sabit olanlar da sayılarak eşit paydan
+    (toplam / etkin indirme sayısı) düşük olmaz. Tek başınayken tüm bütçeyi
+    sabitlemiş bir yt-dlp indirmesi, sonradan gelenleri böylece aç bırakmaz;
+    toplam limit o indirme bitene kadar aşılabilir. İndirme başladığında/bittiğinde
+    ve ayarlar değiştiğinde işçi havuzu tarafından yeniden çağrılır.
+    """
+
+    def __init__(self):
+        self.total = 0.0
+
+    def rebalance(self, active_shares):
+        if self.total <= 0:
+            for share in active_shares:
+                share.set_rate(0)
+            return
+        fixed = [share for share in active_shares if share.fixed > 0]
+        flexible = [share for share in active_shares if share.fixed <= 0]
+        remaining = self.total - sum(share.fixed for share in fixed)
+        if flexible:
+            each = max(remaining / len(flexible), self.total / len(active_shares))
+            for share in flexible:
+                share.set_rate(each)
+
+    def snapshot(self, active_shares):
+        return {
+            "limit": self.total,
+            "allocated": [round(share.rate) for share in active_shares],
+        }
+
+
+_share = None
+_installed = False
+_share_lock = threading.Lock()
+
+
+def get_share():
+    """
+    Bu prosesin bant genişliği payını döndürür. Havuz işçileri ebeveynden gelen
+    payı install() ile kullanır; havuz dışında tek başına çalışırken yerel bir pay
+    oluşturulur.
+    """
+    global _share
+    with _share_lock:
+        if _share is None:
+            _share = BandwidthShare()
+        return _share
+
+
+def is_installed():
+    """Payın ebeveyndeki dağıtıcı tarafından yönetilip yönetilmediği."""
+    return _installed
+
+
+def install(share):
+    """İşçi proseste ebeveynin atadığı payı etkinleştirir."""
+    global _share, _installed
+    _share = share
+    _installed = True
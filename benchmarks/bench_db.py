@@ -0,0 +1,188 @@
+# @author: MembaCo.
+
+"""
+SQLite ayarlarının etkisini ölçer: bağlantı yeniden kullanımı, zamanlayıcı
+sorgusu için indeks ve eşzamanlı yazıcılar altında rollback journal ile WAL.
+
+Kullanım:
+    python benchmarks/bench_db.py --episodes 20000 --writers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_db_")
+os.environ["DATA_DIR"] = WORKDIR
+
+import config  # noqa: E402
+import database  # noqa: E402
+
+SCHEDULER_QUERY = (
+    "SELECT id FROM episodes WHERE status = 'Sırada' ORDER BY created_at ASC LIMIT 1"
+)
+
+
+def build_library(conn, episode_count):
+    statuses = ["Tamamlandı"] * 8 + ["Sırada", "Hata: Sistem hatası"]
+    series_count = max(1, episode_count // 50)
+    conn.executemany(
+        "INSERT INTO series (title, source_url) VALUES (?, ?)",
+        [(f"Dizi {i:04d}", f"https://{config.ALLOWED_DOMAIN}/diziler/{i}") for i in range(series_count)],
+    )
+    conn.executemany(
+        "INSERT INTO seasons (series_id, season_number) VALUES (?, 1)",
+        [(i,) for i in range(1, series_count + 1)],
+    )
+    conn.executemany(
+        "INSERT INTO episodes (season_id, episode_number, url, status, created_at) "
+        "VALUES (?, ?, ?, ?, datetime('now', ?))",
+        [
+            (
+                i % series_count + 1,
+                i,
+                f"https://{config.ALLOWED_DOMAIN}/e/{i}",
+                statuses[i % len(statuses)],
+                f"-{episode_count - i} seconds",
+            )
+            for i in range(episode_count)
+        ],
+    )
+    conn.commit()
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+def report(name, p50, p95, extra=""):
+    print(f"{name:<34} p50 {p50:8.3f} ms   p95 {p95:8.3f} ms   {extra}")
+
+
+def bench_connections(repeat):
+    def fresh():
+        conn = sqlite3.connect(config.DATABASE)
+        conn.execute("SELECT value FROM settings WHERE key = 'SPEED_LIMIT'").fetchone()
+        conn.close()
+
+    def pooled():
+        database.get_setting("SPEED_LIMIT")
+
+    report("ayar okuma: yeni bağlantı", *timed(fresh, repeat))
+    report("ayar okuma: havuzdan bağlantı", *timed(pooled, repeat))
+
+
+def bench_scheduler_index(conn, repeat):
+    report("zamanlayıcı sorgusu: indeksli", *timed(lambda: conn.execute(SCHEDULER_QUERY).fetchall(), repeat))
+    conn.execute("DROP INDEX idx_episodes_status_created")
+    report("zamanlayıcı sorgusu: indekssiz", *timed(lambda: conn.execute(SCHEDULER_QUERY).fetchall(), repeat))
+    conn.execute(
+        "CREATE INDEX idx_episodes_status_created ON episodes (status, created_at)"
+    )
+
+
+def _writer(path, wal, stop_at, episode_ids, errors):
+    conn = sqlite3.connect(path, timeout=5)
+    if wal:
+        conn.execute("PRAGMA synchronous = NORMAL")
+    i = 0
+    while time.time() < stop_at:
+        try:
+            conn.execute(
+                "UPDATE episodes SET progress = ? WHERE id = ?",
+                (i % 100, episode_ids[i % len(episode_ids)]),
+            )
+            conn.commit()
+        except sqlite3.OperationalError:
+            with errors.get_lock():
+                errors.value += 1
+        i += 1
+    conn.close()
+
+
+def bench_concurrency(source_path, writers, duration, wal):
+    path = os.path.join(WORKDIR, f"concurrency_{'wal' if wal else 'delete'}.db")
+    shutil.copy(source_path, path)
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}")
+    if wal:
+        conn.execute("PRAGMA synchronous = NORMAL")
+    episode_ids = [row[0] for row in conn.execute("SELECT id FROM episodes LIMIT 200")]
+
+    errors = multiprocessing.Value("i", 0)
+    stop_at = time.time() + duration
+    processes = [
+        multiprocessing.Process(target=_writer, args=(path, wal, stop_at, episode_ids, errors))
+        for _ in range(writers)
+    ]
+    for process in processes:
+        process.start()
+
+    timings = []
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn.execute(
+                "SELECT e.id, e.status, e.progress FROM episodes e "
+                "JOIN seasons s ON e.season_id = s.id ORDER BY s.series_id, e.episode_number"
+            ).fetchall()
+        except sqlite3.OperationalError:
+            with errors.get_lock():
+                errors.value += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    for process in processes:
+        process.join()
+    conn.close()
+
+    timings.sort()
+    report(
+        f"okuma + {writers} yazıcı: {'WAL/NORMAL' if wal else 'rollback/FULL'}",
+        statistics.median(timings),
+        timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        f"kilit hatası {errors.value}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0, help="eşzamanlılık testi süresi (sn)")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    try:
+        database.setup_database()
+        database.init_settings()
+        conn = database.connect()
+        build_library(conn, args.episodes)
+        print(f"{args.episodes} bölüm")
+
+        bench_connections(args.repeat)
+        bench_scheduler_index(conn, args.repeat)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+
+        bench_concurrency(config.DATABASE, args.writers, args.duration, wal=False)
+        bench_concurrency(config.DATABASE, args.writers, args.duration, wal=True)
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
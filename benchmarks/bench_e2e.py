@@ -0,0 +1,334 @@
+# @author: MembaCo.
+
+"""
+Dizi ekleme -> otomatik indirme -> işçi -> indirici hattını yerel sahte DiziBox,
+iframe zinciri ve HLS sunucuları üzerinde uçtan uca ölçer. Her senaryo kendi
+veri klasörüyle ayrı bir proseste çalışır; saatte bölüm, çözümleme p50/p95,
+bayt/sn ve veritabanı kilit beklemesi raporlanır.
+
+Tarayıcı gerektirmemek için dizi sayfası Selenium yerine düz HTTP ile alınır;
+bölüm kaynakları worker'ın tarayıcısız iframe çözümleyicisiyle bulunur.
+
+Kullanım:
+    python benchmarks/bench_e2e.py --scenarios baseline errors --save sonuc.json
+    python benchmarks/bench_e2e.py --baseline sonuc.json
+    python benchmarks/bench_e2e.py --resolve-ahead 0   # önden çözümleme kapalı
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = {
+    "baseline": {},
+    "latency": {"segment_latency": 0.05, "hop_latency": 0.05},
+    "errors": {"error_rate": 0.05},
+    "slow-resolve": {"hop_latency": 0.3},
+    "yt-dlp": {"engine": "yt-dlp"},
+}
+
+DEFAULTS = {
+    "episodes": 6,
+    "segments": 20,
+    "segment_size": 256 * 1024,
+    "segment_latency": 0.0,
+    "error_rate": 0.0,
+    "hop_latency": 0.0,
+    "engine": "native",
+    "concurrency": 2,
+    "resolve_ahead": 2,
+    "timeout": 300,
+}
+
+# Karşılaştırmada yüksek olanın iyi olduğu metrikler; diğerlerinde düşük olan iyidir
+HIGHER_IS_BETTER = ("episodes_per_hour", "bytes_per_sec")
+METRICS = (
+    "episodes_per_hour",
+    "resolve_p50_ms",
+    "resolve_p95_ms",
+    "bytes_per_sec",
+    "lock_wait_p50_ms",
+    "lock_wait_p95_ms",
+    "lock_wait_max_ms",
+)
+ACTIVE_STATUSES = ("Sırada", "Kaynak aranıyor...", "İndiriliyor")
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LockProbe:
+    """Ayrı bir bağlantıyla düzenli aralıklarla yazma kilidi alıp bekleme süresini ölçer."""
+
+    def __init__(self, database, interval=0.05):
+        self.database = database
+        self.interval = interval
+        self.waits = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        conn = self.database.connect()
+        while not self._stop.wait(self.interval):
+            start = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            self.waits.append(time.perf_counter() - start)
+            conn.rollback()
+        conn.close()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _page_source_over_http(url):
+    import worker
+
+    response = worker.get_http_session().get(url, timeout=15)
+    if response.status_code != 200:
+        return None, f"HTTP {response.status_code}"
+    return response.text, None
+
+
+def patch_application():
+    """
+    Ölçüm için uygulama davranışını değiştirir. İşçiler forkserver ile açıldığından
+    bu değişiklikler işçilerde de geçerli olsun diye modül yüklenirken de uygulanır.
+    """
+    import config
+    import services
+    import worker
+
+    # Yeniden denemeler ölçümü dakikalarca bekletmesin
+    config.RETRY_BASE_DELAY = 1
+    config.RETRY_MAX_DELAY = 5
+    services.get_page_source_with_selenium = _page_source_over_http
+    worker.find_video_source_selenium = lambda target_url, driver_pool=None: (None, None)
+
+
+def run_scenario(spec):
+    """Alt proseste çalışır; DATA_DIR ayarlandıktan sonra uygulama modüllerini yükler."""
+    from flask import Flask
+
+    import config
+    import database
+    import services
+    import worker
+    from benchmarks.hls_fixture import HLSFixture
+    from benchmarks.site_fixture import SiteFixture
+    from scheduler import start_scheduler
+    from worker_pool import get_worker_pool
+
+    patch_application()
+
+    hls = HLSFixture(
+        segments=spec["segments"],
+        segment_size=spec["segment_size"],
+        latency=spec["segment_latency"],
+        error_rate=spec["error_rate"],
+    ).start()
+    site = SiteFixture(
+        hls.master_url, episodes=spec["episodes"], hop_latency=spec["hop_latency"]
+    ).start()
+
+    database.setup_database()
+    database.init_settings()
+    downloads = os.path.join(config.DATA_DIR, "downloads")
+    for key, value in (
+        ("DOWNLOADS_FOLDER", downloads),
+        ("DOWNLOAD_ENGINE", spec["engine"]),
+        ("CONCURRENT_DOWNLOADS", str(spec["concurrency"])),
+        ("RESOLVE_AHEAD", str(spec["resolve_ahead"])),
+    ):
+        database.update_setting(key, value)
+
+    app = Flask(__name__)
+    app.teardown_appcontext(database.close_db)
+    probe = LockProbe(database).start()
+    try:
+        start = time.perf_counter()
+        with app.app_context():
+            success, message = services.add_series_to_queue(site.series_url)
+        if not success:
+            raise SystemExit(message)
+        scrape_seconds = time.perf_counter() - start
+
+        download_scheduler = start_scheduler(
+            app, services.run_auto_download_cycle, get_worker_pool()
+        )
+        start = time.perf_counter()
+        download_scheduler.set_enabled(True)
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with database.pooled_connection() as conn:
+            while time.perf_counter() - start < spec["timeout"]:
+                active = conn.execute(
+                    f"SELECT COUNT(*) FROM episodes WHERE status IN ({placeholders})",
+                    ACTIVE_STATUSES,
+                ).fetchone()[0]
+                if not active:
+                    break
+                time.sleep(0.1)
+            elapsed = time.perf_counter() - start
+            rows = conn.execute("SELECT status, filepath FROM episodes").fetchall()
+        download_scheduler.set_enabled(False)
+    finally:
+        probe.stop()
+        get_worker_pool().shutdown()
+        site.stop()
+        hls.stop()
+
+    completed = [row["filepath"] for row in rows if row["status"] == "Tamamlandı"]
+    total_bytes = sum(
+        os.path.getsize(path) for path in completed if path and os.path.exists(path)
+    )
+    resolve_ms = [t * 1000 for t in site.resolve_times]
+    lock_ms = [t * 1000 for t in probe.waits]
+    return {
+        "spec": spec,
+        "episodes": len(rows),
+        "completed": len(completed),
+        "failed": len(rows) - len(completed),
+        "scrape_ms": round(scrape_seconds * 1000, 1),
+        "elapsed_sec": round(elapsed, 2),
+        "episodes_per_hour": round(len(completed) / elapsed * 3600, 1),
+        "resolve_p50_ms": round(percentile(resolve_ms, 50), 1),
+        "resolve_p95_ms": round(percentile(resolve_ms, 95), 1),
+        "bytes_per_sec": round(total_bytes / elapsed),
+        "lock_wait_p50_ms": round(percentile(lock_ms, 50), 2),
+        "lock_wait_p95_ms": round(percentile(lock_ms, 95), 2),
+        "lock_wait_max_ms": round(max(lock_ms, default=0.0), 2),
+    }
+
+
+def launch(name, spec, verbose):
+    """Senaryoyu temiz bir veri klasörüyle ayrı bir Python prosesinde çalıştırır."""
+    workdir = tempfile.mkdtemp(prefix=f"bench_e2e_{name}_")
+    result_path = os.path.join(workdir, "result.json")
+    env = dict(os.environ, DATA_DIR=workdir)
+    output = None if verbose else subprocess.DEVNULL
+    try:
+        subprocess.run(
+            [sys.executable, __file__, "--run", json.dumps(spec), "--output", result_path],
+            env=env,
+            cwd=ROOT,
+            check=True,
+            stdout=output,
+            stderr=output,
+        )
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def report(name, result):
+    print(
+        f"{name:<14}{result['completed']:>3}/{result['episodes']:<3}"
+        f"{result['episodes_per_hour']:>10.0f}/sa"
+        f"{result['resolve_p50_ms']:>9.0f}{result['resolve_p95_ms']:>8.0f} ms"
+        f"{result['bytes_per_sec'] / 1024 / 1024:>9.1f} MB/sn"
+        f"{result['lock_wait_p50_ms']:>8.2f}{result['lock_wait_p95_ms']:>8.2f}"
+        f"{result['lock_wait_max_ms']:>8.1f} ms"
+    )
+
+
+def compare(results, baseline):
+    print("\nÖnceki sonuçlara göre değişim:")
+    for name, result in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            print(f"  {name}: önceki sonuçta yok")
+            continue
+        changes = []
+        for metric in METRICS:
+            old, new = previous.get(metric), result[metric]
+            if not old:
+                continue
+            delta = (new - old) / old * 100
+            better = delta > 0 if metric in HIGHER_IS_BETTER else delta < 0
+            marker = " " if abs(delta) < 1 else "+" if better else "-"
+            changes.append(f"{metric} {delta:+.1f}%{marker}")
+        print(f"  {name}: " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--episodes", type=int, default=DEFAULTS["episodes"])
+    parser.add_argument("--segments", type=int, default=DEFAULTS["segments"])
+    parser.add_argument("--segment-size", type=int, default=DEFAULTS["segment_size"])
+    parser.add_argument("--concurrency", type=int, default=DEFAULTS["concurrency"])
+    parser.add_argument("--resolve-ahead", type=int, default=DEFAULTS["resolve_ahead"])
+    parser.add_argument("--timeout", type=int, default=DEFAULTS["timeout"])
+    parser.add_argument("--save", help="sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", help="karşılaştırılacak önceki JSON sonucu")
+    parser.add_argument("--verbose", action="store_true", help="alt proses loglarını göster")
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        result = run_scenario(json.loads(args.run))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    print(
+        f"{'senaryo':<14}{'biten':<7}{'bölüm/saat':>9}{'çözümleme p50/p95':>22}"
+        f"{'hız':>13}{'kilit p50/p95/maks':>26}"
+    )
+    results = {}
+    for name in args.scenarios:
+        spec = dict(
+            DEFAULTS,
+            episodes=args.episodes,
+            segments=args.segments,
+            segment_size=args.segment_size,
+            concurrency=args.concurrency,
+            resolve_ahead=args.resolve_ahead,
+            timeout=args.timeout,
+        )
+        spec.update(SCENARIOS[name])
+        results[name] = launch(name, spec, args.verbose)
+        report(name, results[name])
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.strftime("%Y-%m-%d %H:%M:%S"), "scenarios": results},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        print(f"\nSonuçlar kaydedildi: {args.save}")
+
+
+if __name__ == "__mp_main__":
+    # forkserver sunucusu bu dosyayı ana modül olarak yükler; işçiler buradan açılır
+    patch_application()
+
+if __name__ == "__main__":
+    main()
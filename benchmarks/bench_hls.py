@@ -0,0 +1,104 @@
+# @author: MembaCo.
+
+"""
+Yerleşik HLS indiricisini yerel test sunucusu üzerinde yt-dlp ile karşılaştırır.
+
+Kullanım:
+    python benchmarks/bench_hls.py --segments 100 --segment-size 1048576 --latency 0.05
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from benchmarks.hls_fixture import HLSFixture
+from hls_downloader import HLSDownloader
+
+
+def run_native(url, output_path, connections):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=connections * 2)
+    session.mount("http://", adapter)
+    downloader = HLSDownloader(session, url, connections=connections)
+    start = time.perf_counter()
+    downloader.download(output_path)
+    return time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def run_yt_dlp(url, output_dir):
+    # worker.download_with_yt_dlp ile aynı bayraklar
+    output_template = os.path.join(output_dir, "yt-dlp.%(ext)s")
+    cmd = [
+        "yt-dlp",
+        "--newline",
+        "--no-check-certificates",
+        "--hls-use-mpegts",
+        "--quiet",
+        "--format",
+        "best",
+        "-o",
+        output_template,
+        url,
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True, capture_output=True)
+    elapsed = time.perf_counter() - start
+    files = [f for f in os.listdir(output_dir) if f.startswith("yt-dlp.")]
+    size = os.path.getsize(os.path.join(output_dir, files[0])) if files else 0
+    return elapsed, size
+
+
+def report(name, elapsed, size):
+    print(
+        f"{name:<22} {elapsed:8.2f} sn  {size / 1024 / 1024:8.1f} MB  "
+        f"{size / 1024 / 1024 / elapsed:8.1f} MB/sn"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--segments", type=int, default=100)
+    parser.add_argument("--segment-size", type=int, default=512 * 1024)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--encrypted", action="store_true")
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    fixture = HLSFixture(
+        segments=args.segments,
+        segment_size=args.segment_size,
+        latency=args.latency,
+        encrypted=args.encrypted,
+    )
+    workdir = tempfile.mkdtemp(prefix="bench_hls_")
+    try:
+        with fixture:
+            print(
+                f"{args.segments} segment x {args.segment_size // 1024} KB, "
+                f"gecikme {args.latency * 1000:.0f} ms, şifreli: {args.encrypted}"
+            )
+            for connections in args.connections:
+                output_path = os.path.join(workdir, f"native_{connections}.ts")
+                report(
+                    f"native ({connections} bağlantı)",
+                    *run_native(fixture.master_url, output_path, connections),
+                )
+            if shutil.which("yt-dlp"):
+                report("yt-dlp", *run_yt_dlp(fixture.master_url, workdir))
+            else:
+                print("yt-dlp bulunamadı, karşılaştırma atlandı.")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# @author: MembaCo.
+
+"""
+Dizi ekleme yazma yolunu ölçer: eski satır satır SELECT/INSERT ile tek işlemde
+executemany. Her iki yöntemin aynı eklenen bölüm sayısını ve aynı satırları
+ürettiği doğrulanır.
+
+Kullanım:
+    python benchmarks/bench_import.py --episodes 1000 --seasons 10
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_import_")
+os.environ["DATA_DIR"] = WORKDIR
+
+import config  # noqa: E402
+import database  # noqa: E402
+import services  # noqa: E402
+
+
+def legacy_store(db, series_data, status="Sırada"):
+    """Eski uygulama: sezon başına SELECT + INSERT, bölüm başına INSERT OR IGNORE."""
+    cursor = db.cursor()
+    cursor.execute(
+        "SELECT id FROM series WHERE source_url = ?", (series_data["source_url"],)
+    )
+    series_row = cursor.fetchone()
+    if not series_row:
+        cursor.execute(
+            "INSERT INTO series (title, poster_url, description, source_url) VALUES (?, ?, ?, ?)",
+            (
+                series_data["title"],
+                series_data["poster_url"],
+                series_data["description"],
+                series_data["source_url"],
+            ),
+        )
+        series_id = cursor.lastrowid
+    else:
+        series_id = series_row["id"]
+
+    added_count = 0
+    for season in series_data["seasons"]:
+        cursor.execute(
+            "SELECT id FROM seasons WHERE series_id = ? AND season_number = ?",
+            (series_id, season["season_number"]),
+        )
+        season_row = cursor.fetchone()
+        if not season_row:
+            cursor.execute(
+                "INSERT INTO seasons (series_id, season_number) VALUES (?, ?)",
+                (series_id, season["season_number"]),
+            )
+            season_id = cursor.lastrowid
+        else:
+            season_id = season_row["id"]
+        for episode in season["episodes"]:
+            res = cursor.execute(
+                "INSERT OR IGNORE INTO episodes (season_id, episode_number, title, url, status) VALUES (?, ?, ?, ?, ?)",
+                (season_id, episode["episode_number"], episode["title"], episode["url"], status),
+            )
+            if res.rowcount > 0:
+                added_count += 1
+    return series_id, added_count
+
+
+def build_series(index, episodes, seasons):
+    url = f"https://www.dizibox8.com/diziler/dizi-{index}/"
+    per_season = max(1, episodes // seasons)
+    return {
+        "title": f"Dizi {index}",
+        "poster_url": "p",
+        "description": "d",
+        "source_url": url,
+        "seasons": [
+            {
+                "season_number": season,
+                "episodes": [
+                    {
+                        "episode_number": episode,
+                        "title": f"{episode}. Bölüm",
+                        "url": f"{url}{season}-sezon-{episode}-bolum/",
+                    }
+                    for episode in range(1, per_season + 1)
+                ],
+            }
+            for season in range(1, seasons + 1)
+        ],
+    }
+
+
+def snapshot(db, series_id):
+    return db.execute(
+        "SELECT s.season_number, e.episode_number, e.title, e.url, e.status FROM episodes e "
+        "JOIN seasons s ON e.season_id = s.id WHERE s.series_id = ? ORDER BY e.url",
+        (series_id,),
+    ).fetchall()
+
+
+METHODS = (
+    ("eski (satır satır)", legacy_store),
+    ("toplu (executemany)", services._store_series_data),
+)
+
+
+def timed_store(db, store, data, statements=None):
+    if statements is not None:
+        db.set_trace_callback(statements.append)
+    start = time.perf_counter()
+    result = store(db, data)
+    db.commit()
+    elapsed = (time.perf_counter() - start) * 1000
+    db.set_trace_callback(None)
+    return result, elapsed
+
+
+def run(db, datasets):
+    """
+    Yöntemler dizi dizi sırayla çalıştırılır; veritabanı büyüdükçe artan maliyet
+    ikisine eşit yansır. İfadeler (tetikleyicilerinkiler dahil) yalnızca ilk dizide
+    sayılır, izleme geri çağrısı ölçülen süreye eklenmesin diye o dizi ölçülmez.
+    """
+    results = {name: [] for name, _ in METHODS}
+    timings = {name: [] for name, _ in METHODS}
+    statements = {name: [] for name, _ in METHODS}
+    for index, pair in enumerate(datasets):
+        for (name, store), data in zip(METHODS, pair):
+            result, elapsed = timed_store(
+                db, store, data, statements[name] if index == 0 else None
+            )
+            results[name].append(result)
+            if index > 0:
+                timings[name].append(elapsed)
+    for name, _ in METHODS:
+        print(
+            f"{name:<22} p50 {statistics.median(timings[name]):8.2f} ms   "
+            f"{len(statements[name]):6d} ifade   eklenen {results[name][0][1]}"
+        )
+    return [results[name] for name, _ in METHODS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=1000, help="dizi başına bölüm")
+    parser.add_argument("--seasons", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10, help="eklenecek dizi sayısı")
+    args = parser.parse_args()
+
+    try:
+        database.setup_database()
+        db = database.connect()
+        datasets = [
+            (
+                build_series(i, args.episodes, args.seasons),
+                build_series(i + args.repeat, args.episodes, args.seasons),
+            )
+            for i in range(args.repeat)
+        ]
+        print(f"{args.repeat} dizi x {args.episodes} bölüm")
+
+        legacy, batched = run(db, datasets)
+        for (legacy_id, legacy_added), (batched_id, batched_added) in zip(legacy, batched):
+            assert legacy_added == batched_added, "Eklenen bölüm sayıları farklı"
+            legacy_rows = [tuple(r)[1:] for r in snapshot(db, legacy_id)]
+            batched_rows = [tuple(r)[1:] for r in snapshot(db, batched_id)]
+            assert [(r[0], r[1], r[3]) for r in legacy_rows] == [
+                (r[0], r[1], r[3]) for r in batched_rows
+            ], "Eklenen satırlar farklı"
+
+        print("Aynı diziler yeniden eklendiğinde (yeni bölüm yok):")
+        run(db, datasets)
+        db.close()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
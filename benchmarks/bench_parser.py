@@ -0,0 +1,82 @@
+# @author: MembaCo.
+
+"""
+Dizi sayfası ayrıştırıcılarını (BeautifulSoup html.parser ve lxml) karşılaştırır.
+Önce tüm sayfalarda iki ayrıştırıcının aynı çıktıyı verdiği doğrulanır; kayıtlı
+sayfalar --pages ile verilen klasördeki .html dosyalarından okunur.
+
+Kullanım:
+    python benchmarks/bench_parser.py --episodes 100 500 2000 --pages kayitli_sayfalar/
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.series_fixture import build_series_page  # noqa: E402
+from series_parser import BACKENDS, ParseError  # noqa: E402
+
+SERIES_URL = "https://www.dizibox8.com/diziler/ornek-dizi/"
+
+
+def parse(backend, html):
+    try:
+        return BACKENDS[backend](html, SERIES_URL)
+    except ParseError:
+        return None
+
+
+def check_parity(name, html):
+    results = {backend: parse(backend, html) for backend in BACKENDS}
+    reference = results["bs4"]
+    for backend, result in results.items():
+        if result != reference:
+            raise SystemExit(f"{name}: '{backend}' çıktısı bs4'ten farklı")
+    episodes = sum(len(s["episodes"]) for s in reference["seasons"]) if reference else 0
+    print(f"  {name}: aynı çıktı ({episodes} bölüm)")
+
+
+def measure(backend, html, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(backend, html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--episodes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--pages", help="kayıtlı dizi sayfalarının (.html) klasörü")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if "lxml" not in BACKENDS:
+        raise SystemExit("lxml kurulu değil; karşılaştırma yapılamaz.")
+
+    pages = {f"sentetik {n} bölüm": build_series_page(n) for n in args.episodes}
+    if args.pages:
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, "r", encoding="utf-8") as f:
+                pages[os.path.basename(path)] = f.read()
+
+    print("Eşdeğerlik:")
+    for name, html in pages.items():
+        check_parity(name, html)
+
+    print(f"\n{'sayfa':<28}{'boyut':>10}" + "".join(f"{b:>12}" for b in BACKENDS))
+    for name, html in pages.items():
+        row = f"{name:<28}{len(html) / 1024:>8.0f}KB"
+        for backend in BACKENDS:
+            row += f"{measure(backend, html, args.repeat) * 1000:>10.1f}ms"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# @author: MembaCo.
+
+"""
+services.get_all_series_status için sentetik büyük bir kütüphane üzerinde
+/status yoklama gecikmesini ölçer ve eski N+1 sorgu yöntemiyle karşılaştırır.
+
+Kullanım:
+    python benchmarks/bench_status.py --series 400 --episodes 50
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix="bench_status_")
+os.environ["DATA_DIR"] = WORKDIR
+
+import config  # noqa: E402
+import database  # noqa: E402
+import services  # noqa: E402
+
+
+def build_library(conn, series_count, episodes_per_series, seasons_per_series):
+    statuses = ["Sırada", "Tamamlandı", "İndiriliyor", "Duraklatıldı", "Hata: Sistem hatası"]
+    conn.executemany(
+        "INSERT INTO series (title, source_url, poster_url, description) VALUES (?, ?, ?, ?)",
+        [
+            (f"Dizi {i:04d}", f"https://{config.ALLOWED_DOMAIN}/diziler/{i}", "", "açıklama")
+            for i in range(series_count)
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO seasons (series_id, season_number) VALUES (?, ?)",
+        [
+            (series_id, season)
+            for series_id in range(1, series_count + 1)
+            for season in range(1, seasons_per_series + 1)
+        ],
+    )
+    per_season = max(1, episodes_per_series // seasons_per_series)
+    rows = []
+    for season_id in range(1, series_count * seasons_per_series + 1):
+        for episode in range(1, per_season + 1):
+            rows.append(
+                (
+                    season_id,
+                    episode,
+                    f"Bölüm {episode}",
+                    f"https://{config.ALLOWED_DOMAIN}/e/{season_id}/{episode}",
+                    statuses[(season_id + episode) % len(statuses)],
+                )
+            )
+    conn.executemany(
+        "INSERT INTO episodes (season_id, episode_number, title, url, status) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    return len(rows)
+
+
+def legacy_series_status(db):
+    """Eski uygulama: dizi başına bir, sezon başına bir sorgu (N+1)."""
+    series_data = []
+    for s in db.execute(
+        "SELECT id, title, source_url, poster_url, description, created_at, watched "
+        "FROM series ORDER BY title ASC"
+    ).fetchall():
+        series_dict = dict(s)
+        series_dict["seasons"] = []
+        for season in db.execute(
+            "SELECT * FROM seasons WHERE series_id = ? ORDER BY season_number ASC",
+            (s["id"],),
+        ).fetchall():
+            season_dict = dict(season)
+            season_dict["episodes"] = [
+                dict(ep)
+                for ep in db.execute(
+                    "SELECT * FROM episodes WHERE season_id = ? ORDER BY episode_number ASC",
+                    (season["id"],),
+                ).fetchall()
+            ]
+            series_dict["seasons"].append(season_dict)
+        series_data.append(series_dict)
+    return series_data
+
+
+def count_queries(conn, func):
+    queries = []
+    conn.set_trace_callback(queries.append)
+    try:
+        func()
+    finally:
+        conn.set_trace_callback(None)
+    return len(queries)
+
+
+def measure(name, func, repeat, conn):
+    queries = count_queries(conn, func)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(
+        f"{name:<14} {queries:6d} sorgu   p50 {statistics.median(timings):8.1f} ms   "
+        f"p95 {p95:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=400)
+    parser.add_argument("--episodes", type=int, default=50, help="dizi başına bölüm")
+    parser.add_argument("--seasons", type=int, default=3, help="dizi başına sezon")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        database.setup_database()
+        conn = sqlite3.connect(config.DATABASE)
+        conn.row_factory = sqlite3.Row
+        total = build_library(conn, args.series, args.episodes, args.seasons)
+        print(f"{args.series} dizi, {total} bölüm")
+
+        assert legacy_series_status(conn) == services.get_all_series_status(
+            conn
+        ), "Yeni sorgu eski çıktı ile aynı değil"
+
+        measure("eski (N+1)", lambda: legacy_series_status(conn), args.repeat, conn)
+        measure(
+            "tek sorgu",
+            lambda: services.get_all_series_status(conn),
+            args.repeat,
+            conn,
+        )
+        conn.close()
+    finally:
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# @author: MembaCo.
+
+"""
+Video kaynağı çözümleyicisini (worker.find_video_source) yerel sahte DiziBox
+üzerinde kontrol eder: tarayıcısız HTTP yolu (src/data-src iframe, king.php ->
+molystream/cehennemstream zinciri, Referer kontrolü) ve hızlı yol başarısız
+olduğunda Selenium yoluna geçiş.
+
+Varsayılan olarak Selenium yolu Chrome yerine sayfaları HTTP ile alan ve
+document.write betiklerini işleyen küçük bir WebDriver taklidiyle çalışır;
+--browser ile gerçek tarayıcı havuzu kullanılır.
+
+Kullanım:
+    python benchmarks/check_resolver.py
+    python benchmarks/check_resolver.py --browser --verbose
+"""
+
+import argparse
+import base64
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from selenium.common.exceptions import NoSuchElementException  # noqa: E402
+
+import config  # noqa: E402
+import worker  # noqa: E402
+from benchmarks.site_fixture import SiteFixture  # noqa: E402
+
+VIDEO_URL = "http://127.0.0.1:9/video/master.m3u8"
+DOCUMENT_WRITE_RE = re.compile(r'<script>document\.write\(atob\("([^"]+)"\)\);</script>')
+SELECTOR_MARKER_RE = re.compile(r"\[src\*='([^']+)'\]")
+
+
+class ScriptedElement:
+    def __init__(self, src, base_url):
+        self.src = urljoin(base_url, src)
+
+    def get_attribute(self, name):
+        return self.src if name == "src" else None
+
+
+class ScriptedBrowser:
+    """
+    _resolve_with_driver'ın kullandığı kadar WebDriver: get, page_source ve
+    iframe[src*='...'] seçicileriyle find_element. Gerçek tarayıcı gibi adres
+    çubuğundan gidişte Referer göndermez; document.write(atob(...)) betikleri
+    sayfaya işlenir.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.current_url = None
+        self.page_source = ""
+
+    def get(self, url):
+        response = self.session.get(url, timeout=15)
+        self.current_url = url
+        self.page_source = DOCUMENT_WRITE_RE.sub(
+            lambda m: base64.b64decode(m.group(1)).decode(), response.text
+        )
+
+    def find_element(self, by, selector):
+        markers = SELECTOR_MARKER_RE.findall(selector)
+        for tag in worker.IFRAME_TAG_RE.findall(self.page_source):
+            match = re.search(r'\ssrc\s*=\s*["\']([^"\']+)["\']', tag)
+            if match and any(marker in match.group(1) for marker in markers):
+                return ScriptedElement(match.group(1), self.current_url)
+        raise NoSuchElementException(selector)
+
+
+class ScriptedDriverPool:
+    @contextmanager
+    def lease(self):
+        yield ScriptedBrowser()
+
+
+# (ad, SiteFixture seçenekleri, beklenen yol)
+CASES = [
+    ("src iframe, king.php -> molystream", {}, "fast"),
+    (
+        "data-src iframe, king.php -> cehennemstream, Referer zorunlu",
+        {"lazy_iframe": True, "embed_host": "cehennemstream", "require_referer": True},
+        "fast",
+    ),
+    ("ikinci iframe JavaScript ile ekleniyor", {"scripted_embed": True}, "browser"),
+]
+
+
+def run_case(name, options, expected_path):
+    browser_calls = []
+    resolve_with_browser = worker.find_video_source_selenium
+
+    def counting_browser(target_url, driver_pool=None):
+        browser_calls.append(target_url)
+        return resolve_with_browser(target_url, driver_pool)
+
+    worker.find_video_source_selenium = counting_browser
+    try:
+        with SiteFixture(VIDEO_URL, episodes=1, **options) as site:
+            started = time.perf_counter()
+            video_url, referer = worker.find_video_source(site.episode_url())
+            elapsed = time.perf_counter() - started
+            rejected = list(site.rejected)
+    finally:
+        worker.find_video_source_selenium = resolve_with_browser
+
+    path = "browser" if browser_calls else "fast"
+    problems = []
+    if video_url != VIDEO_URL:
+        problems.append(f"video linki {video_url!r}")
+    if not referer or options.get("embed_host", "molystream") not in referer:
+        problems.append(f"referer {referer!r}")
+    if path != expected_path:
+        problems.append(f"{expected_path} yerine {path} yolu kullanıldı")
+    if rejected:
+        problems.append(f"Referer reddedildi: {rejected}")
+    status = "ok  " if not problems else "HATA"
+    print(f"  {status} {name} ({path}, {elapsed * 1000:.0f} ms)")
+    for problem in problems:
+        print(f"         {problem}")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--browser", action="store_true", help="gerçek tarayıcı havuzunu kullan")
+    parser.add_argument("--verbose", action="store_true", help="çözümleyici loglarını göster")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    config.FAST_RESOLVER_ENABLED = True
+    if not args.browser:
+        worker.get_driver_pool = ScriptedDriverPool
+
+    results = [run_case(*case) for case in CASES]
+    failed = results.count(False)
+    print(f"\n{len(results) - failed}/{len(results)} durum geçti.")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# @author: MembaCo.
+
+"""Benchmark'lar için yerel HLS test sunucusu (master/medya listesi, AES-128, hata enjeksiyonu)."""
+
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+TS_PACKET_SIZE = 188
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """İstemcinin bağlantıyı yarıda kesmesini (iptal/devam testleri) hata olarak basmaz."""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class HLSFixture:
+    """Belirtilen segment sayısı, boyutu, gecikmesi ve hata oranı ile HLS yayını sunar."""
+
+    def __init__(
+        self,
+        segments=50,
+        segment_size=512 * 1024,
+        latency=0.0,
+        error_rate=0.0,
+        encrypted=False,
+        seed=42,
+    ):
+        self.segments = segments
+        self.latency = latency
+        self.error_rate = error_rate
+        self.encrypted = encrypted
+        self.key = os.urandom(16)
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # MPEG-TS senkron baytı (0x47) ile başlayan 188 baytlık paketlerden oluşan sahte segment
+        packets = max(1, segment_size // TS_PACKET_SIZE)
+        packet = b"\x47" + os.urandom(TS_PACKET_SIZE - 1)
+        self.segment_payload = packet * packets
+        self.server = None
+        self.thread = None
+
+    @property
+    def segment_bytes(self):
+        return len(self.segment_payload) * self.segments
+
+    def _segment(self, index):
+        if not self.encrypted:
+            return self.segment_payload
+        iv = index.to_bytes(16, "big")
+        return AES.new(self.key, AES.MODE_CBC, iv).encrypt(pad(self.segment_payload, 16))
+
+    def media_playlist(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-TARGETDURATION:6",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        if self.encrypted:
+            lines.append('#EXT-X-KEY:METHOD=AES-128,URI="key.bin"')
+        for i in range(self.segments):
+            lines.extend(["#EXTINF:6.0,", f"seg{i}.ts"])
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def master_playlist(self):
+        return (
+            "#EXTM3U\n"
+            "#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360\n"
+            "media.m3u8\n"
+            "#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720\n"
+            "media.m3u8\n"
+        )
+
+    def _make_handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/octet-stream"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                with fixture._lock:
+                    fixture.requests += 1
+                    fail = fixture._random.random() < fixture.error_rate
+                path = self.path.split("?")[0]
+                if path == "/hls/master.m3u8":
+                    return self._send(
+                        200, fixture.master_playlist().encode(), "application/vnd.apple.mpegurl"
+                    )
+                if path == "/hls/media.m3u8":
+                    return self._send(
+                        200, fixture.media_playlist().encode(), "application/vnd.apple.mpegurl"
+                    )
+                if path == "/hls/key.bin":
+                    return self._send(200, fixture.key)
+                if path.startswith("/hls/seg") and path.endswith(".ts"):
+                    if fixture.latency:
+                        time.sleep(fixture.latency)
+                    if fail:
+                        return self._send(503, b"")
+                    index = int(path[len("/hls/seg") : -len(".ts")])
+                    if index >= fixture.segments:
+                        return self._send(404, b"")
+                    return self._send(200, fixture._segment(index), "video/mp2t")
+                return self._send(404, b"")
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = QuietHTTPServer((host, port), self._make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def master_url(self):
+        return f"{self.base_url}/hls/master.m3u8"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,108 @@
+# @author: MembaCo.
+
+"""Ayrıştırıcı benchmark'ı ve eşdeğerlik kontrolü için sentetik dizi sayfaları."""
+
+import random
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="tr">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta property="og:type" content="video.tv_show">
+<meta property="og:title" content="{title} İzle | Dizibox">
+<title>{title} İzle</title>
+<link rel="stylesheet" href="/wp-content/themes/dizibox/style.css">
+<script>window.dataLayer = window.dataLayer || []; if (a < b && c > d) {{ track("page"); }}</script>
+</head>
+<body class="category">
+<div id="header"><ul class="menu">{menu}</ul></div>
+<div id="icerikcat">
+  <div class="category_image"><a href="{url}"><img src="{poster}" alt="{title}" width="180"></a></div>
+  <div class="category_desc">
+    <p>{description}</p>
+    <!-- yorum: açıklamaya dahil değildir -->
+  </div>
+  <div class="sezonlar">
+"""
+
+PAGE_TAIL = """  </div>
+</div>
+<div id="sidebar">{sidebar}</div>
+<div id="footer"><p>&copy; Dizibox &mdash; Tüm hakları saklıdır.</p></div>
+</body>
+</html>
+"""
+
+EPISODE = """    <div class="{classes}">
+      <a href="{url}" title="{series} {season}. Sezon {episode}. Bölüm">
+        <div class="resim"><img src="/img/{season}-{episode}.jpg" alt=""></div>
+        <div class="baslik">{series}{sep}{season}. Sezon  {episode}. Bölüm
+          {name}
+        </div>
+      </a>
+      <div class="tarih">{date}</div>
+    </div>
+"""
+
+
+def build_series_page(
+    episodes=200,
+    seasons=None,
+    seed=1,
+    title="Örnek Dizi & Co.",
+    base_url="https://www.dizibox8.com",
+):
+    """
+    Dizibox dizi sayfasına benzer bir sayfa üretir. Sezonlar karışık sırada
+    listelenir; bölüm adı olmayan, linksiz, başlığı eşleşmeyen (fragman) ve
+    fazladan sınıf taşıyan öğeler de eklenir.
+    """
+    rng = random.Random(seed)
+    seasons = seasons or max(1, episodes // 20)
+    per_season = max(1, episodes // seasons)
+    menu = "".join(f'<li><a href="/kategori/{i}">Kategori {i}</a></li>' for i in range(40))
+    sidebar = "".join(
+        f'<div class="yorum"><b>Kullanıcı {i}</b><p>Harika bölüm &lt;3 {"çok " * 20}güzel</p></div>'
+        for i in range(150)
+    )
+    url = f"{base_url}/diziler/ornek-dizi/"
+    parts = [
+        PAGE_HEAD.format(
+            title=title,
+            menu=menu,
+            url=url,
+            poster=f"{base_url}/wp-content/uploads/poster.jpg",
+            description="Bir  zamanlar&nbsp;İstanbul'da geçen\n   uzun bir hikâye &amp; daha fazlası.",
+        )
+    ]
+    items = []
+    for season in range(1, seasons + 1):
+        for episode in range(1, per_season + 1):
+            roll = rng.random()
+            if roll < 0.1:
+                name = ""
+            elif roll < 0.15:
+                name = '<div class="bolumismi"></div>'
+            else:
+                name = f'<div class="bolumismi">({rng.choice(["Pilot", "Final", "Geri Dönüş", "Sır"])} {episode})</div>'
+            items.append(
+                EPISODE.format(
+                    classes="bolumust yeni" if roll > 0.95 else "bolumust",
+                    url=f"{base_url}/ornek-dizi-{season}-sezon-{episode}-bolum-izle/",
+                    series=title,
+                    season=season,
+                    episode=episode,
+                    sep=rng.choice([" ", "&nbsp;", "\n        "]),
+                    name=name,
+                    date=f"{rng.randint(1, 28)}.{rng.randint(1, 12)}.20{rng.randint(10, 24)}",
+                )
+            )
+    items.append('    <div class="bolumust"><div class="baslik">Linksiz 9. Sezon 1. Bölüm</div></div>\n')
+    items.append(
+        '    <div class="bolumust"><a href="/fragman/"><div class="baslik">Yeni Sezon Fragmanı</div></a></div>\n'
+    )
+    rng.shuffle(items)
+    parts.extend(items)
+    parts.append(PAGE_TAIL.format(sidebar=sidebar))
+    return "".join(parts)
@@ -0,0 +1,195 @@
+# @author: MembaCo.
+
+"""
+Uçtan uca benchmark ve çözümleyici kontrolleri için yerel DiziBox taklidi: dizi
+sayfası, bölüm sayfası, king.php ve molystream/cehennemstream iframe zinciri ile
+CryptoJS (OpenSSL "Salted__") biçiminde şifrelenmiş video yükü. Video linki
+verilen HLS test sunucusunu gösterir.
+"""
+
+import base64
+import json
+import os
+import re
+import threading
+import time
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from benchmarks.hls_fixture import QuietHTTPServer
+from benchmarks.series_fixture import build_series_page
+
+EPISODE_PATH_RE = re.compile(r"^/ornek-dizi-(\d+)-sezon-(\d+)-bolum-izle/$")
+
+
+def cryptojs_encrypt(plaintext, password):
+    """CryptoJS.AES.encrypt(plaintext, password) çıktısının eşdeğeri."""
+    salt = os.urandom(8)
+    data = password.encode() + salt
+    key = md5(data).digest()
+    key_iv = key
+    while len(key_iv) < 48:
+        key = md5(key + data).digest()
+        key_iv += key
+    cipher = AES.new(key_iv[:32], AES.MODE_CBC, key_iv[32:48])
+    encrypted = cipher.encrypt(pad(plaintext.encode(), AES.block_size))
+    return base64.b64encode(b"Salted__" + salt + encrypted).decode()
+
+
+class SiteFixture:
+    """
+    Dizi sayfasını ve bölüm başına iframe zincirini sunar. Her adım hop_latency
+    kadar gecikir; bölüm başına çözümleme süresi sunucu tarafında ölçülür (bölüm
+    sayfasının istenmesinden şifreli yükün gönderilmesine kadar).
+
+    Sitenin farklı biçimleri için:
+    - lazy_iframe: bölüm sayfasındaki iframe src="about:blank" ve data-src ile gelir
+    - embed_host: ikinci iframe "molystream" ya da "cehennemstream" yolunu kullanır
+    - require_referer: king.php ve gömülü oynatıcı doğru Referer olmadan 403 döner
+    - scripted_embed: king.php ikinci iframe'i JavaScript ile (document.write)
+      ekler; HTML'de görünmediği için yalnızca tarayıcı yolu çözebilir
+    """
+
+    def __init__(
+        self,
+        hls_url,
+        episodes=10,
+        seasons=1,
+        hop_latency=0.0,
+        password="benchmark",
+        lazy_iframe=False,
+        embed_host="molystream",
+        require_referer=False,
+        scripted_embed=False,
+    ):
+        self.hls_url = hls_url
+        self.episodes = episodes
+        self.seasons = seasons
+        self.hop_latency = hop_latency
+        self.password = password
+        self.lazy_iframe = lazy_iframe
+        self.embed_host = embed_host
+        self.require_referer = require_referer
+        self.scripted_embed = scripted_embed
+        self.rejected = []
+        self.resolve_started = {}
+        self.resolve_times = []
+        self._lock = threading.Lock()
+        self._page = None
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def series_url(self):
+        return f"{self.base_url}/diziler/ornek-dizi/"
+
+    def episode_url(self, season=1, episode=1):
+        return f"{self.base_url}/ornek-dizi-{season}-sezon-{episode}-bolum-izle/"
+
+    def _make_handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type="text/html; charset=utf-8"):
+                body = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _referer_ok(self, expected):
+                if not fixture.require_referer:
+                    return True
+                referer = self.headers.get("Referer") or ""
+                if expected in referer:
+                    return True
+                with fixture._lock:
+                    fixture.rejected.append((self.path, referer))
+                self._send(403, "")
+                return False
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                if fixture.hop_latency:
+                    time.sleep(fixture.hop_latency)
+                if path == "/diziler/ornek-dizi/":
+                    return self._send(200, fixture._page)
+                match = EPISODE_PATH_RE.match(path)
+                if match:
+                    key = f"{match.group(1)}-{match.group(2)}"
+                    with fixture._lock:
+                        fixture.resolve_started[key] = time.perf_counter()
+                    player = f"/player/king.php?v={key}"
+                    attributes = (
+                        f'class="lazy" src="about:blank" data-src="{player}"'
+                        if fixture.lazy_iframe
+                        else f'src="{player}"'
+                    )
+                    return self._send(
+                        200,
+                        f'<html><body><div class="video"><iframe {attributes}'
+                        f' width="100%"></iframe></div></body></html>',
+                    )
+                if path == "/player/king.php":
+                    if not self._referer_ok("-bolum-izle/"):
+                        return
+                    iframe = f'<iframe src="/{fixture.embed_host}/embed/{query[2:]}"></iframe>'
+                    if fixture.scripted_embed:
+                        encoded = base64.b64encode(iframe.encode()).decode()
+                        iframe = f"<script>document.write(atob({json.dumps(encoded)}));</script>"
+                    return self._send(200, f"<html><body>{iframe}</body></html>")
+                if path.startswith(f"/{fixture.embed_host}/embed/"):
+                    if not self._referer_ok("/player/king.php"):
+                        return
+                    key = path.rsplit("/", 1)[1]
+                    payload = cryptojs_encrypt(
+                        f'<video><source src="{fixture.hls_url}" type="application/x-mpegURL"></video>',
+                        fixture.password,
+                    )
+                    with fixture._lock:
+                        started = fixture.resolve_started.pop(key, None)
+                        if started is not None:
+                            fixture.resolve_times.append(time.perf_counter() - started)
+                    return self._send(
+                        200,
+                        "<html><body><script>var html = CryptoJS.AES.decrypt("
+                        f'"{payload}", "{fixture.password}").toString(CryptoJS.enc.Utf8);'
+                        "</script></body></html>",
+                    )
+                return self._send(404, "")
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = QuietHTTPServer((host, port), self._make_handler())
+        self._page = build_series_page(
+            self.episodes, self.seasons, base_url=self.base_url
+        )
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
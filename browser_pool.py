@@ -0,0 +1,248 @@
+# @author: MembaCo.
+
+import atexit
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from seleniumwire import undetected_chromedriver as uc
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _build_options():
+    """Havuzdaki tüm tarayıcılar için ortak Chrome seçeneklerini hazırlar."""
+    options = uc.ChromeOptions()
+    options.add_argument("--window-size=1280,720")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--ignore-certificate-errors")
+    options.add_argument("--mute-audio")
+    options.add_argument(f"--user-agent={config.USER_AGENT}")
+    return options
+
+
+class PooledDriver:
+    """Havuzdaki tek bir Chrome örneğini ve kullanım sayacını tutar."""
+
+    def __init__(self, driver, profile_dir):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.uses = 0
+        self.created_at = time.time()
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        if self.profile_dir and os.path.exists(self.profile_dir):
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class DriverPool:
+    """
+    Önceden başlatılmış Chrome örneklerini canlı tutan ve her kaynak çözümü için
+    bir tanesini kiralayan havuz. Tarayıcılar her kiralamadan sonra sıfırlanır,
+    belirli sayıda kullanımdan sonra veya çöktüklerinde yenilenir.
+    """
+
+    def __init__(self, size=None, max_uses=None, name="pool"):
+        self.size = max(1, size or config.BROWSER_POOL_SIZE)
+        # Aynı prosesteki havuzların profil klasörleri çakışmasın diye önek
+        self.name = name
+        self.max_uses = max(1, max_uses or config.BROWSER_MAX_USES)
+        self._idle = []
+        self._leased = 0
+        self._counter = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _profile_dir(self):
+        self._counter += 1
+        return os.path.abspath(
+            os.path.join(
+                config.CHROME_PROFILES_DIR, f"{self.name}_{os.getpid()}_{self._counter}"
+            )
+        )
+
+    def _launch(self):
+        with self._cond:
+            profile_dir = self._profile_dir()
+        if os.path.exists(profile_dir):
+            shutil.rmtree(profile_dir, ignore_errors=True)
+        os.makedirs(profile_dir, exist_ok=True)
+        logger.info(f"Havuz için Chrome başlatılıyor (profil: {profile_dir})...")
+        try:
+            driver = uc.Chrome(user_data_dir=profile_dir, options=_build_options())
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        return PooledDriver(driver, profile_dir)
+
+    @staticmethod
+    def _is_healthy(pooled):
+        try:
+            pooled.driver.execute_script("return 1")
+            return len(pooled.driver.window_handles) > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(pooled):
+        """Kiralama sonrası çerezleri, fazladan sekmeleri ve yakalanan istekleri temizler."""
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+        driver.delete_all_cookies()
+        try:
+            driver.execute_script(
+                "window.localStorage.clear(); window.sessionStorage.clear();"
+            )
+        except Exception:
+            pass
+        try:
+            del driver.requests
+        except Exception:
+            pass
+
+    def warm_up(self):
+        """Havuzu belirlenen boyuta kadar önceden doldurur."""
+        while True:
+            with self._cond:
+                if self._closed or len(self._idle) + self._leased >= self.size:
+                    return
+                self._leased += 1
+            try:
+                pooled = self._launch()
+            except Exception as e:
+                logger.error(f"Havuz ısıtılırken Chrome başlatılamadı: {e}")
+                with self._cond:
+                    self._leased -= 1
+                    self._cond.notify()
+                return
+            with self._cond:
+                self._leased -= 1
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Tarayıcı havuzu kapatıldı.")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    self._leased += 1
+                    break
+                if len(self._idle) + self._leased < self.size:
+                    self._leased += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Havuzda boş tarayıcı bulunamadı.")
+                self._cond.wait(remaining)
+
+        if pooled is not None and not self._is_healthy(pooled):
+            logger.warning("Havuzdaki tarayıcı sağlıksız bulundu, yenisi başlatılıyor.")
+            pooled.quit()
+            pooled = None
+        if pooled is None:
+            try:
+                pooled = self._launch()
+            except Exception:
+                self._release_slot()
+                raise
+        return pooled
+
+    def _release_slot(self):
+        with self._cond:
+            self._leased -= 1
+            self._cond.notify()
+
+    def _return(self, pooled, broken):
+        pooled.uses += 1
+        recycle = pooled.uses >= self.max_uses or self._closed
+        if broken and not recycle:
+            # Zaman aşımı gibi hatalar tarayıcıyı bozmaz; sadece çökmüşse yenile.
+            recycle = not self._is_healthy(pooled)
+        if not recycle:
+            try:
+                self._reset(pooled)
+            except Exception as e:
+                logger.warning(f"Tarayıcı sıfırlanamadı, yenilenecek: {e}")
+                recycle = True
+        if recycle:
+            logger.info(
+                f"Tarayıcı yenileniyor ({pooled.uses} kullanım, hata: {broken})."
+            )
+            pooled.quit()
+            self._release_slot()
+            return
+        with self._cond:
+            self._leased -= 1
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=300):
+        """
+        Havuzdan bir tarayıcı kiralar. Blok içinde bir istisna oluşursa tarayıcının
+        sağlığı kontrol edilir; çökmüşse havuza geri konmak yerine kapatılır.
+        """
+        pooled = self._acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            self._return(pooled, broken)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            pooled.quit()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """Bu prosese ait tarayıcı havuzunu döndürür (gerekirse oluşturur)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Fork edilen alt proseslerin ebeveyn havuzunu devralmaması için PID kontrolü
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = DriverPool()
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_driver_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_driver_pool)
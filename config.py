@@ -21,14 +21,122 @@ ADMIN_PASSWORD_HASH = os.getenv("ADMIN_PASSWORD_HASH", "scrypt:32768:8:1$...")
 
 # --- Veritabanı Ayarları ---
 DATABASE = os.path.join(DATA_DIR, os.environ.get("DATABASE_FILE", "database.db"))
+# Kilit çakışmalarında hata vermeden önce beklenecek süre ve havuzda tutulacak
+# boşta bağlantı sayısı.
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_POOL_SIZE = 8
 
 # --- Web Scraping Ayarları ---
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36"
 VIDEO_KEYWORDS = [".m3u8", "manifest", ".txt"]
+
+# --- Tarayıcı Havuzu Ayarları ---
+# Her proseste canlı tutulacak Chrome sayısı ve bir tarayıcının yenilenmeden önce
+# kaç kez kullanılabileceği.
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 1))
+BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", 20))
+CHROME_PROFILES_DIR = os.environ.get("CHROME_PROFILES_DIR", "chrome_profiles")
+
+# --- HTML Ayrıştırıcı ---
+# Dizi sayfaları için ayrıştırıcı: "lxml", "bs4" veya "auto" (lxml kuruluysa lxml).
+HTML_PARSER = os.environ.get("HTML_PARSER", "auto")
+
+# --- Hızlı (Tarayıcısız) Kaynak Çözümleme ---
+# Açıksa iframe zinciri önce requests ile çözülür, başarısız olursa Selenium'a geçilir.
+FAST_RESOLVER_ENABLED = os.environ.get("FAST_RESOLVER_ENABLED", "1") == "1"
+HTTP_POOL_CONNECTIONS = 16
+HTTP_POOL_MAXSIZE = 32
 # İndirme klasörü artık Ayarlar'dan yönetildiği için buradan kaldırıldı.
 
+# --- İzleme (/metrics) ---
+# Ayarlanırsa /metrics yalnızca "Authorization: Bearer <token>" başlığıyla erişilebilir;
+# boşsa oturum açmış kullanıcılar görebilir. Anlık indirme hızı bu pencere (sn) üzerinden hesaplanır.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+METRICS_THROUGHPUT_WINDOW = 10
+
+# --- Aşama Kayıtları ---
+# İndirme denemelerinin aşama süreleri veritabanında en fazla bu kadar deneme için tutulur.
+TRACE_HISTORY_JOBS = int(os.environ.get("TRACE_HISTORY_JOBS", 500))
+
+# --- Profil Alma ---
+# Ayarlar sayfasından istenen profiller DATA_DIR/profiles altına yazılır; en yeni
+# PROFILE_KEEP dosya tutulur. Web prosesi en fazla PROFILE_MAX_SECONDS boyunca
+# PROFILE_SAMPLE_INTERVAL aralıkla örneklenir, tek istekte en fazla PROFILE_MAX_JOBS iş profillenir.
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 20))
+PROFILE_MAX_SECONDS = 300
+PROFILE_SAMPLE_INTERVAL = 0.01
+PROFILE_MAX_JOBS = 20
+
 # --- Hedef Site Ayarları ---
 ALLOWED_DOMAIN = "dizibox8.com"
 
 # --- Otomatik İndirme Ayarları ---
-AUTO_DOWNLOAD_POLL_INTERVAL = 10
+# Zamanlayıcı olaylarla uyanır; bu süre yalnızca kaçan olaylara karşı güvenlik taramasıdır.
+SCHEDULER_RESCAN_INTERVAL = 60
+
+# --- Önden Çözümleme Ayarları ---
+# Ayarlardaki Eşzamanlı Çözümleme değeri en fazla RESOLVE_MAX_CONCURRENCY olabilir.
+# Önbellekteki bir kaynağın indirmeye hazır sayılması için süresinin dolmasına en
+# az RESOLVE_AHEAD_MIN_REMAINING saniye (önbellek süresinin yarısını aşmadan) kalmalıdır.
+RESOLVE_MAX_CONCURRENCY = 5
+RESOLVE_AHEAD_MIN_REMAINING = int(os.environ.get("RESOLVE_AHEAD_MIN_REMAINING", 300))
+# Önden çözümleme aşamasının kendi tarayıcı havuzundaki Chrome sayısı; dizi ekleme
+# ve takip listesi yenilemeleriyle aynı tarayıcıları beklemez
+RESOLVE_BROWSER_POOL_SIZE = int(os.environ.get("RESOLVE_BROWSER_POOL_SIZE", 1))
+
+# --- Toplu Dizi Ekleme Ayarları ---
+# Eklenen diziler en fazla bu kadar sayfa aynı anda çekilecek şekilde işlenir;
+# son IMPORT_HISTORY_SIZE işin durumu arayüzde gösterilmek üzere bellekte tutulur.
+IMPORT_CONCURRENCY = int(os.environ.get("IMPORT_CONCURRENCY", 2))
+IMPORT_HISTORY_SIZE = 500
+
+# --- Takip Listesi Ayarları ---
+# Takip edilen diziler en fazla bu kadar iş parçacığında (her biri bir tarayıcı
+# kiralar) aynı anda yenilenir. Ayarlardaki yenileme aralığı bu değerin altına inemez.
+WATCHLIST_CONCURRENCY = int(os.environ.get("WATCHLIST_CONCURRENCY", 2))
+WATCHLIST_MIN_INTERVAL_HOURS = 0.25
+
+# --- Yeniden Deneme Ayarları ---
+# Geçici ağ hatalarıyla biten bölümler en fazla RETRY_MAX_ATTEMPTS kez, üstel artan
+# (RETRY_BASE_DELAY, 2x, 4x ... en fazla RETRY_MAX_DELAY saniye) ve rastgele
+# dağıtılmış beklemelerle otomatik olarak yeniden sıraya alınır.
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS", 5))
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 3600
+
+# --- İşçi Havuzu Ayarları ---
+# İndirme işçileri bu kadar işten sonra ya da bellek kullanımları ilk işe göre bu
+# kadar MB büyüdüğünde yenilenir. WORKER_WARM_BROWSER açıksa her işçi başlarken
+# bir Chrome örneğini önceden açar.
+WORKER_MAX_JOBS = int(os.environ.get("WORKER_MAX_JOBS", 25))
+WORKER_MAX_RSS_GROWTH_MB = int(os.environ.get("WORKER_MAX_RSS_GROWTH_MB", 512))
+WORKER_WARM_BROWSER = os.environ.get("WORKER_WARM_BROWSER", "0") == "1"
+
+# --- Uyarlanabilir Eşzamanlılık (AIMD) Ayarları ---
+# Açıldığında Eşzamanlı İndirme ve HLS Bağlantı Sayısı ayarları üst sınır olur.
+# Kısıtlama (429/503) veya bu orandan fazla hatalı istek görülürse değerler
+# ADAPTIVE_DECREASE ile çarpılır; toplam verim ADAPTIVE_GAIN_TOLERANCE oranından
+# fazla düşmediyse birer artırılır.
+ADAPTIVE_MIN_JOBS = 1
+ADAPTIVE_ERROR_RATE = 0.05
+ADAPTIVE_DECREASE = 0.5
+ADAPTIVE_GAIN_TOLERANCE = 0.9
+ADAPTIVE_EWMA = 0.3
+# Zamanlayıcı yalnızca bu süre (sn) içinde kullanılmış sunucuların limitlerini dikkate alır
+ADAPTIVE_HOST_WINDOW = 600
+
+# --- İlerleme Raporlama Ayarları ---
+# İşçiler ilerlemeyi en fazla bu aralıkla (saniye) ebeveyn prosese iletir; ebeveyn
+# biriken değerleri bu aralıkla toplu halde veritabanına yazar.
+PROGRESS_REPORT_INTERVAL = 0.5
+PROGRESS_FLUSH_INTERVAL = 2.0
+
+# --- Durum API Ayarları ---
+# /status?since= delta yanıtları için saklanacak en fazla silme kaydı (tombstone).
+TOMBSTONE_RETENTION = 5000
+
+# --- Canlı Olay Akışı (SSE) Ayarları ---
+SSE_HEARTBEAT_INTERVAL = 15
+SSE_RETRY_MS = 3000
+EVENT_HISTORY_SIZE = 1000
+EVENT_SUBSCRIBER_QUEUE_SIZE = 1000
@@ -1,21 +1,100 @@
 # @author: MembaCo.
 
+import os
+import queue
 import sqlite3
 import logging
+import threading
+from contextlib import contextmanager
 from flask import g
 import config
 
 logger = logging.getLogger(__name__)
 
 
+def connect():
+    """
+    Uygulama genelindeki ayarlarla yeni bir SQLite bağlantısı açar: WAL ile
+    okuyucular yazıcıları beklemez, synchronous=NORMAL WAL'da güvenli ve hızlıdır,
+    busy_timeout kilit çakışmalarında hemen hata vermek yerine bekler.
+    """
+    conn = sqlite3.connect(
+        config.DATABASE,
+        timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+class ConnectionPool:
+    """İstek işleyen kısa ömürlü thread'ler için yeniden kullanılan bağlantı havuzu."""
+
+    def __init__(self, size):
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._pid = os.getpid()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return connect()
+
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        # Fork edilen proseslerde ebeveynin bağlantıları kullanılmamalı
+        if _pool is None or _pool._pid != os.getpid():
+            _pool = ConnectionPool(config.SQLITE_POOL_SIZE)
+        return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """Havuzdan bir bağlantı ödünç alır ve blok sonunda geri verir."""
+    pool = _get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
+def get_connection():
+    """
+    Uzun ömürlü thread ve prosesler (işçiler, zamanlayıcı, ilerleme kanalı) için
+    thread'e özel, yeniden kullanılan bağlantıyı döndürür.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "pid", None) != os.getpid():
+        conn = connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
 def get_db():
     if "db" not in g:
         try:
-            g.db = sqlite3.connect(
-                config.DATABASE, detect_types=sqlite3.PARSE_DECLTYPES
-            )
-            g.db.row_factory = sqlite3.Row
-            g.db.execute("PRAGMA foreign_keys = ON")
+            g.db = _get_pool().acquire()
         except sqlite3.Error as e:
             logger.error(f"Veritabanı bağlantısı kurulamadı: {e}", exc_info=True)
             raise e
@@ -25,61 +104,322 @@ def get_db():
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        _get_pool().release(db)
 
 
-def setup_database():
-    try:
-        db = sqlite3.connect(config.DATABASE)
-        db.execute("PRAGMA foreign_keys = ON")
-        cursor = db.cursor()
-        logger.info("Veritabanı tabloları kontrol ediliyor/oluşturuluyor...")
+def _add_column_if_missing(cursor, table, column, declaration):
+    """Eski veritabanlarına yeni sütunu ekler."""
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _create_change_tracking(cursor):
+    """
+    /status delta API'si için değişiklik sürümü altyapısı. Her ekleme/güncelleme
+    global sürümü artırır ve satıra yazar; silinen kayıtlar tombstone olarak tutulur.
+    Tetikleyiciler sayesinde işçi prosesler dahil tüm yazıcılar otomatik kapsanır.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS change_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0,
+        tombstone_floor INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO change_version (id, version) VALUES (1, 0)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS deleted_items (
+        kind TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        version INTEGER NOT NULL
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_deleted_items_version ON deleted_items (version)"
+    )
 
-        # --- DİZİ TABLOLARI ---
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS series (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            source_url TEXT NOT NULL UNIQUE,
-            poster_url TEXT,
-            description TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    for table, kind in (("series", "series"), ("episodes", "episode")):
+        _add_column_if_missing(cursor, table, "version", "INTEGER NOT NULL DEFAULT 0")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_version ON {table} (version)"
         )
+        bump = f"""
+            UPDATE change_version SET version = version + 1 WHERE id = 1;
+            UPDATE {table} SET version = (SELECT version FROM change_version WHERE id = 1)
+            WHERE id = NEW.id;
+        """
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_version AFTER INSERT ON {table}
+        BEGIN {bump} END
         """)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS seasons (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            series_id INTEGER NOT NULL,
-            season_number INTEGER NOT NULL,
-            FOREIGN KEY (series_id) REFERENCES series (id) ON DELETE CASCADE,
-            UNIQUE (series_id, season_number)
-        )
+        # Sürüm sütununun kendisini güncelleyen iç UPDATE tekrar tetiklenmesin
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update_version AFTER UPDATE ON {table}
+        WHEN NEW.version = OLD.version
+        BEGIN {bump} END
         """)
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS episodes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            season_id INTEGER NOT NULL,
-            episode_number INTEGER NOT NULL,
-            title TEXT,
-            url TEXT NOT NULL UNIQUE,
-            status TEXT NOT NULL DEFAULT 'Sırada',
-            progress REAL DEFAULT 0.0,
-            filepath TEXT,
-            pid INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (season_id) REFERENCES seasons (id) ON DELETE CASCADE
-        )
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_version AFTER DELETE ON {table}
+        BEGIN
+            UPDATE change_version SET version = version + 1 WHERE id = 1;
+            INSERT INTO deleted_items (kind, item_id, version)
+            VALUES ('{kind}', OLD.id, (SELECT version FROM change_version WHERE id = 1));
+        END
         """)
 
-        # --- AYARLAR TABLOSU ---
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY,
-            value TEXT
-        )
+
+def _migration_base_schema(cursor):
+    # --- DİZİ TABLOLARI ---
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS series (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        source_url TEXT NOT NULL UNIQUE,
+        poster_url TEXT,
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS seasons (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        series_id INTEGER NOT NULL,
+        season_number INTEGER NOT NULL,
+        FOREIGN KEY (series_id) REFERENCES series (id) ON DELETE CASCADE,
+        UNIQUE (series_id, season_number)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS episodes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        season_id INTEGER NOT NULL,
+        episode_number INTEGER NOT NULL,
+        title TEXT,
+        url TEXT NOT NULL UNIQUE,
+        status TEXT NOT NULL DEFAULT 'Sırada',
+        progress REAL DEFAULT 0.0,
+        filepath TEXT,
+        pid INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (season_id) REFERENCES seasons (id) ON DELETE CASCADE
+    )
+    """)
+
+    # --- AYARLAR TABLOSU ---
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+    """)
+
+
+def _migration_resolved_sources(cursor):
+    # --- ÇÖZÜLMÜŞ KAYNAK ÖNBELLEĞİ ---
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS resolved_sources (
+        episode_url TEXT PRIMARY KEY,
+        video_url TEXT NOT NULL,
+        referer TEXT,
+        resolved_at REAL NOT NULL
+    )
+    """)
+
+
+def _migration_status_indexes(cursor):
+    # Durum ekranındaki dizi -> sezon -> bölüm sıralı okumaları için; sorgunun
+    # geçici B-tree sıralamasına düşmeden indeks sırasıyla yürümesini sağlar.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_series_title ON series (title, id)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_episodes_season_episode ON episodes (season_id, episode_number)"
+    )
+
+
+def _migration_scheduler_indexes(cursor):
+    # Zamanlayıcının "sıradaki en eski bölüm" sorgusu. seasons(series_id) için
+    # UNIQUE (series_id, season_number) kısıtının otomatik indeksi, episodes(season_id)
+    # için idx_episodes_season_episode zaten kullanılır.
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_episodes_status_created ON episodes (status, created_at)"
+    )
+
+
+def _migration_queue_priority(cursor):
+    # Manuel öne alma için öncelikler ve diziler arası sıra paylaşımı (round-robin)
+    # için dizinin en son ne zaman indirmeye verildiği.
+    _add_column_if_missing(cursor, "episodes", "priority", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(cursor, "series", "priority", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(cursor, "series", "last_dispatched_at", "REAL")
+    # Bir sezonun sıradaki ilk bölümüne doğrudan erişim ve öne alınmış bölümler
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_episodes_queue ON episodes (season_id, status, episode_number)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_episodes_bumped ON episodes (status, priority)"
+    )
+
+
+def _migration_host_limits(cursor):
+    # Uyarlanabilir eşzamanlılık denetleyicisinin CDN sunucusu başına durumu
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS host_limits (
+        host TEXT PRIMARY KEY,
+        jobs INTEGER NOT NULL,
+        connections INTEGER NOT NULL,
+        throughput REAL,
+        error_rate REAL NOT NULL DEFAULT 0,
+        samples INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL
+    )
+    """)
+
+
+def _migration_retry_backoff(cursor):
+    # Geçici hatalarla biten bölümlerin yeniden deneme sayısı ve en erken deneme zamanı
+    _add_column_if_missing(cursor, "episodes", "retry_count", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(cursor, "episodes", "next_attempt_at", "REAL")
+    _add_column_if_missing(cursor, "episodes", "last_error", "TEXT")
+    # Zamanlayıcının bir sonraki uyanma zamanını bulması için
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_episodes_retry ON episodes (status, next_attempt_at)"
+    )
+
+
+def _migration_watchlist(cursor):
+    # Takip listesi: dizinin takip edilip edilmediği, son ayrıştırılan bölüm
+    # listesinin özeti ve kontrol zamanları
+    _add_column_if_missing(cursor, "series", "watched", "INTEGER NOT NULL DEFAULT 0")
+    _add_column_if_missing(cursor, "series", "content_hash", "TEXT")
+    _add_column_if_missing(cursor, "series", "last_checked_at", "REAL")
+    _add_column_if_missing(cursor, "series", "next_check_at", "REAL")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_series_watch ON series (watched, next_check_at)"
+    )
+
+
+def _migration_batched_versions(cursor):
+    # Toplu eklemeler sürümü bir kez artırıp satırlara kendisi yazar; tetikleyici
+    # yalnızca sürümü verilmemiş (tekil) eklemelerde çalışır
+    for table in ("series", "episodes"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table}_insert_version")
+        cursor.execute(f"""
+        CREATE TRIGGER trg_{table}_insert_version AFTER INSERT ON {table}
+        WHEN NEW.version = 0
+        BEGIN
+            UPDATE change_version SET version = version + 1 WHERE id = 1;
+            UPDATE {table} SET version = (SELECT version FROM change_version WHERE id = 1)
+            WHERE id = NEW.id;
+        END
         """)
 
-        db.commit()
+
+def _migration_job_traces(cursor):
+    # İndirme denemelerinin aşama süreleri (depth 0 = denemenin tamamı)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS job_traces (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL,
+        episode_id INTEGER NOT NULL REFERENCES episodes(id) ON DELETE CASCADE,
+        attempt INTEGER NOT NULL DEFAULT 0,
+        stage TEXT NOT NULL,
+        depth INTEGER NOT NULL,
+        started_at REAL NOT NULL,
+        ended_at REAL NOT NULL,
+        outcome TEXT NOT NULL,
+        detail TEXT
+    )
+    """)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_traces_episode ON job_traces (episode_id, depth, started_at)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_traces_job ON job_traces (job_id)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_traces_recent ON job_traces (depth, started_at)"
+    )
+
+
+# Dizinin istemcilere gösterilmeyen iç takip sütunları. Takip listesi her
+# kontrolde bunları yazar; sürümü artırsalardı hiçbir şey değişmeden her yenileme
+# istemcilere delta ve SSE güncellemesi olarak giderdi.
+SERIES_BOOKKEEPING_COLUMNS = (
+    "content_hash",
+    "last_checked_at",
+    "next_check_at",
+    "last_dispatched_at",
+)
+
+
+def _migration_quiet_bookkeeping(cursor):
+    # Güncelleme tetikleyicisi yalnızca izlenen sütunlar yazıldığında çalışır.
+    # series tablosuna sütun ekleyen sonraki geçişler tetikleyiciyi yeniden kurmalıdır.
+    columns = [
+        row[1]
+        for row in cursor.execute("PRAGMA table_info(series)").fetchall()
+        if row[1] not in SERIES_BOOKKEEPING_COLUMNS and row[1] != "version"
+    ]
+    cursor.execute("DROP TRIGGER IF EXISTS trg_series_update_version")
+    cursor.execute(f"""
+    CREATE TRIGGER trg_series_update_version AFTER UPDATE OF {", ".join(columns)} ON series
+    WHEN NEW.version = OLD.version
+    BEGIN
+        UPDATE change_version SET version = version + 1 WHERE id = 1;
+        UPDATE series SET version = (SELECT version FROM change_version WHERE id = 1)
+        WHERE id = NEW.id;
+    END
+    """)
+
+
+def next_change_version(conn):
+    """Değişiklik sürümünü bir artırır ve yeni değeri döndürür (toplu yazımlar için)."""
+    conn.execute("UPDATE change_version SET version = version + 1 WHERE id = 1")
+    return conn.execute("SELECT version FROM change_version WHERE id = 1").fetchone()[0]
+
+
+# Sıralı şema geçişleri. Veritabanının sürümü PRAGMA user_version'da tutulur; her
+# geçiş yalnızca bir kez, kendi işlemi içinde uygulanır. Yeni geçişler sona eklenir.
+MIGRATIONS = [
+    _migration_base_schema,
+    _migration_resolved_sources,
+    _migration_status_indexes,
+    _create_change_tracking,
+    _migration_scheduler_indexes,
+    _migration_queue_priority,
+    _migration_host_limits,
+    _migration_retry_backoff,
+    _migration_watchlist,
+    _migration_batched_versions,
+    _migration_job_traces,
+    _migration_quiet_bookkeeping,
+]
+
+
+def setup_database():
+    try:
+        db = sqlite3.connect(config.DATABASE, timeout=config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        db.isolation_level = None
+        db.execute("PRAGMA foreign_keys = ON")
+        # WAL modu veritabanı dosyasında kalıcıdır, bir kez ayarlamak yeterli
+        db.execute("PRAGMA journal_mode = WAL")
+        cursor = db.cursor()
+        logger.info("Veritabanı tabloları kontrol ediliyor/oluşturuluyor...")
+
+        current = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for version, migration in enumerate(MIGRATIONS, start=1):
+            if version <= current:
+                continue
+            logger.info(f"Veritabanı geçişi uygulanıyor: {version} ({migration.__name__})")
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+                cursor.execute("COMMIT")
+            except sqlite3.Error:
+                cursor.execute("ROLLBACK")
+                raise
+
         db.close()
         logger.info("Veritabanı kurulumu başarıyla tamamlandı.")
     except sqlite3.Error as e:
@@ -94,58 +434,54 @@ def init_settings():
         "SERIES_FILENAME_TEMPLATE": "{series_title}/Season {season_number:02d}/{series_title} - S{season_number:02d}E{episode_number:02d} - {episode_title}",
         "CONCURRENT_DOWNLOADS": "1",
         "SPEED_LIMIT": "",
+        "SPEED_PROFILES": "",
+        "SOURCE_CACHE_TTL": "3600",
+        "RESOLVE_AHEAD": "0",
+        "RESOLVE_CONCURRENCY": "2",
+        "DOWNLOAD_ENGINE": "yt-dlp",
+        "HLS_CONNECTIONS": "4",
+        "ADAPTIVE_CONCURRENCY": "0",
+        "WATCHLIST_INTERVAL_HOURS": "6",
+        "WATCHLIST_AUTO_QUEUE": "1",
+        "PROFILE_JOBS": "0",
         "ADMIN_PASSWORD_HASH": config.ADMIN_PASSWORD_HASH,
     }
 
     try:
-        db = sqlite3.connect(config.DATABASE)
-        cursor = db.cursor()
-        for key, value in defaults.items():
-            cursor.execute(
+        with pooled_connection() as db:
+            db.executemany(
                 "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
-                (key, value),
+                defaults.items(),
             )
-        db.commit()
-        db.close()
+            db.commit()
         logger.info("Varsayılan ayarlar veritabanına yüklendi.")
     except sqlite3.Error as e:
         logger.error(f"Varsayılan ayarlar yüklenirken hata oluştu: {e}", exc_info=True)
 
 
 def get_setting(key, db_conn=None):
-    close_conn = False
     if db_conn is None:
-        db_conn = sqlite3.connect(config.DATABASE)
-        close_conn = True
+        with pooled_connection() as conn:
+            return get_setting(key, conn)
 
-    cursor = db_conn.cursor()
-    row = cursor.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
-    if close_conn:
-        db_conn.close()
+    row = db_conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
     return row[0] if row else None
 
 
 def get_all_settings(db_conn=None):
-    close_conn = False
     if db_conn is None:
-        db_conn = sqlite3.connect(config.DATABASE)
-        db_conn.row_factory = sqlite3.Row
-        close_conn = True
+        with pooled_connection() as conn:
+            return get_all_settings(conn)
 
     rows = db_conn.execute("SELECT key, value FROM settings").fetchall()
-    if close_conn:
-        db_conn.close()
-    return {row["key"]: row["value"] for row in rows}
+    return {row[0]: row[1] for row in rows}
 
 
 def update_setting(key, value, db_conn=None):
-    close_conn = False
     if db_conn is None:
-        db_conn = sqlite3.connect(config.DATABASE)
-        close_conn = True
-
-    cursor = db_conn.cursor()
-    cursor.execute("UPDATE settings SET value = ? WHERE key = ?", (value, key))
-    if close_conn:
-        db_conn.commit()
-        db_conn.close()
+        with pooled_connection() as conn:
+            update_setting(key, value, conn)
+            conn.commit()
+        return
+
+    db_conn.execute("UPDATE settings SET value = ? WHERE key = ?", (value, key))
@@ -0,0 +1,112 @@
+# @author: MembaCo.
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+import config
+
+
+class Subscription:
+    """Tek bir SSE istemcisinin olay kuyruğu."""
+
+    def __init__(self, missed=False):
+        self.queue = queue.Queue(maxsize=config.EVENT_SUBSCRIBER_QUEUE_SIZE)
+        # İstemcinin Last-Event-ID'si geçmişte tutulan olaylardan eskiyse True
+        self.missed = missed
+        self.overflowed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """
+    Flask prosesindeki olay yayıncısı. Olaylar "<dönem>-<sıra>" biçiminde artan
+    ID'lerle numaralandırılır ve yeniden bağlanan istemcilerin Last-Event-ID ile
+    kaçırdıklarını alabilmesi için son EVENT_HISTORY_SIZE olay bellekte tutulur.
+    Dönem her açılışta değişir; sunucu yeniden başladıktan sonra gelen eski bir
+    ID ile sıra numarası karşılaştırılmaz, istemciden tam senkron istenir.
+    """
+
+    def __init__(self, history_size=None):
+        self._history = deque(maxlen=history_size or config.EVENT_HISTORY_SIZE)
+        self._subscribers = set()
+        self._ids = itertools.count(1)
+        self.epoch = format(time.time_ns() // 1000, "x")
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        with self._lock:
+            sequence = next(self._ids)
+            event = (f"{self.epoch}-{sequence}", event_type, data)
+            self._history.append((sequence, event))
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # Yavaş istemci: olayları atla, bir sonraki okumada tam senkron iste
+                subscription.overflowed = True
+        return event[0]
+
+    def _sequence_of(self, event_id):
+        """Bu döneme ait bir olay ID'sinin sıra numarası; başka dönemse None."""
+        epoch, _, sequence = str(event_id).partition("-")
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(sequence)
+        except ValueError:
+            return None
+
+    def subscribe(self, last_event_id=None):
+        with self._lock:
+            missed = False
+            replay = []
+            if last_event_id:
+                sequence = self._sequence_of(last_event_id)
+                oldest = self._history[0][0] if self._history else 1
+                newest = self._history[-1][0] if self._history else 0
+                if sequence is None or sequence < oldest - 1 or sequence > newest:
+                    missed = True
+                else:
+                    replay = [event for seq, event in self._history if seq > sequence]
+            subscription = Subscription(missed=missed)
+            for event in replay[-config.EVENT_SUBSCRIBER_QUEUE_SIZE :]:
+                subscription.queue.put_nowait(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+
+def format_sse(event):
+    """(id, tür, veri) olayını text/event-stream biçimine çevirir."""
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Flask prosesine ait olay yayıncısını döndürür."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = EventBus()
+        return _bus
+
+
+def publish(event_type, data):
+    return get_event_bus().publish(event_type, data)
@@ -0,0 +1,373 @@
+# @author: MembaCo.
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from Crypto.Cipher import AES
+
+logger = logging.getLogger(__name__)
+
+Segment = namedtuple("Segment", ["index", "uri", "sequence", "key", "byterange"])
+SegmentKey = namedtuple("SegmentKey", ["method", "uri", "iv"])
+
+ATTRIBUTE_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^",]*)')
+SEGMENT_RETRIES = 3
+
+
+class HLSDownloadError(Exception):
+    """Yerleşik HLS indiricisinin kurtarılamayan hataları."""
+
+    def __init__(self, message, http_status=None):
+        super().__init__(message)
+        self.http_status = http_status
+
+
+def _parse_attributes(line):
+    attributes = {}
+    for key, value in ATTRIBUTE_RE.findall(line.split(":", 1)[1]):
+        attributes[key] = value.strip('"')
+    return attributes
+
+
+def parse_rate(value):
+    """'500K', '2.5M' gibi yt-dlp biçimindeki hız limitini bayt/saniyeye çevirir."""
+    if not value:
+        return None
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMG]?)i?B?\s*", str(value), re.IGNORECASE)
+    if not match:
+        return None
+    multiplier = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+    return int(float(match.group(1)) * multiplier[match.group(2).upper()])
+
+
+def parse_master_playlist(text, base_url):
+    """Master listedeki varyantları (bant genişliği, URL) olarak döndürür."""
+    variants = []
+    lines = [line.strip() for line in text.splitlines()]
+    for i, line in enumerate(lines):
+        if not line.startswith("#EXT-X-STREAM-INF"):
+            continue
+        bandwidth = int(_parse_attributes(line).get("BANDWIDTH", 0) or 0)
+        for uri in lines[i + 1 :]:
+            if uri and not uri.startswith("#"):
+                variants.append((bandwidth, urljoin(base_url, uri)))
+                break
+    return variants
+
+
+def parse_media_playlist(text, base_url):
+    """Medya listesindeki segmentleri şifreleme ve byte-range bilgileriyle döndürür."""
+    segments = []
+    sequence = 0
+    key = None
+    byterange = None
+    next_offset = 0
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        if line.startswith("#EXT-X-MEDIA-SEQUENCE"):
+            sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-KEY"):
+            attributes = _parse_attributes(line)
+            method = attributes.get("METHOD", "NONE")
+            if method == "NONE":
+                key = None
+            elif method == "AES-128":
+                iv = attributes.get("IV")
+                key = SegmentKey(
+                    method,
+                    urljoin(base_url, attributes["URI"]),
+                    bytes.fromhex(iv[2:]) if iv else None,
+                )
+            else:
+                raise HLSDownloadError(f"Desteklenmeyen şifreleme yöntemi: {method}")
+        elif line.startswith("#EXT-X-BYTERANGE"):
+            length, _, offset = line.split(":", 1)[1].partition("@")
+            start = int(offset) if offset else next_offset
+            byterange = (int(length), start)
+            next_offset = start + int(length)
+        elif not line.startswith("#"):
+            segments.append(
+                Segment(len(segments), urljoin(base_url, line), sequence, key, byterange)
+            )
+            sequence += 1
+            byterange = None
+    return segments
+
+
+def playlist_fingerprint(segments):
+    """
+    Segment listesinin parmak izi. Sorgu parametreleri (süreli token'lar) hariç
+    tutulur; böylece yeniden çözülen aynı yayın eşleşir.
+    """
+    digest = hashlib.sha1()
+    for segment in segments:
+        digest.update(urlsplit(segment.uri).path.encode())
+        digest.update(repr(segment.byterange).encode())
+    digest.update(str(len(segments)).encode())
+    return digest.hexdigest()
+
+
+class DownloadJournal:
+    """
+    Yarım kalan dosyanın yanında tutulan indirme günlüğü. Sırayla yazılmış
+    segment sayısını, bayt konumunu ve liste parmak izini saklar.
+    """
+
+    def __init__(self, part_path):
+        self.part_path = part_path
+        self.path = f"{part_path}.journal.json"
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, fingerprint, segments_done, bytes_done, total_segments):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "fingerprint": fingerprint,
+                    "segments_done": segments_done,
+                    "bytes_done": bytes_done,
+                    "total_segments": total_segments,
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def resume_point(self, fingerprint):
+        """
+        Günlük geçerliyse (segment, bayt) devam noktasını döndürür ve yarım dosyayı
+        o bayta kırpar; aksi halde (0, 0) döner.
+        """
+        state = self.load()
+        if not state or state.get("fingerprint") != fingerprint:
+            return 0, 0
+        bytes_done = int(state.get("bytes_done", 0))
+        try:
+            if os.path.getsize(self.part_path) < bytes_done:
+                return 0, 0
+            # Günlüğe girmeden kesilen son segmentin artıklarını at
+            with open(self.part_path, "r+b") as f:
+                f.truncate(bytes_done)
+        except OSError:
+            return 0, 0
+        return int(state.get("segments_done", 0)), bytes_done
+
+    def clear(self):
+        for path in (self.path, f"{self.path}.tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class RateLimiter:
+    """İş parçacıkları arasında paylaşılan basit token bucket hız sınırlayıcı."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate, self._tokens + (now - self._last) * self.rate
+                )
+                self._last = now
+                if self._tokens >= amount or self._tokens >= self.rate:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+
+class HLSDownloader:
+    """
+    m3u8 listesini çözümleyip segmentleri sınırlı sayıda keep-alive bağlantı ile
+    paralel indirir ve sırasıyla tek bir çıktı dosyasına yazar.
+    """
+
+    def __init__(
+        self,
+        session,
+        playlist_url,
+        referer=None,
+        connections=4,
+        rate_limit=None,
+        progress_callback=None,
+        timeout=30,
+        limiter=None,
+    ):
+        self.session = session
+        self.playlist_url = playlist_url
+        self.headers = {"Referer": referer} if referer else {}
+        self.connections = max(1, connections)
+        # limiter, consume(bayt) arayüzlü ortak bir sınırlayıcı olabilir (bandwidth.SharedBandwidth)
+        self.limiter = limiter or (RateLimiter(rate_limit) if rate_limit else None)
+        self.progress_callback = progress_callback
+        self.timeout = timeout
+        self.bytes_written = 0
+        self.resumed_bytes = 0
+        # Uyarlanabilir eşzamanlılık denetleyicisi için istek istatistikleri
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._stats_lock = threading.Lock()
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def _get(self, url, byterange=None):
+        headers = dict(self.headers)
+        if byterange:
+            length, start = byterange
+            headers["Range"] = f"bytes={start}-{start + length - 1}"
+        response = self.session.get(
+            url, headers=headers, timeout=self.timeout, stream=True
+        )
+        response.raise_for_status()
+        chunks = []
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            if self._cancelled.is_set():
+                response.close()
+                raise HLSDownloadError("İndirme iptal edildi.")
+            if self.limiter:
+                self.limiter.consume(len(chunk))
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def resolve_segments(self):
+        """Gerekirse master listeden en yüksek kaliteli varyantı seçip segmentleri döndürür."""
+        url = self.playlist_url
+        for _ in range(3):
+            text = self._get(url).decode("utf-8", errors="ignore")
+            if not text.lstrip().startswith("#EXTM3U"):
+                raise HLSDownloadError("Geçerli bir m3u8 listesi değil.")
+            if "#EXT-X-STREAM-INF" not in text:
+                segments = parse_media_playlist(text, url)
+                if not segments:
+                    raise HLSDownloadError("Listede segment bulunamadı.")
+                return segments
+            variants = parse_master_playlist(text, url)
+            if not variants:
+                raise HLSDownloadError("Master listede varyant bulunamadı.")
+            url = max(variants)[1]
+            logger.info(f"En yüksek kaliteli varyant seçildi: {url}")
+        raise HLSDownloadError("İç içe master liste derinliği aşıldı.")
+
+    def _key_bytes(self, key_uri):
+        with self._keys_lock:
+            if key_uri not in self._keys:
+                self._keys[key_uri] = self._get(key_uri)
+            return self._keys[key_uri]
+
+    def _count(self, error=False, throttled=False):
+        with self._stats_lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.throttled += int(throttled)
+
+    def _fetch_segment(self, segment):
+        last_error = None
+        for attempt in range(SEGMENT_RETRIES):
+            try:
+                data = self._get(segment.uri, segment.byterange)
+                self._count()
+                if segment.key:
+                    iv = segment.key.iv or segment.sequence.to_bytes(16, "big")
+                    cipher = AES.new(self._key_bytes(segment.key.uri), AES.MODE_CBC, iv)
+                    data = cipher.decrypt(data)
+                    # PKCS7 dolgusu segment sonunda kalır, kaldır
+                    if data and 0 < data[-1] <= AES.block_size:
+                        data = data[: -data[-1]]
+                return data
+            except HLSDownloadError:
+                raise
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                self._count(error=True, throttled=status in (429, 503))
+                if status is not None and 400 <= status < 500 and status != 429:
+                    raise HLSDownloadError(
+                        f"Segment {segment.index} reddedildi (HTTP {status})",
+                        http_status=status,
+                    ) from e
+                last_error = e
+                time.sleep(0.5 * (attempt + 1))
+            except (requests.RequestException, ValueError) as e:
+                self._count(error=True)
+                last_error = e
+                time.sleep(0.5 * (attempt + 1))
+        raise HLSDownloadError(
+            f"Segment {segment.index} indirilemedi: {last_error}"
+        ) from last_error
+
+    def download(self, output_path, segments=None, resume=False):
+        """
+        Segmentleri sırayla output_path dosyasına yazar. Bellek kullanımını
+        sınırlamak için aynı anda en fazla connections*2 segment beklemede tutulur.
+        resume=True ise dosyanın yanındaki günlükten kalınan yerden devam edilir.
+        """
+        segments = segments if segments is not None else self.resolve_segments()
+        total = len(segments)
+        fingerprint = playlist_fingerprint(segments)
+        journal = DownloadJournal(output_path)
+        start_index, start_bytes = (
+            journal.resume_point(fingerprint) if resume else (0, 0)
+        )
+        if start_index:
+            logger.info(
+                f"İndirme {start_index}/{total}. segmentten devam ediyor "
+                f"({start_bytes / 1024 / 1024:.1f}MB diskte mevcut)."
+            )
+        self.bytes_written = self.resumed_bytes = start_bytes
+        if self.progress_callback:
+            # Başlangıç konumu bildirilir; devam edilen kısım yeni indirme sayılmaz
+            self.progress_callback(start_index * 100.0 / total if total else 0.0, start_bytes)
+        pending = {}
+        window = self.connections * 2
+        next_submit = start_index
+        with ThreadPoolExecutor(max_workers=self.connections) as executor, open(
+            output_path, "ab" if start_index else "wb"
+        ) as output:
+            try:
+                for index in range(start_index, total):
+                    while next_submit < total and next_submit - index < window:
+                        pending[next_submit] = executor.submit(
+                            self._fetch_segment, segments[next_submit]
+                        )
+                        next_submit += 1
+                    data = pending.pop(index).result()
+                    output.write(data)
+                    self.bytes_written += len(data)
+                    if resume:
+                        output.flush()
+                        journal.save(fingerprint, index + 1, self.bytes_written, total)
+                    if self.progress_callback:
+                        self.progress_callback(
+                            (index + 1) * 100.0 / total, self.bytes_written
+                        )
+            except BaseException:
+                self._cancelled.set()
+                for future in pending.values():
+                    future.cancel()
+                raise
+        journal.clear()
+        return self.bytes_written
@@ -0,0 +1,214 @@
+# @author: MembaCo.
+
+import collections
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "dizibox_"
+
+COUNTERS = {
+    "downloaded_bytes_total": "İndirilen toplam bayt",
+    "failures_total": "Sınıfına göre başarısız indirme denemeleri",
+    "sqlite_busy_total": "Kilit nedeniyle başarısız olan SQLite yazmaları",
+}
+
+HISTOGRAMS = {
+    "resolve_seconds": (
+        "Video kaynağının çözümlenme süresi",
+        (0.5, 1, 2, 5, 10, 20, 30, 60, 120),
+    ),
+    "download_seconds": (
+        "İndirme süresi",
+        (10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+    ),
+    "sqlite_write_seconds": (
+        "SQLite yazma süresi (kilit beklemesi dahil)",
+        (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+    ),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+class MetricsRegistry:
+    """
+    Sayaç ve histogramların proses içi kaydı. İşçi prosesler kendi kayıtlarını her
+    işten sonra drain() ile boşaltıp ilerleme kanalı üzerinden gönderir; ebeveyn
+    bunları merge() ile toplar, böylece /metrics tüm prosesleri kapsar.
+    """
+
+    def __init__(self, throughput_window=None):
+        self.throughput_window = throughput_window or config.METRICS_THROUGHPUT_WINDOW
+        self._counters = collections.defaultdict(float)
+        self._histograms = {}
+        self._recent_bytes = collections.deque()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, labels=None):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def observe(self, name, value, labels=None):
+        buckets = HISTOGRAMS[name][1]
+        with self._lock:
+            key = (name, _label_key(labels))
+            counts, total, count = self._histograms.get(key) or ([0] * len(buckets), 0.0, 0)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._histograms[key] = (counts, total + value, count + 1)
+
+    def add_bytes(self, count):
+        """İndirilen baytları sayaca ve anlık hız penceresine ekler."""
+        if count <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._counters[("downloaded_bytes_total", ())] += count
+            self._recent_bytes.append((now, count))
+
+    def throughput(self):
+        """Son throughput_window saniyedeki ortalama toplam indirme hızı (bayt/sn)."""
+        cutoff = time.monotonic() - self.throughput_window
+        with self._lock:
+            while self._recent_bytes and self._recent_bytes[0][0] < cutoff:
+                self._recent_bytes.popleft()
+            return sum(count for _, count in self._recent_bytes) / self.throughput_window
+
+    def drain(self):
+        """Biriken değerleri döndürür ve sıfırlar (işçi prosesten gönderim için)."""
+        with self._lock:
+            snapshot = {
+                "counters": dict(self._counters),
+                "histograms": dict(self._histograms),
+            }
+            self._counters.clear()
+            self._histograms.clear()
+        return snapshot
+
+    def merge(self, snapshot):
+        with self._lock:
+            for key, value in snapshot.get("counters", {}).items():
+                self._counters[key] += value
+            for key, (counts, total, count) in snapshot.get("histograms", {}).items():
+                current = self._histograms.get(key)
+                if current:
+                    counts = [a + b for a, b in zip(current[0], counts)]
+                    total += current[1]
+                    count += current[2]
+                self._histograms[key] = (list(counts), total, count)
+
+    def render(self, gauges=()):
+        """
+        Prometheus metin biçiminde çıktı üretir. gauges, anlık değerler için
+        (ad, açıklama, [(etiketler, değer), ...]) üçlülerinden oluşur.
+        """
+        lines = []
+        for name, help_text, samples in gauges:
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} gauge")
+            for labels, value in samples:
+                lines.append(
+                    f"{PREFIX}{name}{_format_labels(_label_key(labels))} {_format_value(value)}"
+                )
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        for name, help_text in COUNTERS.items():
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} counter")
+            samples = sorted((k[1], v) for k, v in counters.items() if k[0] == name)
+            for key, value in samples or [((), 0)]:
+                lines.append(f"{PREFIX}{name}{_format_labels(key)} {_format_value(value)}")
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} histogram")
+            samples = sorted((k[1], v) for k, v in histograms.items() if k[0] == name)
+            for key, (counts, total, count) in samples:
+                for bound, bucket_count in zip(buckets, counts):
+                    lines.append(
+                        f"{PREFIX}{name}_bucket{_format_labels(key, [('le', _format_value(float(bound)))])} {bucket_count}"
+                    )
+                lines.append(
+                    f"{PREFIX}{name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}"
+                )
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(key)} {_format_value(total)}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = None
+_registry_pid = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Bu prosese ait metrik kaydını döndürür (gerekirse oluşturur)."""
+    global _registry, _registry_pid
+    with _registry_lock:
+        if _registry is None or _registry_pid != os.getpid():
+            _registry = MetricsRegistry()
+            _registry_pid = os.getpid()
+        return _registry
+
+
+def inc(name, value=1, **labels):
+    get_registry().inc(name, value, labels)
+
+
+def observe(name, value, **labels):
+    get_registry().observe(name, value, labels)
+
+
+@contextmanager
+def timed(name, **labels):
+    """Bloğun süresini histograma ekler."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+@contextmanager
+def sqlite_write(site):
+    """
+    Bir SQLite yazmasının süresini (busy_timeout içinde geçen kilit beklemesi
+    dahil) ölçer; kilit hatalarını ayrıca sayar. Hata yeniden fırlatılır.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        message = str(e).lower()
+        if "locked" in message or "busy" in message:
+            inc("sqlite_busy_total", site=site)
+        raise
+    finally:
+        observe("sqlite_write_seconds", time.perf_counter() - started, site=site)
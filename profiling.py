@@ -0,0 +1,242 @@
+# @author: MembaCo.
+
+import cProfile
+import collections
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.(?:pstats|folded)\.gz$")
+
+
+def profiles_dir():
+    return os.path.join(config.DATA_DIR, "profiles")
+
+
+def _timestamp():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+def _prune():
+    """En yeni PROFILE_KEEP dosya dışındakileri siler."""
+    for profile in list_profiles()[config.PROFILE_KEEP :]:
+        try:
+            os.remove(os.path.join(profiles_dir(), profile["name"]))
+        except OSError:
+            pass
+
+
+def list_profiles():
+    """Kaydedilmiş profil dosyaları, en yenisi önce."""
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        if not PROFILE_NAME_RE.match(name):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        profiles.append(
+            {
+                "name": name,
+                "size": stat.st_size,
+                "created_at": stat.st_mtime,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime)),
+                "kind": "pstats" if name.endswith(".pstats.gz") else "folded",
+            }
+        )
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    """İndirme/silme için güvenli dosya yolu; geçersiz adlarda None."""
+    if not PROFILE_NAME_RE.match(name or ""):
+        return None
+    path = os.path.join(profiles_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+def _write_gzip(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+    _prune()
+
+
+class StackSampler:
+    """
+    Web prosesindeki tüm iş parçacıklarının yığınlarını sabit aralıklarla örnekler.
+    cProfile yalnızca başlatıldığı iş parçacığını gördüğünden istek işleyen
+    thread'ler için örnekleme kullanılır. Çıktı flamegraph.pl / speedscope ile
+    açılabilen "collapsed stack" biçimindedir.
+    """
+
+    def __init__(self, seconds, interval=None):
+        self.seconds = seconds
+        self.interval = interval or config.PROFILE_SAMPLE_INTERVAL
+        self.started_at = None
+        self.samples = 0
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+
+    @property
+    def remaining(self):
+        if self.started_at is None:
+            return self.seconds
+        return max(0, int(self.started_at + self.seconds - time.time()))
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self._stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        deadline = self.started_at + self.seconds
+        while time.time() < deadline and not self._stop.wait(self.interval):
+            self._sample()
+        path = os.path.join(profiles_dir(), f"web-{_timestamp()}.folded.gz")
+
+        def write(f):
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n".encode("utf-8"))
+
+        try:
+            _write_gzip(path, write)
+            logger.info(
+                f"Web prosesi profili kaydedildi: {path} ({self.samples} örnek)"
+            )
+        except OSError as e:
+            logger.error(f"Web prosesi profili yazılamadı: {e}")
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def start_web_capture(seconds):
+    """Web prosesi için sınırlı süreli örnekleme başlatır; zaten çalışıyorsa False."""
+    global _sampler
+    seconds = max(1, min(int(seconds), config.PROFILE_MAX_SECONDS))
+    with _sampler_lock:
+        if _sampler is not None and _sampler.is_running():
+            return False
+        _sampler = StackSampler(seconds).start()
+    logger.info(f"Web prosesi {seconds} sn boyunca profilleniyor.")
+    return True
+
+
+def web_capture_status():
+    with _sampler_lock:
+        if _sampler is not None and _sampler.is_running():
+            return {"running": True, "remaining": _sampler.remaining}
+    return {"running": False, "remaining": 0}
+
+
+def request_job_captures(db_conn, count):
+    """Sıradaki `count` indirme işinin cProfile ile profillenmesini ister."""
+    count = max(0, min(int(count), config.PROFILE_MAX_JOBS))
+    db_conn.execute(
+        "UPDATE settings SET value = ? WHERE key = 'PROFILE_JOBS'", (str(count),)
+    )
+    db_conn.commit()
+    return count
+
+
+def _claim_job_capture(conn):
+    """
+    Bekleyen iş profili isteğinden birini atomik olarak alır. Birden fazla işçi
+    aynı anda sorsa da sayaç en fazla istenen kadar iş için düşer. İstek yoksa
+    yalnızca okunur; her işte ayarlar tablosuna yazma kilidi alınmaz.
+    """
+    try:
+        pending = conn.execute(
+            "SELECT CAST(value AS INTEGER) FROM settings WHERE key = 'PROFILE_JOBS'"
+        ).fetchone()
+        if not pending or (pending[0] or 0) <= 0:
+            return False
+        cursor = conn.execute(
+            "UPDATE settings SET value = CAST(value AS INTEGER) - 1 WHERE key = 'PROFILE_JOBS' AND CAST(value AS INTEGER) > 0"
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        logger.warning(f"Profil isteği okunamadı: {e}")
+        if conn.in_transaction:
+            conn.rollback()
+        return False
+
+
+@contextmanager
+def job_capture(conn, item_id):
+    """
+    İstenmişse bloğu cProfile ile profilleyip DATA_DIR/profiles altına sıkıştırılmış
+    .pstats olarak yazar; istenmemişse hiçbir şey yapmaz.
+    """
+    if not _claim_job_capture(conn):
+        yield
+        return
+    profiler = cProfile.Profile()
+    logger.info(f"ID {item_id} için iş profili alınıyor.")
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(profiles_dir(), f"job-{item_id}-{_timestamp()}.pstats.gz")
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pstats") as tmp:
+                tmp_path = tmp.name
+            profiler.dump_stats(tmp_path)
+            with open(tmp_path, "rb") as src:
+                _write_gzip(path, lambda f: shutil.copyfileobj(src, f))
+            logger.info(f"İş profili kaydedildi: {path}")
+        except OSError as e:
+            logger.error(f"ID {item_id} için iş profili yazılamadı: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
@@ -0,0 +1,268 @@
+# @author: MembaCo.
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import adaptive
+import config
+import database
+import events
+import metrics
+import scheduler
+from worker_pool import mp_context
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """
+    İşçi proses tarafında ilerlemeyi biriktirir ve en fazla PROGRESS_REPORT_INTERVAL
+    aralıkla ebeveyn prosese iletir. Kanal yoksa doğrudan veritabanına yazar.
+    """
+
+    def __init__(self, conn, item_id, progress_queue=None, min_interval=None):
+        self.conn = conn
+        self.item_id = item_id
+        self.queue = progress_queue
+        self.min_interval = (
+            config.PROGRESS_REPORT_INTERVAL if min_interval is None else min_interval
+        )
+        self._last_sent = 0.0
+        self._last_progress = 0.0
+        self._pending = None
+        # Bu aktarımda indirme hızı metriğine sayılmış bayt. Başlangıçta 0'dır
+        # (sıfırdan indirme); begin_transfer() bunu None yapar ve devam noktası
+        # bilinene kadar ilk bildirim o nokta kabul edilir
+        self._counted_bytes = 0
+        # Bu aktarımın başında diskte olan ve en son bildirilen bayt sayıları
+        self.resumed_bytes = 0
+        self._latest_bytes = 0
+
+    def begin_transfer(self):
+        """
+        Yeni bir indirme motoru çalışmasını başlatır. Motorun ilk bildirdiği bayt
+        sayısı diskte zaten bulunan (devam edilen) kısım sayılır ve indirme hızı
+        metriğine eklenmez.
+        """
+        self._counted_bytes = None
+        self.resumed_bytes = 0
+        self._latest_bytes = 0
+
+    @property
+    def transferred_bytes(self):
+        """Bu aktarımda (devam noktasından sonra) indirildiği bildirilen bayt."""
+        return max(0, self._latest_bytes - self.resumed_bytes)
+
+    def update(self, progress, bytes_done=None, force=False):
+        if bytes_done is not None:
+            if self._counted_bytes is None:
+                self._counted_bytes = self.resumed_bytes = bytes_done
+            self._latest_bytes = bytes_done
+        if progress < self._last_progress and not force:
+            return
+        self._pending = (progress, bytes_done)
+        now = time.monotonic()
+        if force or now - self._last_sent >= self.min_interval:
+            self._send(now)
+
+    def _send(self, now):
+        progress, bytes_done = self._pending
+        self._pending = None
+        self._last_sent = now
+        self._last_progress = progress
+        new_bytes = 0
+        if bytes_done is not None and self._counted_bytes is not None:
+            new_bytes = max(0, bytes_done - self._counted_bytes)
+            self._counted_bytes = max(self._counted_bytes, bytes_done)
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait(
+                    ("progress", self.item_id, progress, bytes_done, time.time(), new_bytes)
+                )
+                return
+            except (queue.Full, OSError, ValueError):
+                pass
+        try:
+            self.conn.execute(
+                "UPDATE episodes SET progress = ? WHERE id = ?", (progress, self.item_id)
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(
+                f"ID {self.item_id} için ilerleme yazılamadı: {e}", exc_info=True
+            )
+
+    def status_changed(self, status=None, progress=None, filepath=None):
+        """Veritabanına yazılan durum değişikliğini ebeveyndeki canlı olay akışına bildirir."""
+        if self.queue is None:
+            return
+        fields = {"status": status, "progress": progress, "filepath": filepath}
+        try:
+            self.queue.put_nowait(
+                (
+                    "status",
+                    self.item_id,
+                    {key: value for key, value in fields.items() if value is not None},
+                )
+            )
+        except (queue.Full, OSError, ValueError):
+            pass
+
+    def host_sample(self, sample):
+        """İndirme motorunun sunucu örneğini ebeveyndeki uyarlanabilir denetleyiciye iletir."""
+        if self.queue is None:
+            return
+        try:
+            self.queue.put_nowait(("host", self.item_id, sample))
+        except (queue.Full, OSError, ValueError):
+            pass
+
+    def close(self):
+        """Bekleyen son değeri gönderir ve ebeveyne bu bölümün bittiğini bildirir."""
+        if self._pending is not None:
+            self._send(time.monotonic())
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait(("done", self.item_id))
+            except (queue.Full, OSError, ValueError):
+                pass
+
+
+class ProgressChannel:
+    """
+    İşçi proseslerden gelen ilerleme mesajlarını ebeveyn proseste toplar, son
+    değerleri bellekte tutar ve veritabanına toplu halde, sınırlı sıklıkta yazar.
+    """
+
+    def __init__(self, flush_interval=None):
+        self.queue = mp_context.Queue()
+        self.flush_interval = flush_interval or config.PROGRESS_FLUSH_INTERVAL
+        self._live = {}
+        self._dirty = set()
+        self._finished = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._conn = None
+        # Bellekteki anlık değerler her değiştiğinde artar (/status ETag'i için)
+        self.version = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="progress-channel", daemon=True
+            )
+            self._thread.start()
+
+    def _apply(self, message):
+        kind, item_id = message[0], message[1]
+        with self._lock:
+            if kind == "progress":
+                _, _, progress, bytes_done, timestamp, new_bytes = message
+                # Yalnızca bu çalışmada indirilen baytlar sayılır; devam edilen
+                # indirmede diskte zaten olan kısım işçide ayıklanır
+                if new_bytes:
+                    metrics.get_registry().add_bytes(new_bytes)
+                self._live[item_id] = {
+                    "progress": progress,
+                    "downloaded_bytes": bytes_done,
+                    "updated_at": timestamp,
+                }
+                self._dirty.add(item_id)
+                self.version += 1
+            elif kind == "done":
+                self._finished.add(item_id)
+        if kind == "progress":
+            events.publish(
+                "progress",
+                {"id": item_id, "progress": progress, "downloaded_bytes": bytes_done},
+            )
+        elif kind == "status":
+            events.publish("episode", dict(message[2], id=item_id))
+        elif kind == "metrics":
+            metrics.get_registry().merge(message[2])
+        elif kind == "host":
+            if adaptive.get_controller().record(message[2]):
+                # Eşzamanlı iş limiti değişti; boşalan/eklenen slotları hemen uygula
+                scheduler.notify("adaptive")
+
+    def _run(self):
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, next_flush - time.monotonic())
+            try:
+                self._apply(self.queue.get(timeout=timeout))
+                # Birikmiş mesajları tek seferde boşalt
+                while True:
+                    self._apply(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f"İlerleme kanalı mesajı işlenemedi: {e}", exc_info=True)
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def flush(self):
+        """Değişen ilerleme değerlerini tek bir işlemle veritabanına yazar."""
+        with self._lock:
+            rows = [
+                (self._live[item_id]["progress"], item_id)
+                for item_id in self._dirty
+                if item_id in self._live
+            ]
+            dirty, self._dirty = self._dirty, set()
+            finished, self._finished = self._finished, set()
+        if rows:
+            try:
+                if self._conn is None:
+                    self._conn = database.connect()
+                # Bitmiş bölümlerin son durumunu eski bir ilerleme değeriyle ezme
+                with metrics.sqlite_write("progress"):
+                    self._conn.executemany(
+                        "UPDATE episodes SET progress = ? WHERE id = ? AND status = 'İndiriliyor'",
+                        rows,
+                    )
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"İlerleme toplu yazımı ertelendi: {e}")
+                with self._lock:
+                    self._dirty |= dirty
+                    self._finished |= finished
+                return
+        with self._lock:
+            for item_id in finished:
+                if item_id not in self._dirty and self._live.pop(item_id, None):
+                    self.version += 1
+
+    def forget(self, item_id):
+        with self._lock:
+            if self._live.pop(item_id, None):
+                self.version += 1
+            self._dirty.discard(item_id)
+
+    def live_snapshot(self):
+        """Bölüm ID'sine göre anlık ilerleme bilgilerinin bir kopyasını döndürür."""
+        with self._lock:
+            return {item_id: dict(info) for item_id, info in self._live.items()}
+
+
+_channel = None
+_channel_pid = None
+_channel_lock = threading.Lock()
+
+
+def get_progress_channel():
+    """Bu prosese ait ilerleme kanalını döndürür (gerekirse oluşturup başlatır)."""
+    global _channel, _channel_pid
+    with _channel_lock:
+        if _channel is None or _channel_pid != os.getpid():
+            _channel = ProgressChannel()
+            _channel_pid = os.getpid()
+            _channel.start()
+        return _channel
@@ -0,0 +1,177 @@
+# @author: MembaCo.
+
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import metrics
+import scheduler
+import worker
+from browser_pool import DriverPool
+from database import get_all_settings, pooled_connection
+from source_cache import store_source
+
+logger = logging.getLogger(__name__)
+
+
+def _int_setting(settings, key, default):
+    try:
+        return int(settings.get(key) or default)
+    except (ValueError, TypeError):
+        return default
+
+
+class SourceResolver:
+    """
+    Önden çözümleme aşaması. Sıradaki bölümlerin video kaynaklarını indirme
+    slotları dolmadan önce, indirmeden ayrı bir eşzamanlılık limitiyle çözüp
+    kaynak önbelleğine yazar. Zamanlayıcı yalnızca kaynağı hazır olan bölümleri
+    işçilere verir; böylece bir indirme slotu tarayıcıyla çözümleme yapılırken
+    boş beklemez. Kaynağın hazır sayılması için önbellek kaydının süresinin
+    dolmasına en az RESOLVE_AHEAD_MIN_REMAINING saniye olmalıdır. Tarayıcı
+    gereken çözümlemeler, dizi ekleme ve takip listesi yenilemelerinin
+    kullandığı ortak havuzu meşgul etmemek için kendi havuzunu kullanır.
+    """
+
+    def __init__(self, max_concurrency=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrency or config.RESOLVE_MAX_CONCURRENCY),
+            thread_name_prefix="resolve-ahead",
+        )
+        self.lookahead = 0
+        self.concurrency = 1
+        self.ttl = 0
+        self._in_flight = set()
+        self._failed = set()
+        self._ready = set()
+        self._lock = threading.Lock()
+        self.driver_pool = DriverPool(size=config.RESOLVE_BROWSER_POOL_SIZE, name="resolve")
+
+    def configure(self, db_conn):
+        """Ayarları okur; aşama açıksa True döndürür."""
+        settings = get_all_settings(db_conn)
+        self.lookahead = max(0, _int_setting(settings, "RESOLVE_AHEAD", 0))
+        self.concurrency = max(
+            1,
+            min(
+                _int_setting(settings, "RESOLVE_CONCURRENCY", 1),
+                config.RESOLVE_MAX_CONCURRENCY,
+            ),
+        )
+        self.ttl = max(0, _int_setting(settings, "SOURCE_CACHE_TTL", 0))
+        # Çözülen kaynak işçiye önbellek üzerinden geçtiği için önbellek kapalıysa
+        # önden çözümleme de yapılamaz
+        return self.lookahead > 0 and self.ttl > 0
+
+    def _fresh_after(self):
+        margin = min(config.RESOLVE_AHEAD_MIN_REMAINING, self.ttl / 2)
+        return time.time() - (self.ttl - margin)
+
+    def _fresh(self, db_conn, upcoming):
+        """Pencerede kaynağı önbellekte yeterince taze olan bölümlerin URL'leri."""
+        urls = [row["url"] for row in upcoming]
+        if not urls:
+            return set()
+        return {
+            row[0]
+            for row in db_conn.execute(
+                f"SELECT episode_url FROM resolved_sources WHERE episode_url IN ({','.join('?' * len(urls))}) AND resolved_at > ?",
+                urls + [self._fresh_after()],
+            )
+        }
+
+    def next_ready(self, db_conn, upcoming):
+        """
+        Dağıtım sırasındaki `upcoming` penceresinden (services.upcoming_episodes)
+        kaynağı hazır olan ilk bölümü döndürür. Önden çözümlemesi başarısız olan
+        bölümler de verilir; işçi kaynağı kendisi arar ve hatayı yeniden deneme
+        politikasına göre kaydeder.
+        """
+        fresh = self._fresh(db_conn, upcoming)
+        with self._lock:
+            for row in upcoming:
+                if row["url"] in fresh or row["id"] in self._failed:
+                    self._failed.discard(row["id"])
+                    return row
+        return None
+
+    def fill(self, db_conn, upcoming):
+        """
+        `upcoming` penceresindeki bölümlerden kaynağı hazır olmayanların
+        çözümlemesini, en fazla `concurrency` çözümleme aynı anda sürecek şekilde
+        dağıtım sırasıyla başlatır.
+        """
+        fresh = self._fresh(db_conn, upcoming)
+        started = []
+        with self._lock:
+            window_ids = {row["id"] for row in upcoming}
+            self._failed &= window_ids
+            self._ready = {row["id"] for row in upcoming if row["url"] in fresh}
+            for row in upcoming:
+                if len(self._in_flight) >= self.concurrency:
+                    break
+                if (
+                    row["id"] in self._ready
+                    or row["id"] in self._in_flight
+                    or row["id"] in self._failed
+                ):
+                    continue
+                self._in_flight.add(row["id"])
+                started.append(row)
+        for row in started:
+            self._executor.submit(self._resolve, row["id"], row["url"])
+
+    def _resolve(self, episode_id, episode_url):
+        video_url = None
+        try:
+            logger.info(f"ID {episode_id} için kaynak önceden çözülüyor.")
+            with metrics.timed("resolve_seconds"):
+                video_url, referer = worker.find_video_source(
+                    episode_url, self.driver_pool
+                )
+            if video_url:
+                with pooled_connection() as conn:
+                    store_source(conn, episode_url, video_url, referer)
+            else:
+                logger.warning(f"ID {episode_id} için kaynak önceden çözülemedi.")
+        except Exception as e:
+            logger.error(f"ID {episode_id} önden çözümleme hatası: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._in_flight.discard(episode_id)
+                if video_url:
+                    self._ready.add(episode_id)
+                else:
+                    self._failed.add(episode_id)
+        # Hazır kaynak (veya işçiye bırakılacak hata) slotu bekleyen zamanlayıcıyı uyandırır
+        scheduler.notify("resolved")
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.lookahead > 0 and self.ttl > 0,
+                "ready": len(self._ready),
+                "resolving": len(self._in_flight),
+                "lookahead": self.lookahead,
+                "concurrency": self.concurrency,
+            }
+
+
+_resolver = None
+_resolver_pid = None
+_resolver_lock = threading.Lock()
+
+
+def get_source_resolver():
+    """Bu prosese ait önden çözümleme aşamasını döndürür (gerekirse oluşturur)."""
+    global _resolver, _resolver_pid
+    with _resolver_lock:
+        if _resolver is None or _resolver_pid != os.getpid():
+            _resolver = SourceResolver()
+            _resolver_pid = os.getpid()
+            atexit.register(_resolver.driver_pool.shutdown)
+        return _resolver
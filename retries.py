@@ -0,0 +1,82 @@
+# @author: MembaCo.
+
+import errno
+import random
+import re
+
+import requests
+
+import config
+
+# Hata sınıfları
+NETWORK = "network"
+RESOLVER = "resolver"
+NOT_FOUND = "not_found"
+DISK_FULL = "disk_full"
+UNKNOWN = "unknown"
+
+# Yalnızca geçici ağ hataları otomatik olarak yeniden sıraya alınır. Kaynak
+# bulunamaması genellikle site yapısının değiştiğini, 404/410 bölümün kaldırıldığını,
+# disk dolması ise kullanıcı müdahalesi gerektiğini gösterir.
+RETRYABLE = (NETWORK,)
+
+# 401/403: önbellekteki kaynağın süresi dolmuştur; yeni bir çözümleme genellikle düzeltir
+TRANSIENT_HTTP_CODES = (401, 403, 408, 425, 429, 500, 502, 503, 504)
+NOT_FOUND_HTTP_CODES = (404, 410)
+
+HTTP_STATUS_RE = re.compile(r"HTTP (?:Error )?(\d{3})")
+DISK_FULL_RE = re.compile(r"No space left on device|Errno 28|Disk dolu", re.IGNORECASE)
+
+
+def classify_failure(message=None, exc=None):
+    """
+    İndirme hatasını sınıflandırır. Ya işçinin ürettiği hata mesajı ya da
+    yakalanan istisna verilir.
+    """
+    if exc is not None:
+        if isinstance(exc, OSError) and exc.errno == errno.ENOSPC:
+            return DISK_FULL
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            return _classify_http(exc.response.status_code)
+        if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+            return NETWORK
+        message = message or str(exc)
+
+    message = message or ""
+    if DISK_FULL_RE.search(message):
+        return DISK_FULL
+    if "kaynağı bulunamadı" in message:
+        return RESOLVER
+    match = HTTP_STATUS_RE.search(message)
+    if match:
+        return _classify_http(int(match.group(1)))
+    # HTTP kodu olmayan indirme hataları (bağlantı koptu, zaman aşımı, yt-dlp çıkış
+    # kodu) çoğunlukla geçicidir
+    if message.startswith("İndirme hatası"):
+        return NETWORK
+    return UNKNOWN
+
+
+def _classify_http(status):
+    if status in NOT_FOUND_HTTP_CODES:
+        return NOT_FOUND
+    if status in TRANSIENT_HTTP_CODES:
+        return NETWORK
+    return UNKNOWN
+
+
+def should_retry(failure_class, retry_count, max_attempts=None):
+    max_attempts = config.RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+    return failure_class in RETRYABLE and retry_count < max_attempts
+
+
+def backoff_delay(retry_count, base=None, cap=None, rng=random):
+    """
+    retry_count'uncu yeniden deneme için bekleme süresi (sn). Üstel artan süre
+    yarısı sabit, yarısı rastgele olacak şekilde dağıtılır; aynı anda düşen
+    bölümler CDN'e aynı anda geri dönmez.
+    """
+    base = config.RETRY_BASE_DELAY if base is None else base
+    cap = config.RETRY_MAX_DELAY if cap is None else cap
+    delay = min(cap, base * (2 ** retry_count))
+    return delay / 2 + rng.uniform(0, delay / 2)
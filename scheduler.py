@@ -0,0 +1,160 @@
+# @author: MembaCo.
+
+import logging
+import threading
+import time
+from multiprocessing import Pipe
+from multiprocessing.connection import wait
+
+import adaptive
+import config
+from bandwidth import current_rate
+from database import get_all_settings, pooled_connection
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadScheduler:
+    """
+    Otomatik indirme zamanlayıcısı. Belirli aralıklarla yoklamak yerine işçi
+    havuzunun borularını, işçi sentinel'lerini ve bir uyandırma borusunu bekler; bir
+    indirme bittiğinde, bölüm sıraya alındığında veya ayarlar değiştiğinde boşalan
+    slotlar hemen doldurulur.
+    """
+
+    def __init__(self, app, cycle, pool):
+        self.app = app
+        self.cycle = cycle
+        # Manuel başlatılan indirmeler de havuzda çalışır ve limite sayılır
+        self.pool = pool
+        self.enabled = False
+        self.limit = 1
+        self._wake_reader, self._wake_writer = Pipe(duplex=False)
+        self._wake_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="download-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        self.notify("enabled" if enabled else "disabled")
+
+    def notify(self, reason):
+        """Zamanlayıcıyı uyandırır (sıraya ekleme, ayar değişikliği, manuel başlatma)."""
+        with self._wake_lock:
+            try:
+                self._wake_writer.send(reason)
+            except OSError:
+                pass
+
+    def _drain_wakeups(self):
+        reasons = []
+        while self._wake_reader.poll():
+            reasons.append(self._wake_reader.recv())
+        return reasons
+
+    def _apply_settings(self):
+        settings = get_all_settings()
+        try:
+            limit = max(1, int(settings.get("CONCURRENT_DOWNLOADS")))
+        except (ValueError, TypeError):
+            limit = 1
+        if settings.get("ADAPTIVE_CONCURRENCY") == "1":
+            # Ayar üst sınırdır; asıl değeri sunucu başına AIMD denetleyici seçer
+            limit = adaptive.get_controller().job_limit(limit)
+        self.limit = limit
+        self.pool.resize(limit)
+        # Zaman dilimi profilleri de bu sayede en geç bir tarama aralığında devreye girer
+        self.pool.set_bandwidth_limit(current_rate(settings))
+
+    def _next_timeout(self):
+        """
+        Bir sonraki beklemenin süresi. Olay kaçırılırsa (ör. veritabanını başka bir
+        proses değiştirdiyse) sıranın yine de taranması için üst sınırlıdır; yeniden
+        deneme beklemesi daha erken dolan bir bölüm varsa tam o ana kadar beklenir.
+        """
+        timeout = config.SCHEDULER_RESCAN_INTERVAL
+        if not self.enabled:
+            return timeout
+        now = time.time()
+        with pooled_connection() as conn:
+            due = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM episodes WHERE status = 'Sırada' AND next_attempt_at > ?",
+                (now,),
+            ).fetchone()[0]
+        if due is not None:
+            timeout = min(timeout, due - now)
+        return timeout
+
+    def _run(self):
+        logger.info("İndirme zamanlayıcısı başlatıldı.")
+        self._apply_settings()
+        while True:
+            try:
+                timeout = self._next_timeout()
+            except Exception as e:
+                logger.error(f"Zamanlayıcı bekleme süresi hesaplanamadı: {e}")
+                timeout = config.SCHEDULER_RESCAN_INTERVAL
+            wait([self._wake_reader] + self.pool.waitables(), timeout=timeout)
+            reasons = self._drain_wakeups()
+            if reasons:
+                logger.debug(f"Zamanlayıcı uyandırıldı: {', '.join(reasons)}")
+            try:
+                for item_id in self.pool.poll():
+                    logger.info(f"Zamanlayıcı: ID {item_id} için iş tamamlandı.")
+                self._apply_settings()
+                if self.enabled:
+                    with self.app.app_context():
+                        self.cycle(self.limit)
+            except Exception as e:
+                logger.error(f"İndirme zamanlayıcısında hata: {e}", exc_info=True)
+
+    def stats(self, db_conn):
+        """Kuyruk derinliği ve slot kullanımı."""
+        queue_depth = db_conn.execute(
+            "SELECT COUNT(*) FROM episodes WHERE status = 'Sırada'"
+        ).fetchone()[0]
+        retry_waiting = db_conn.execute(
+            "SELECT COUNT(*) FROM episodes WHERE status = 'Sırada' AND next_attempt_at > ?",
+            (time.time(),),
+        ).fetchone()[0]
+        active = self.pool.busy_count()
+        slots = self.limit
+        return {
+            "enabled": self.enabled,
+            "queue_depth": queue_depth,
+            "retry_waiting": retry_waiting,
+            "active": active,
+            "slots": slots,
+            "utilisation": round(min(active, slots) / slots, 2),
+            "workers": self.pool.worker_count(),
+            "bandwidth": self.pool.bandwidth_snapshot(),
+        }
+
+
+_scheduler = None
+
+
+def start_scheduler(app, cycle, pool):
+    """Uygulamanın zamanlayıcısını oluşturup başlatır."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DownloadScheduler(app, cycle, pool)
+        _scheduler.start()
+    return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
+
+
+def notify(reason):
+    """Zamanlayıcı çalışıyorsa uyandırır; aksi halde bir şey yapmaz."""
+    if _scheduler is not None:
+        _scheduler.notify(reason)
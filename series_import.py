@@ -0,0 +1,142 @@
+# @author: MembaCo.
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+import events
+
+logger = logging.getLogger(__name__)
+
+# İçe aktarma işlerinin durumları
+WAITING = "Bekliyor"
+RUNNING = "Çekiliyor"
+DONE = "Eklendi"
+FAILED = "Hata"
+
+
+def parse_urls(text):
+    """Satır, virgül veya boşlukla ayrılmış linkleri sırasını koruyarak tekilleştirir."""
+    urls = []
+    for part in (text or "").replace(",", " ").split():
+        url = part.strip()
+        if url and url not in urls:
+            urls.append(url)
+    return urls
+
+
+class SeriesImporter:
+    """
+    Dizi ekleme işlerini sınırlı sayıda iş parçacığında yürütür. Her iş havuzdan
+    bir tarayıcı kiralar; yüzlerce link aynı anda eklense de en fazla
+    IMPORT_CONCURRENCY sayfa aynı anda çekilir. Her linkin durumu bellekte tutulur
+    ve olay akışına yayınlanır.
+    """
+
+    def __init__(self, app, add, concurrency=None, history_size=None):
+        self.app = app
+        self.add = add
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency or config.IMPORT_CONCURRENCY),
+            thread_name_prefix="series-import",
+        )
+        self.history_size = history_size or config.IMPORT_HISTORY_SIZE
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, urls, db_conn, refresh=False):
+        """
+        Linkleri kuyruğa alır. Kayıtlı dizileri ve halihazırda kuyrukta olanları
+        atlar; (kuyruğa alınanlar, atlananlar) döndürür. refresh=True ise kayıtlı
+        diziler de yeniden çekilir ve yeni bölümleri eklenir.
+        """
+        existing = set()
+        # Yeniden çekmede kayıtlı diziler atlanmaz
+        chunks = range(0, len(urls), 500) if not refresh else ()
+        for start in chunks:
+            chunk = urls[start : start + 500]
+            existing.update(
+                row[0]
+                for row in db_conn.execute(
+                    f"SELECT source_url FROM series WHERE source_url IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        queued, skipped = [], []
+        with self._lock:
+            for url in urls:
+                job = self._jobs.get(url)
+                if url in existing or (job and job["status"] in (WAITING, RUNNING)):
+                    skipped.append(url)
+                    continue
+                self._jobs.pop(url, None)
+                self._jobs[url] = {
+                    "url": url,
+                    "status": WAITING,
+                    "message": None,
+                    "queued_at": time.time(),
+                }
+                queued.append(url)
+            self._trim()
+        for url in queued:
+            self._publish(url)
+            self._executor.submit(self._run, url)
+        return queued, skipped
+
+    def _trim(self):
+        # Yalnızca bitmiş işler unutulur
+        while len(self._jobs) > self.history_size:
+            url, job = next(iter(self._jobs.items()))
+            if job["status"] in (WAITING, RUNNING):
+                break
+            self._jobs.popitem(last=False)
+
+    def _update(self, url, **fields):
+        with self._lock:
+            job = self._jobs.get(url)
+            if job is not None:
+                job.update(fields)
+        self._publish(url)
+
+    def _publish(self, url):
+        with self._lock:
+            job = dict(self._jobs.get(url) or {})
+        if job:
+            events.publish("import", job)
+
+    def _run(self, url):
+        self._update(url, status=RUNNING)
+        try:
+            with self.app.app_context():
+                success, message = self.add(url)
+        except Exception as e:
+            logger.error(f"Dizi ekleme hatası ({url}): {e}", exc_info=True)
+            success, message = False, "Beklenmeyen hata."
+        if success:
+            logger.info(message)
+        else:
+            logger.error(f"Dizi ekleme hatası ({url}): {message}")
+        self._update(url, status=DONE if success else FAILED, message=message)
+
+    def snapshot(self):
+        """Son içe aktarma işlerinin durumları ve durum başına sayılar."""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values()]
+        counts = {}
+        for job in jobs:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"jobs": jobs, "counts": counts}
+
+
+_importer = None
+
+
+def start_importer(app, add):
+    """Uygulamanın dizi içe aktarma havuzunu oluşturur."""
+    global _importer
+    if _importer is None:
+        _importer = SeriesImporter(app, add)
+    return _importer
@@ -0,0 +1,186 @@
+# @author: MembaCo.
+
+import logging
+import re
+
+from bs4 import BeautifulSoup
+
+import config
+
+try:
+    import lxml.html
+except ImportError:  # lxml kurulu değilse BeautifulSoup kullanılır
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+EPISODE_TITLE_RE = re.compile(r"(\d+)\.\s*Sezon\s*(\d+)\.\s*Bölüm")
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class ParseError(Exception):
+    """Sayfada dizinin ana bilgileri bulunamadı."""
+
+
+def _series_info(title, poster_url, description, series_url):
+    return {
+        "title": title,
+        "poster_url": poster_url,
+        "description": description,
+        "source_url": series_url,
+        "seasons": [],
+    }
+
+
+def _add_episode(seasons_dict, episode_url, full_title_text, episode_title_text):
+    match = EPISODE_TITLE_RE.search(full_title_text)
+    if not match:
+        return
+    season_number = int(match.group(1))
+    episode_number = int(match.group(2))
+    episode_title = (
+        episode_title_text.strip("()")
+        if episode_title_text is not None
+        else f"{episode_number}. Bölüm"
+    )
+    if season_number not in seasons_dict:
+        seasons_dict[season_number] = {
+            "season_number": season_number,
+            "episodes": [],
+        }
+    seasons_dict[season_number]["episodes"].append(
+        {
+            "episode_number": episode_number,
+            "title": episode_title,
+            "url": episode_url,
+        }
+    )
+
+
+def _sorted_seasons(seasons_dict):
+    sorted_seasons = sorted(seasons_dict.values(), key=lambda s: s["season_number"])
+    for season in sorted_seasons:
+        season["episodes"].sort(key=lambda e: e["episode_number"])
+    return sorted_seasons
+
+
+def parse_with_bs4(html_content, series_url):
+    """BeautifulSoup (html.parser) ile tüm sayfayı ayrıştırır."""
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    og_title = soup.find("meta", property="og:title")
+    title = (
+        og_title["content"].split("İzle")[0].strip()
+        if og_title
+        else "Başlık Bulunamadı"
+    )
+
+    poster_element = soup.select_one("div.category_image img")
+    description_element = soup.select_one("div.category_desc")
+
+    if not all([title, poster_element, description_element]):
+        raise ParseError("Dizi ana bilgileri bulunamadı")
+
+    series_info = _series_info(
+        title,
+        poster_element.get("src"),
+        description_element.text.strip(),
+        series_url,
+    )
+
+    seasons_dict = {}
+    for item in soup.select("div.bolumust"):
+        link_tag = item.find("a")
+        if not link_tag:
+            continue
+        baslik_div = item.select_one("div.baslik")
+        full_title_text = " ".join(baslik_div.text.split()) if baslik_div else ""
+        episode_title_raw = baslik_div.select_one("div.bolumismi") if baslik_div else None
+        _add_episode(
+            seasons_dict,
+            link_tag.get("href"),
+            full_title_text,
+            episode_title_raw.text if episode_title_raw else None,
+        )
+
+    series_info["seasons"] = _sorted_seasons(seasons_dict)
+    return series_info
+
+
+def parse_with_lxml(html_content, series_url):
+    """
+    lxml ile ayrıştırır. Ağaç C tarafında kurulur ve yalnızca gereken düğümler
+    XPath ile seçilir; BeautifulSoup ile aynı çıktıyı üretir.
+    """
+    root = lxml.html.document_fromstring(html_content)
+
+    og_title = root.xpath("//meta[@property='og:title']")
+    if og_title:
+        content = og_title[0].get("content")
+        if content is None:
+            raise ParseError("og:title içeriği yok")
+        title = content.split("İzle")[0].strip()
+    else:
+        title = "Başlık Bulunamadı"
+
+    poster_element = root.xpath(f"//div[{_has_class('category_image')}]//img")
+    description_element = root.xpath(f"//div[{_has_class('category_desc')}]")
+
+    if not all([title, poster_element, description_element]):
+        raise ParseError("Dizi ana bilgileri bulunamadı")
+
+    series_info = _series_info(
+        title,
+        poster_element[0].get("src"),
+        description_element[0].text_content().strip(),
+        series_url,
+    )
+
+    seasons_dict = {}
+    for item in root.xpath(f"//div[{_has_class('bolumust')}]"):
+        link_tag = item.find(".//a")
+        if link_tag is None:
+            continue
+        baslik_div = item.xpath(f".//div[{_has_class('baslik')}]")
+        baslik_div = baslik_div[0] if baslik_div else None
+        full_title_text = (
+            " ".join(baslik_div.text_content().split()) if baslik_div is not None else ""
+        )
+        episode_title_raw = (
+            baslik_div.xpath(f".//div[{_has_class('bolumismi')}]")
+            if baslik_div is not None
+            else None
+        )
+        _add_episode(
+            seasons_dict,
+            link_tag.get("href"),
+            full_title_text,
+            episode_title_raw[0].text_content() if episode_title_raw else None,
+        )
+
+    series_info["seasons"] = _sorted_seasons(seasons_dict)
+    return series_info
+
+
+BACKENDS = {"bs4": parse_with_bs4}
+if lxml is not None:
+    BACKENDS["lxml"] = parse_with_lxml
+
+
+def default_backend():
+    """HTML_PARSER ayarına göre ayrıştırıcı; 'auto' ise varsa lxml kullanılır."""
+    name = config.HTML_PARSER
+    if name == "auto":
+        return "lxml" if "lxml" in BACKENDS else "bs4"
+    if name not in BACKENDS:
+        logger.warning(f"'{name}' ayrıştırıcısı kullanılamıyor, bs4 kullanılacak.")
+        return "bs4"
+    return name
+
+
+def parse_series_page(html_content, series_url, backend=None):
+    """Dizi sayfasından başlık, poster, açıklama ve sezon/bölüm listesini çıkarır."""
+    return BACKENDS[backend or default_backend()](html_content, series_url)
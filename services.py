@@ -2,48 +2,144 @@
 
 import logging
 import os
-import re
-import signal
-import subprocess
-import sys
 import threading
-from multiprocessing import Process
+import time
 
-from bs4 import BeautifulSoup
-import undetected_chromedriver as uc
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 import config
-from database import get_db, get_setting
-from worker import process_video
+from browser_pool import get_driver_pool
+from database import get_db, get_setting, next_change_version
+import events
+import metrics
+from progress import get_progress_channel
+from resolver import get_source_resolver
+import scheduler
+import watchlist
+from series_parser import ParseError, parse_series_page
+from worker_pool import get_worker_pool
 
 logger = logging.getLogger(__name__)
 
+# Sıradaki bölüm seçimi. Öne alınmış bölümler her şeyden önce gelir; ardından
+# diziler öncelik ve en son indirmeye verilme zamanına göre sırayla (round-robin)
+# gezilir ve her dizinin sıradaki ilk bölümü alınır. Böylece büyük bir dizi eklemek
+# diğerlerini aç bırakmaz. Her dizi için sezon başına tek bir indeks araması yapılır.
+# Yeniden deneme beklemesi (next_attempt_at) dolmamış bölümler atlanır.
+BUMPED_EPISODE_SQL = """
+    SELECT e.id, s.series_id FROM episodes e JOIN seasons s ON e.season_id = s.id
+    WHERE e.status = 'Sırada' AND e.priority > 0
+      AND (e.next_attempt_at IS NULL OR e.next_attempt_at <= :now)
+    ORDER BY e.priority DESC, e.id LIMIT 1
+"""
+NEXT_QUEUED_EPISODE_SQL = """
+    SELECT id, series_id FROM (
+        SELECT ser.id AS series_id, (
+            SELECT e.id FROM seasons s JOIN episodes e ON e.season_id = s.id
+            WHERE s.series_id = ser.id AND e.status = 'Sırada'
+              AND (e.next_attempt_at IS NULL OR e.next_attempt_at <= :now)
+            ORDER BY s.season_number, e.episode_number LIMIT 1
+        ) AS id
+        FROM series ser
+        ORDER BY ser.priority DESC, COALESCE(ser.last_dispatched_at, 0) ASC, ser.id ASC
+    )
+    WHERE id IS NOT NULL
+    LIMIT 1
+"""
+
+
+def select_next_episode(db, now=None):
+    """Kuyruk politikasına göre sıradaki bölümü (id, series_id) döndürür."""
+    params = {"now": time.time() if now is None else now}
+    return db.execute(BUMPED_EPISODE_SQL, params).fetchone() or db.execute(
+        NEXT_QUEUED_EPISODE_SQL, params
+    ).fetchone()
+
+
+# upcoming_episodes için aday bölümler: her diziden kuyruk sırasıyla en fazla
+# :limit bölüm ve tüm öne alınmış bölümler
+QUEUED_CANDIDATES_SQL = """
+    SELECT id, url, series_id, priority, series_priority, last_dispatched_at FROM (
+        SELECT e.id, e.url, s.series_id, e.priority,
+               ROW_NUMBER() OVER (
+                   PARTITION BY s.series_id ORDER BY s.season_number, e.episode_number
+               ) AS series_rank,
+               ser.priority AS series_priority,
+               COALESCE(ser.last_dispatched_at, 0) AS last_dispatched_at
+        FROM episodes e
+        JOIN seasons s ON e.season_id = s.id
+        JOIN series ser ON s.series_id = ser.id
+        WHERE e.status = 'Sırada'
+          AND (e.next_attempt_at IS NULL OR e.next_attempt_at <= :now)
+    )
+    WHERE series_rank <= :limit OR priority > 0
+    ORDER BY series_id, series_rank
+"""
+
+
+def upcoming_episodes(db, limit, now=None):
+    """
+    select_next_episode art arda çağrılsaydı (her dağıtımdan sonra dizinin
+    last_dispatched_at değeri güncellenerek) seçilecek ilk `limit` bölümü
+    (id, url, series_id) sırasıyla döndürür: önce öne alınanlar (BUMPED_EPISODE_SQL),
+    ardından diziler arasında round-robin (NEXT_QUEUED_EPISODE_SQL).
+    """
+    if limit <= 0:
+        return []
+    rows = db.execute(
+        QUEUED_CANDIDATES_SQL,
+        {"now": time.time() if now is None else now, "limit": limit},
+    ).fetchall()
+    bumped = sorted(
+        (row for row in rows if row["priority"] > 0),
+        key=lambda row: (-row["priority"], row["id"]),
+    )
+    pending = {}
+    # Round-robin sırası: dizi önceliği, sonra son dağıtım zamanı. Dağıtılan dizi
+    # gerçekte last_dispatched_at = şimdi aldığından kendi öncelik grubunun sonuna geçer
+    order = {}
+    for row in rows:
+        order.setdefault(
+            row["series_id"], (-row["series_priority"], 0, row["last_dispatched_at"])
+        )
+        if row["priority"] <= 0:
+            pending.setdefault(row["series_id"], []).append(row)
+
+    upcoming = []
+
+    def dispatch(row):
+        upcoming.append(row)
+        order[row["series_id"]] = (order[row["series_id"]][0], len(upcoming), 0)
+
+    for row in bumped[:limit]:
+        dispatch(row)
+    while len(upcoming) < limit:
+        waiting = [series_id for series_id, queue in pending.items() if queue]
+        if not waiting:
+            break
+        series_id = min(waiting, key=lambda series_id: (order[series_id], series_id))
+        dispatch(pending[series_id].pop(0))
+    return upcoming
+
 
 def get_page_source_with_selenium(url):
-    """Verilen URL'nin sayfa kaynağını almak için Selenium kullanır."""
-    options = uc.ChromeOptions()
-    options.add_argument("--window-size=1280,720")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--ignore-certificate-errors")
-
-    driver = None
+    """Verilen URL'nin sayfa kaynağını almak için havuzdan kiralanan tarayıcıyı kullanır."""
     try:
-        driver = uc.Chrome(options=options)
-        driver.get(url)
-        wait = WebDriverWait(driver, 60)
-        logger.info(
-            "Ana içerik konteynerinin (icerikcat) HTML'de var olması bekleniyor..."
-        )
-        wait.until(EC.presence_of_element_located((By.ID, "icerikcat")))
-        logger.info("Ana içerik konteyneri başarıyla bulundu. Sayfa kaynağı alınıyor.")
-        html = driver.page_source
-        return html, None
+        with get_driver_pool().lease() as driver:
+            driver.get(url)
+            wait = WebDriverWait(driver, 60)
+            logger.info(
+                "Ana içerik konteynerinin (icerikcat) HTML'de var olması bekleniyor..."
+            )
+            wait.until(EC.presence_of_element_located((By.ID, "icerikcat")))
+            logger.info(
+                "Ana içerik konteyneri başarıyla bulundu. Sayfa kaynağı alınıyor."
+            )
+            html = driver.page_source
+            return html, None
     except TimeoutException:
         error_message = (
             f"Zaman aşımı: Ana içerik 60 saniye içinde bulunamadı. URL: {url}"
@@ -54,9 +150,6 @@ def get_page_source_with_selenium(url):
         error_message = f"Undetected Chromedriver ile sayfa kaynağı alınırken hata: {e}"
         logger.error(error_message, exc_info=True)
         return None, error_message
-    finally:
-        if driver:
-            driver.quit()
 
 
 def scrape_series_data(series_url):
@@ -68,85 +161,75 @@ def scrape_series_data(series_url):
     if error or not html_content:
         return None
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        og_title = soup.find("meta", property="og:title")
-        title = (
-            og_title["content"].split("İzle")[0].strip()
-            if og_title
-            else "Başlık Bulunamadı"
+        series_info = parse_series_page(html_content, series_url)
+    except ParseError:
+        logger.error(
+            f"HTML ayrıştırılırken dizi ana bilgileri bulunamadı. URL: {series_url}"
         )
+        return None
+    except Exception as e:
+        logger.error(f"HTML ayrıştırılırken hata: {e}", exc_info=True)
+        return None
+    logger.info(
+        f"'{series_info['title']}' dizisi için {len(series_info['seasons'])} sezon ve {sum(len(s['episodes']) for s in series_info['seasons'])} bölüm bulundu."
+    )
+    return series_info
 
-        poster_element = soup.select_one("div.category_image img")
-        description_element = soup.select_one("div.category_desc")
-
-        if not all([title, poster_element, description_element]):
-            logger.error(
-                f"HTML ayrıştırılırken dizi ana bilgileri bulunamadı. URL: {series_url}"
-            )
-            return None
-
-        series_info = {
-            "title": title,
-            "poster_url": poster_element.get("src"),
-            "description": description_element.text.strip(),
-            "source_url": series_url,
-            "seasons": [],
-        }
-
-        seasons_dict = {}
-
-        episode_list = soup.select("div.bolumust")
-        for item in episode_list:
-            link_tag = item.find("a")
-            if not link_tag:
-                continue
-
-            episode_url = link_tag.get("href")
-            baslik_div = item.select_one("div.baslik")
-            full_title_text = " ".join(baslik_div.text.split()) if baslik_div else ""
-
-            match = re.search(r"(\d+)\.\s*Sezon\s*(\d+)\.\s*Bölüm", full_title_text)
-            if not match:
-                continue
-
-            season_number = int(match.group(1))
-            episode_number = int(match.group(2))
-            episode_title_raw = baslik_div.select_one("div.bolumismi")
-            episode_title = (
-                episode_title_raw.text.strip("()")
-                if episode_title_raw
-                else f"{episode_number}. Bölüm"
-            )
-
-            if season_number not in seasons_dict:
-                seasons_dict[season_number] = {
-                    "season_number": season_number,
-                    "episodes": [],
-                }
-
-            seasons_dict[season_number]["episodes"].append(
-                {
-                    "episode_number": episode_number,
-                    "title": episode_title,
-                    "url": episode_url,
-                }
-            )
-
-        sorted_seasons = sorted(seasons_dict.values(), key=lambda s: s["season_number"])
 
-        for season in sorted_seasons:
-            season["episodes"].sort(key=lambda e: e["episode_number"])
+def _store_series_data(db, series_data, status="Sırada"):
+    """
+    Ayrıştırılmış dizi verisini tek bir yazma işleminde veritabanına yazar (dizi
+    yoksa oluşturur) ve (dizi ID'si, eklenen bölüm sayısı) döndürür. Sezonlar ve
+    bölümler executemany ile toplu eklenir; işlemi çağıran tamamlar.
+    """
+    if not db.in_transaction:
+        # Yazma kilidi en baştan alınır; işlem ortasında kilit yükseltme beklenmez
+        with metrics.sqlite_write("series"):
+            db.execute("BEGIN IMMEDIATE")
+    cursor = db.cursor()
+    cursor.execute(
+        "INSERT OR IGNORE INTO series (title, poster_url, description, source_url) VALUES (?, ?, ?, ?)",
+        (
+            series_data["title"],
+            series_data["poster_url"],
+            series_data["description"],
+            series_data["source_url"],
+        ),
+    )
+    series_id = cursor.execute(
+        "SELECT id FROM series WHERE source_url = ?", (series_data["source_url"],)
+    ).fetchone()[0]
 
-        series_info["seasons"] = sorted_seasons
+    cursor.executemany(
+        "INSERT OR IGNORE INTO seasons (series_id, season_number) VALUES (?, ?)",
+        [(series_id, season["season_number"]) for season in series_data["seasons"]],
+    )
+    season_ids = dict(
+        cursor.execute(
+            "SELECT season_number, id FROM seasons WHERE series_id = ?", (series_id,)
+        ).fetchall()
+    )
 
-        logger.info(
-            f"'{series_info['title']}' dizisi için {len(series_info['seasons'])} sezon ve {sum(len(s['episodes']) for s in series_info['seasons'])} bölüm bulundu."
-        )
-        return series_info
-    except Exception as e:
-        logger.error(f"HTML ayrıştırılırken hata: {e}", exc_info=True)
-        return None
+    # Satır başına tetikleyici çalışmasın diye tüm bölümler tek bir sürümle eklenir
+    version = next_change_version(db)
+    cursor.executemany(
+        "INSERT OR IGNORE INTO episodes (season_id, episode_number, title, url, status, version) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (
+                season_ids[season["season_number"]],
+                episode["episode_number"],
+                episode["title"],
+                episode["url"],
+                status,
+                version,
+            )
+            for season in series_data["seasons"]
+            for episode in season["episodes"]
+        ],
+    )
+    # executemany'de rowcount tüm satırların toplamıdır; yok sayılanlar sayılmaz
+    added_count = max(0, cursor.rowcount)
+    return series_id, added_count
 
 
 def add_series_to_queue(series_url):
@@ -158,73 +241,119 @@ def add_series_to_queue(series_url):
             False,
             "Dizi bilgileri çekilemedi. Linki kontrol edin veya site yapısı değişmiş olabilir.",
         )
-    cursor = db.cursor()
-    cursor.execute(
-        "SELECT id FROM series WHERE source_url = ?", (series_data["source_url"],)
+    series_id, added_count = _store_series_data(db, series_data)
+    # Takip listesindeki ilk yenileme, sayfa değişmediyse hiçbir şey yazmaz
+    db.execute(
+        "UPDATE series SET content_hash = ?, last_checked_at = ? WHERE id = ?",
+        (watchlist.episode_list_hash(series_data), time.time(), series_id),
+    )
+    db.commit()
+    events.publish("changed", {"series_id": series_id})
+    if added_count:
+        scheduler.notify("enqueue")
+    return (
+        True,
+        f'"{series_data["title"]}" dizisi için {added_count} yeni bölüm sıraya eklendi.',
     )
-    series_row = cursor.fetchone()
 
-    if not series_row:
-        cursor.execute(
-            "INSERT INTO series (title, poster_url, description, source_url) VALUES (?, ?, ?, ?)",
-            (
-                series_data["title"],
-                series_data["poster_url"],
-                series_data["description"],
-                series_data["source_url"],
-            ),
-        )
-        series_id = cursor.lastrowid
-    else:
-        series_id = series_row["id"]
 
-    added_count = 0
-    for season in series_data["seasons"]:
-        cursor.execute(
-            "SELECT id FROM seasons WHERE series_id = ? AND season_number = ?",
-            (series_id, season["season_number"]),
+def refresh_series(series_id):
+    """
+    Takip edilen bir diziyi yeniden çeker. Ayrıştırılan bölüm listesinin özeti
+    değişmediyse veritabanına dokunulmaz; değiştiyse yalnızca yeni bölümler eklenir
+    ve ayara göre indirme sırasına alınır.
+    """
+    db = get_db()
+    series = db.execute(
+        "SELECT id, title, source_url, content_hash FROM series WHERE id = ?",
+        (series_id,),
+    ).fetchone()
+    if not series:
+        return False, "Dizi bulunamadı."
+
+    series_data = scrape_series_data(series["source_url"])
+    now = time.time()
+    next_check = watchlist.next_check_time(watchlist.refresh_interval(db), now)
+    if not series_data:
+        db.execute(
+            "UPDATE series SET last_checked_at = ?, next_check_at = ? WHERE id = ?",
+            (now, next_check, series_id),
         )
-        season_row = cursor.fetchone()
-        if not season_row:
-            cursor.execute(
-                "INSERT INTO seasons (series_id, season_number) VALUES (?, ?)",
-                (series_id, season["season_number"]),
-            )
-            season_id = cursor.lastrowid
-        else:
-            season_id = season_row["id"]
+        db.commit()
+        return False, f"'{series['title']}' dizisi yenilenemedi."
 
-        for episode in season["episodes"]:
-            res = cursor.execute(
-                "INSERT OR IGNORE INTO episodes (season_id, episode_number, title, url) VALUES (?, ?, ?, ?)",
-                (
-                    season_id,
-                    episode["episode_number"],
-                    episode["title"],
-                    episode["url"],
-                ),
-            )
-            if res.rowcount > 0:
-                added_count += 1
+    digest = watchlist.episode_list_hash(series_data)
+    if digest == series["content_hash"]:
+        db.execute(
+            "UPDATE series SET last_checked_at = ?, next_check_at = ? WHERE id = ?",
+            (now, next_check, series_id),
+        )
+        db.commit()
+        logger.info(f"[Watchlist] '{series['title']}' değişmemiş.")
+        return True, 0
+
+    existing = {
+        row[0]
+        for row in db.execute(
+            "SELECT e.url FROM episodes e JOIN seasons s ON e.season_id = s.id WHERE s.series_id = ?",
+            (series_id,),
+        )
+    }
+    new_seasons = [
+        dict(season, episodes=[e for e in season["episodes"] if e["url"] not in existing])
+        for season in series_data["seasons"]
+    ]
+    series_data["seasons"] = [season for season in new_seasons if season["episodes"]]
+    auto_queue = get_setting("WATCHLIST_AUTO_QUEUE", db) == "1"
+    _, added_count = _store_series_data(
+        db, series_data, "Sırada" if auto_queue else "Yeni"
+    )
+    db.execute(
+        "UPDATE series SET content_hash = ?, last_checked_at = ?, next_check_at = ? WHERE id = ?",
+        (digest, now, next_check, series_id),
+    )
     db.commit()
-    return (
-        True,
-        f'"{series_data["title"]}" dizisi için {added_count} yeni bölüm sıraya eklendi.',
+    logger.info(
+        f"[Watchlist] '{series['title']}' için {added_count} yeni bölüm bulundu."
     )
+    if added_count:
+        events.publish("changed", {"series_id": series_id})
+        if auto_queue:
+            scheduler.notify("enqueue")
+    return True, added_count
 
 
-def add_series_to_queue_async(app, series_url):
-    """Dizi ekleme işlemini arka planda çalıştırır."""
-    with app.app_context():
-        success, message = add_series_to_queue(series_url)
-        if not success:
-            logger.error(f"Dizi ekleme hatası ({series_url}): {message}")
-        else:
-            logger.info(message)
+def toggle_watch_series(series_id):
+    """Diziyi takip listesine ekler veya çıkarır."""
+    db = get_db()
+    series = db.execute(
+        "SELECT title, watched FROM series WHERE id = ?", (series_id,)
+    ).fetchone()
+    if not series:
+        return False, "Dizi bulunamadı."
+    if series["watched"]:
+        db.execute(
+            "UPDATE series SET watched = 0, next_check_at = NULL WHERE id = ?",
+            (series_id,),
+        )
+        message = f"'{series['title']}' dizisi takip listesinden çıkarıldı."
+    else:
+        interval = watchlist.refresh_interval(db)
+        db.execute(
+            "UPDATE series SET watched = 1, next_check_at = ? WHERE id = ?",
+            (watchlist.next_check_time(interval, first=True), series_id),
+        )
+        message = f"'{series['title']}' dizisi takip listesine eklendi."
+    db.commit()
+    watchlist.notify()
+    return True, message
 
 
-def start_download(episode_id, active_processes):
-    """Belirtilen bölüm için indirme işlemini başlatır."""
+def start_download(episode_id, manual=True):
+    """
+    Belirtilen bölüm için indirme işini boştaki bir işçiye verir. Kullanıcının
+    başlattığı indirmelerde yeniden deneme sayacı sıfırlanır.
+    """
     db = get_db()
     item = db.execute("SELECT * FROM episodes WHERE id = ?", (episode_id,)).fetchone()
     if not item:
@@ -232,16 +361,45 @@ def start_download(episode_id, active_processes):
     if item["status"] in ["Kaynak aranıyor...", "İndiriliyor"]:
         return False, "Bu indirme zaten devam ediyor."
 
-    p = Process(target=process_video, args=(episode_id, "episode"))
-    p.start()
-    pid = p.pid
-    active_processes[pid] = p
-
+    get_progress_channel().forget(episode_id)
+    # Durum işçiye verilmeden önce yazılır; aksi halde hızlı biten bir iş kendi
+    # yazdığı sonucu bu güncellemeyle ezilmiş bulur
     db.execute(
-        "UPDATE episodes SET status = ?, pid = ?, progress = 0, filepath = NULL WHERE id = ?",
-        ("Kaynak aranıyor...", pid, episode_id),
+        "UPDATE episodes SET status = ?, priority = 0, progress = CASE WHEN status = 'Tamamlandı' THEN 0 ELSE progress END, filepath = NULL WHERE id = ?",
+        ("Kaynak aranıyor...", episode_id),
     )
+    if manual:
+        db.execute(
+            "UPDATE episodes SET retry_count = 0, next_attempt_at = NULL, last_error = NULL WHERE id = ?",
+            (episode_id,),
+        )
+    db.commit()
+    pid = get_worker_pool().submit(episode_id, "episode")
+    if pid is None:
+        if get_worker_pool().pid_for(episode_id) is None:
+            # İş hiçbir işçiye verilemedi (havuz kapanıyor); bölüm "Kaynak
+            # aranıyor..." durumunda asılı kalmasın diye eski değerler geri yazılır
+            db.execute(
+                "UPDATE episodes SET status = ?, priority = ?, progress = ?, filepath = ?, retry_count = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (
+                    item["status"],
+                    item["priority"],
+                    item["progress"],
+                    item["filepath"],
+                    item["retry_count"],
+                    item["next_attempt_at"],
+                    item["last_error"],
+                    episode_id,
+                ),
+            )
+            db.commit()
+            return False, "İndirme başlatılamadı; işçi havuzu kapanıyor."
+        return False, "Bu indirme zaten devam ediyor."
+    db.execute("UPDATE episodes SET pid = ? WHERE id = ?", (pid, episode_id))
     db.commit()
+    events.publish("episode", {"id": episode_id, "status": "Kaynak aranıyor..."})
+    # Zamanlayıcı yeni işin bitişini de beklesin
+    scheduler.notify("started")
     title = item["title"] if item["title"] else f"Bölüm {item['episode_number']}"
     logger.info(f"ID {episode_id} ('{title}') için indirme başlatıldı. PID: {pid}")
     return True, f'"{title}" için indirme başlatıldı.'
@@ -253,19 +411,12 @@ def stop_download(episode_id):
     item = db.execute("SELECT * FROM episodes WHERE id = ?", (episode_id,)).fetchone()
     if not (item and item["pid"]):
         return False, "Durdurulacak bir işlem bulunamadı."
-    pid = item["pid"]
     try:
-        if sys.platform != "win32":
-            os.killpg(os.getpgid(pid), signal.SIGTERM)
+        # İşçi proses grubuyla (yt-dlp, Chrome) birlikte sonlandırılır ve yenisi açılır
+        if get_worker_pool().cancel(episode_id):
+            message = "İndirme durdurma isteği gönderildi."
         else:
-            subprocess.run(
-                ["taskkill", "/F", "/T", "/PID", str(pid)],
-                check=True,
-                capture_output=True,
-            )
-        message = "İndirme durdurma isteği gönderildi."
-    except (ProcessLookupError, subprocess.CalledProcessError):
-        message = "İşlem zaten sonlanmış."
+            message = "İşlem zaten sonlanmış."
     except OSError as e:
         message = f"İşlem durdurulurken bir hata oluştu: {e}"
 
@@ -274,24 +425,24 @@ def stop_download(episode_id):
         (episode_id,),
     )
     db.commit()
+    events.publish("episode", {"id": episode_id, "status": "Duraklatıldı"})
+    scheduler.notify("stopped")
     return True, message
 
 
-def delete_record(episode_id, active_processes):
+def delete_record(episode_id):
     """Belirtilen bölüm kaydını veritabanından siler."""
     db = get_db()
     item = db.execute("SELECT pid FROM episodes WHERE id = ?", (episode_id,)).fetchone()
     if item and item["pid"]:
-        pid = item["pid"]
         stop_download(episode_id)
-        if pid in active_processes:
-            del active_processes[pid]
     db.execute("DELETE FROM episodes WHERE id = ?", (episode_id,))
     db.commit()
+    events.publish("changed", {"deleted_episode": episode_id})
     return True, "Bölüm kaydı başarıyla silindi."
 
 
-def delete_series_record(series_id, active_processes):
+def delete_series_record(series_id):
     """Bir diziyi ve ona bağlı tüm bölümleri siler."""
     db = get_db()
     series = db.execute(
@@ -306,14 +457,12 @@ def delete_series_record(series_id, active_processes):
     ).fetchall()
 
     for episode in episodes_to_stop:
-        pid = episode["pid"]
         stop_download(episode["id"])
-        if pid in active_processes:
-            del active_processes[pid]
 
     cursor = db.cursor()
     cursor.execute("DELETE FROM series WHERE id = ?", (series_id,))
     db.commit()
+    events.publish("changed", {"deleted_series": series_id})
     logger.info(f"'{series['title']}' dizisi ve tüm bölümleri başarıyla silindi.")
     return True, f"'{series['title']}' dizisi başarıyla silindi."
 
@@ -330,10 +479,13 @@ def start_all_episodes_for_series(series_id):
     count = 0
     for episode in episodes_to_queue:
         db.execute(
-            "UPDATE episodes SET status = 'Sırada' WHERE id = ?", (episode["id"],)
+            "UPDATE episodes SET status = 'Sırada', retry_count = 0, next_attempt_at = NULL WHERE id = ?",
+            (episode["id"],),
         )
         count += 1
     db.commit()
+    events.publish("changed", {"series_id": series_id})
+    scheduler.notify("enqueue")
     series_title = db.execute(
         "SELECT title FROM series WHERE id = ?", (series_id,)
     ).fetchone()["title"]
@@ -341,6 +493,40 @@ def start_all_episodes_for_series(series_id):
     return True, f"'{series_title}' dizisi için {count} bölüm indirme sırasına alındı."
 
 
+def bump_episode(episode_id):
+    """Sıradaki bir bölümü kuyruğun en önüne alır."""
+    db = get_db()
+    item = db.execute(
+        "SELECT title, episode_number, status FROM episodes WHERE id = ?", (episode_id,)
+    ).fetchone()
+    if not item:
+        return False, "Bölüm kaydı bulunamadı."
+    if item["status"] != "Sırada":
+        return False, "Yalnızca sırada bekleyen bölümler öne alınabilir."
+    db.execute(
+        # Öne alınan bölüm yeniden deneme beklemesindeyse beklemesi de kaldırılır
+        "UPDATE episodes SET priority = (SELECT COALESCE(MAX(priority), 0) + 1 FROM episodes), next_attempt_at = NULL WHERE id = ?",
+        (episode_id,),
+    )
+    db.commit()
+    title = item["title"] if item["title"] else f"Bölüm {item['episode_number']}"
+    return True, f'"{title}" sıranın başına alındı.'
+
+
+def bump_series(series_id):
+    """Bir dizinin bölümlerini diğer dizilerden önce indirilecek şekilde öne alır."""
+    db = get_db()
+    series = db.execute("SELECT title FROM series WHERE id = ?", (series_id,)).fetchone()
+    if not series:
+        return False, "Dizi bulunamadı."
+    db.execute(
+        "UPDATE series SET priority = (SELECT COALESCE(MAX(priority), 0) + 1 FROM series) WHERE id = ?",
+        (series_id,),
+    )
+    db.commit()
+    return True, f"'{series['title']}' dizisi kuyrukta öne alındı."
+
+
 def delete_item_file(episode_id):
     """İndirilmiş bir bölüm dosyasını diskten siler."""
     db = get_db()
@@ -366,25 +552,32 @@ def delete_item_file(episode_id):
         return False, "Silinecek dosya bulunamadı veya zaten silinmiş."
 
 
-def run_auto_download_cycle(active_processes):
-    """Otomatik indirme döngüsünü çalıştırır."""
+def run_auto_download_cycle(concurrent_limit=None):
+    """
+    Boş slot sayısı kadar sıradaki bölümü işçi havuzuna verir. Limit verilmezse
+    CONCURRENT_DOWNLOADS ayarı kullanılır. Önden çözümleme açıksa yalnızca kaynağı
+    hazır bölümler verilir ve sıradaki bölümlerin çözümlemesi başlatılır.
+    """
     db = get_db()
-    try:
-        concurrent_limit = int(get_setting("CONCURRENT_DOWNLOADS", db))
-    except (ValueError, TypeError):
-        concurrent_limit = 1
-
-    for pid, process in list(active_processes.items()):
-        if not process.is_alive():
-            del active_processes[pid]
-            logger.info(
-                f"Otomatik yönetici: Tamamlanmış proses (PID: {pid}) temizlendi."
+    if concurrent_limit is None:
+        try:
+            concurrent_limit = int(get_setting("CONCURRENT_DOWNLOADS", db))
+        except (ValueError, TypeError):
+            concurrent_limit = 1
+
+    pool = get_worker_pool()
+    resolver = get_source_resolver()
+    resolve_ahead = resolver.configure(db)
+    while pool.busy_count() < concurrent_limit:
+        if resolve_ahead:
+            next_episode = resolver.next_ready(
+                db,
+                upcoming_episodes(
+                    db, concurrent_limit - pool.busy_count() + resolver.lookahead
+                ),
             )
-
-    while len(active_processes) < concurrent_limit:
-        next_episode = db.execute(
-            "SELECT id FROM episodes WHERE status = 'Sırada' ORDER BY created_at ASC LIMIT 1"
-        ).fetchone()
+        else:
+            next_episode = select_next_episode(db)
 
         if not next_episode:
             break
@@ -393,28 +586,184 @@ def run_auto_download_cycle(active_processes):
         logger.info(
             f"[Auto-Download] Sırada bekleyen bölüm bulundu (ID: {episode_id}). İndirme başlatılıyor."
         )
-        start_download(episode_id, active_processes)
+        success, message = start_download(episode_id, manual=False)
+        if success:
+            db.execute(
+                "UPDATE series SET last_dispatched_at = ? WHERE id = ?",
+                (time.time(), next_episode["series_id"]),
+            )
+            db.commit()
+        else:
+            # Bölüm başka bir yoldan başlatılmışsa aynı satırda döngüye girme
+            logger.warning(f"[Auto-Download] ID {episode_id} başlatılamadı: {message}")
+            break
+
+    if resolve_ahead:
+        resolver.fill(
+            db,
+            upcoming_episodes(
+                db, max(0, concurrent_limit - pool.busy_count()) + resolver.lookahead
+            ),
+        )
 
 
-def get_all_series_status():
-    """Tüm dizilerin ve bölümlerinin durumunu UI için hazırlar."""
-    db = get_db()
-    series_list = db.execute("SELECT * FROM series ORDER BY title ASC").fetchall()
+def _with_live_progress(episode, live):
+    """İndirilmekte olan bölümün ilerlemesini bellekteki anlık değerle günceller."""
+    info = live.get(episode["id"])
+    if info and episode["status"] == "İndiriliyor":
+        episode["progress"] = info["progress"]
+        episode["downloaded_bytes"] = info["downloaded_bytes"]
+    return episode
+
+
+def get_all_series_status(db_conn=None):
+    """
+    Tüm dizilerin ve bölümlerinin durumunu UI için hazırlar. Dizi, sezon ve
+    bölümler indeks sırasıyla okunan tek bir JOIN sorgusundan Python tarafında
+    gruplanır.
+    """
+    db = db_conn or get_db()
+    live = get_progress_channel().live_snapshot()
+    cursor = db.cursor()
+    # sqlite3.Row yerine düz demetler: 20 bin satırda isimle erişim belirgin maliyet
+    cursor.row_factory = None
+    cursor.execute(
+        """
+        SELECT ser.id, ser.title, ser.source_url, ser.poster_url, ser.description,
+               ser.created_at, ser.watched, s.id, s.season_number, e.*
+        FROM series ser
+        LEFT JOIN seasons s ON s.series_id = ser.id
+        LEFT JOIN episodes e ON e.season_id = s.id
+        ORDER BY ser.title ASC, ser.id, s.season_number ASC, e.episode_number ASC
+        """
+    )
+    episode_columns = [column[0] for column in cursor.description[9:]]
+
     series_data = []
-    for s in series_list:
-        series_dict = dict(s)
-        seasons = db.execute(
-            "SELECT * FROM seasons WHERE series_id = ? ORDER BY season_number ASC",
-            (s["id"],),
-        ).fetchall()
-        series_dict["seasons"] = []
-        for season in seasons:
-            season_dict = dict(season)
-            episodes = db.execute(
-                "SELECT * FROM episodes WHERE season_id = ? ORDER BY episode_number ASC",
-                (season["id"],),
-            ).fetchall()
-            season_dict["episodes"] = [dict(ep) for ep in episodes]
+    series_dict = None
+    season_dict = None
+    for row in cursor:
+        if series_dict is None or series_dict["id"] != row[0]:
+            series_dict = {
+                "id": row[0],
+                "title": row[1],
+                "source_url": row[2],
+                "poster_url": row[3],
+                "description": row[4],
+                "created_at": row[5],
+                "watched": row[6],
+                "seasons": [],
+            }
+            series_data.append(series_dict)
+            season_dict = None
+        if row[7] is None:
+            continue
+        if season_dict is None or season_dict["id"] != row[7]:
+            season_dict = {
+                "id": row[7],
+                "series_id": row[0],
+                "season_number": row[8],
+                "episodes": [],
+            }
             series_dict["seasons"].append(season_dict)
-        series_data.append(series_dict)
+        if row[9] is None:
+            continue
+        episode = dict(zip(episode_columns, row[9:]))
+        season_dict["episodes"].append(_with_live_progress(episode, live))
     return series_data
+
+
+# Bölümün alabileceği sabit durumlar; bunların dışındaki her durum işçinin yazdığı
+# bir hata mesajıdır ("Hata: ...", "İndirme hatası (...)", "Process hatası: ...")
+EPISODE_STATES = (
+    "Yeni",
+    "Sırada",
+    "Kaynak aranıyor...",
+    "İndiriliyor",
+    "Tamamlandı",
+    "Duraklatıldı",
+)
+
+
+def get_status_counts(db_conn=None):
+    """
+    Duruma göre bölüm sayıları. Metrik etiketleri sınırlı kalsın diye sabit
+    durumların dışındaki tüm hata mesajları tek bir 'Hata' grubunda toplanır.
+    """
+    db = db_conn or get_db()
+    placeholders = ", ".join("?" for _ in EPISODE_STATES)
+    rows = db.execute(
+        f"SELECT CASE WHEN status IN ({placeholders}) THEN status ELSE 'Hata' END AS state, "
+        "COUNT(*) FROM episodes GROUP BY state",
+        EPISODE_STATES,
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def get_change_version(db_conn=None):
+    """Veritabanındaki dizi/bölüm değişikliklerinin güncel sürüm numarasını döndürür."""
+    db = db_conn or get_db()
+    return db.execute("SELECT version FROM change_version WHERE id = 1").fetchone()[0]
+
+
+def _prune_tombstones(db):
+    """Son TOMBSTONE_RETENTION silme kaydı dışındakileri atar ve alt sınırı günceller."""
+    row = db.execute(
+        "SELECT version FROM deleted_items ORDER BY version DESC LIMIT 1 OFFSET ?",
+        (config.TOMBSTONE_RETENTION,),
+    ).fetchone()
+    if row:
+        db.execute("DELETE FROM deleted_items WHERE version <= ?", (row[0],))
+        db.execute(
+            "UPDATE change_version SET tombstone_floor = ? WHERE id = 1", (row[0],)
+        )
+        db.commit()
+
+
+def get_status_delta(since, db_conn=None):
+    """
+    Verilen sürümden sonra değişen dizileri, bölümleri ve silinen kayıtları döndürür.
+    İstemcinin sürümü saklanan silme kayıtlarından eskiyse None döner (tam yanıt gerekir).
+    """
+    db = db_conn or get_db()
+    version, floor = db.execute(
+        "SELECT version, tombstone_floor FROM change_version WHERE id = 1"
+    ).fetchone()
+    if since > version or since < floor:
+        return None
+
+    live = get_progress_channel().live_snapshot()
+    series = [
+        {key: row[key] for key in ("id", "title", "source_url", "poster_url", "description", "created_at", "watched")}
+        for row in db.execute(
+            "SELECT * FROM series WHERE version > ? ORDER BY title ASC", (since,)
+        ).fetchall()
+    ]
+    episodes = [
+        _with_live_progress(dict(row), live)
+        for row in db.execute(
+            """
+            SELECT e.*, s.season_number, s.series_id FROM episodes e
+            JOIN seasons s ON e.season_id = s.id
+            WHERE e.version > ?
+            ORDER BY s.series_id, s.season_number, e.episode_number
+            """,
+            (since,),
+        ).fetchall()
+    ]
+    deleted = {"series": [], "episode": []}
+    for row in db.execute(
+        "SELECT kind, item_id FROM deleted_items WHERE version > ?", (since,)
+    ).fetchall():
+        deleted[row["kind"]].append(row["item_id"])
+
+    if db.execute("SELECT COUNT(*) FROM deleted_items").fetchone()[0] > 2 * config.TOMBSTONE_RETENTION:
+        _prune_tombstones(db)
+
+    return {
+        "version": version,
+        "series": series,
+        "episodes": episodes,
+        "deleted_series": deleted["series"],
+        "deleted_episodes": deleted["episode"],
+    }
@@ -0,0 +1,76 @@
+# @author: MembaCo.
+
+import logging
+import sqlite3
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# İndirme sırasında bu HTTP kodları alınırsa önbellekteki kaynak geçersiz sayılır.
+REJECTED_HTTP_CODES = (401, 403, 404, 410)
+
+
+def get_cached_source(conn, episode_url, ttl):
+    """
+    Bölüm URL'si için önbellekteki (video_url, referer) çiftini döndürür.
+    Süresi dolmuş kayıtlar silinir ve None döner.
+    """
+    try:
+        row = conn.execute(
+            "SELECT video_url, referer, resolved_at FROM resolved_sources WHERE episode_url = ?",
+            (episode_url,),
+        ).fetchone()
+        if not row:
+            return None
+        if time.time() - row[2] > ttl:
+            invalidate_source(conn, episode_url)
+            return None
+        return row[0], row[1]
+    except sqlite3.Error as e:
+        logger.error(f"Kaynak önbelleği okunurken hata: {e}", exc_info=True)
+        return None
+
+
+def store_source(conn, episode_url, video_url, referer):
+    """Çözülen kaynağı önbelleğe yazar."""
+    try:
+        conn.execute(
+            "REPLACE INTO resolved_sources (episode_url, video_url, referer, resolved_at) VALUES (?, ?, ?, ?)",
+            (episode_url, video_url, referer, time.time()),
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Kaynak önbelleğe yazılırken hata: {e}", exc_info=True)
+
+
+def invalidate_source(conn, episode_url):
+    """Bölüm URL'sine ait önbellek kaydını siler."""
+    try:
+        conn.execute(
+            "DELETE FROM resolved_sources WHERE episode_url = ?", (episode_url,)
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Kaynak önbelleği temizlenirken hata: {e}", exc_info=True)
+
+
+def validate_source(session, video_url, referer, timeout=10):
+    """
+    Önbellekteki kaynağın hâlâ erişilebilir olduğunu ucuz bir istekle doğrular.
+    m3u8 listeleri küçük olduğu için indirilip başlığı kontrol edilir, diğer
+    dosyalar için HEAD isteği yeterlidir.
+    """
+    headers = {"Referer": referer} if referer else {}
+    try:
+        if ".m3u8" in video_url:
+            response = session.get(video_url, headers=headers, timeout=timeout)
+            return response.ok and response.text.lstrip().startswith("#EXTM3U")
+        response = session.head(
+            video_url, headers=headers, timeout=timeout, allow_redirects=True
+        )
+        return response.ok
+    except requests.RequestException as e:
+        logger.info(f"Önbellekteki kaynak doğrulanamadı: {e}")
+        return False
@@ -0,0 +1,236 @@
+# @author: MembaCo.
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class JobTrace:
+    """
+    Bir indirme denemesinin aşamalarını (başlangıç, bitiş, sonuç) toplar. İç içe
+    aşamalar derinlikleriyle tutulur; deneme bitince tek bir yazmayla job_traces
+    tablosuna kaydedilir.
+    """
+
+    def __init__(self, episode_id, attempt=0):
+        self.job_id = uuid.uuid4().hex
+        self.episode_id = episode_id
+        self.attempt = attempt
+        self.root = {
+            "stage": "job",
+            "depth": 0,
+            "started_at": time.time(),
+            "ended_at": None,
+            "outcome": "ok",
+            "detail": None,
+        }
+        self.spans = [self.root]
+        self._depth = 1
+
+    @contextmanager
+    def span(self, stage):
+        """
+        Bloğun süresini bir aşama olarak kaydeder. Blok istisnayla biterse sonuç
+        'error' olur; blok içinde set_outcome ile başka bir sonuç da verilebilir.
+        """
+        record = {
+            "stage": stage,
+            "depth": self._depth,
+            "started_at": time.time(),
+            "ended_at": None,
+            "outcome": "ok",
+            "detail": None,
+        }
+        self.spans.append(record)
+        self._depth += 1
+        try:
+            yield record
+        except BaseException as e:
+            record["outcome"] = "error"
+            record["detail"] = record["detail"] or str(e)[:200]
+            raise
+        finally:
+            self._depth -= 1
+            record["ended_at"] = time.time()
+
+    def close(self, status):
+        """Denemeyi bölümün son durumuna göre sonlandırır (tamamlandı/yeniden deneme/hata)."""
+        self.root["ended_at"] = time.time()
+        if status == "Tamamlandı":
+            self.root["outcome"] = "ok"
+        elif status == "Sırada":
+            self.root["outcome"] = "retry"
+        else:
+            self.root["outcome"] = "error"
+        self.root["detail"] = status
+
+    def save(self, conn):
+        rows = [
+            (
+                self.job_id,
+                self.episode_id,
+                self.attempt,
+                span["stage"],
+                span["depth"],
+                span["started_at"],
+                span["ended_at"] or time.time(),
+                span["outcome"],
+                span["detail"],
+            )
+            for span in self.spans
+        ]
+        if not rows:
+            return
+        try:
+            conn.executemany(
+                "INSERT INTO job_traces (job_id, episode_id, attempt, stage, depth, started_at, ended_at, outcome, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            _prune(conn)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"ID {self.episode_id} için aşama kaydı yazılamadı: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+
+
+def _prune(conn):
+    """En yeni TRACE_HISTORY_JOBS deneme dışındaki kayıtları siler."""
+    cutoff = conn.execute(
+        "SELECT started_at FROM job_traces WHERE depth = 0 ORDER BY started_at DESC LIMIT 1 OFFSET ?",
+        (config.TRACE_HISTORY_JOBS,),
+    ).fetchone()
+    if cutoff:
+        conn.execute("DELETE FROM job_traces WHERE started_at <= ?", (cutoff[0],))
+
+
+# İşçi proses aynı anda tek bir bölüm işler; derin çağrılar (iframe adımları,
+# tarayıcı kiralama) aşamalarını bu etkin kayda ekler.
+_local = threading.local()
+
+
+def start(episode_id, attempt=0):
+    trace = JobTrace(episode_id, attempt)
+    _local.trace = trace
+    return trace
+
+
+def finish(conn, status):
+    """Etkin kaydı bölümün son durumuyla kapatıp veritabanına yazar ve bırakır."""
+    trace = getattr(_local, "trace", None)
+    _local.trace = None
+    if trace is not None and conn is not None:
+        trace.close(status)
+        trace.save(conn)
+
+
+@contextmanager
+def span(stage):
+    """Etkin kayıt varsa aşamayı ona ekler; yoksa hiçbir şey yapmaz."""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        yield None
+        return
+    with trace.span(stage) as record:
+        yield record
+
+
+def set_outcome(record, outcome, detail=None):
+    if record is not None:
+        record["outcome"] = outcome
+        if detail:
+            record["detail"] = str(detail)[:200]
+
+
+def get_episode_traces(db_conn, episode_id, limit=5):
+    """Bir bölümün son denemelerini, aşamaları başlangıca göre göreli sürelerle döndürür."""
+    jobs = db_conn.execute(
+        "SELECT job_id FROM job_traces WHERE episode_id = ? AND depth = 0 ORDER BY started_at DESC LIMIT ?",
+        (episode_id, limit),
+    ).fetchall()
+    traces = []
+    for job in jobs:
+        rows = db_conn.execute(
+            "SELECT stage, depth, started_at, ended_at, outcome, detail, attempt FROM job_traces WHERE job_id = ? ORDER BY started_at, depth",
+            (job["job_id"],),
+        ).fetchall()
+        root = rows[0]
+        total = max(root["ended_at"] - root["started_at"], 1e-6)
+        traces.append(
+            {
+                "job_id": job["job_id"],
+                "attempt": root["attempt"],
+                "started_at": root["started_at"],
+                "started": time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(root["started_at"])
+                ),
+                "duration": total,
+                "outcome": root["outcome"],
+                "spans": [
+                    {
+                        "stage": row["stage"],
+                        "depth": row["depth"],
+                        "offset": row["started_at"] - root["started_at"],
+                        "duration": row["ended_at"] - row["started_at"],
+                        "offset_pct": (row["started_at"] - root["started_at"]) / total * 100,
+                        "width_pct": max(
+                            0.5, (row["ended_at"] - row["started_at"]) / total * 100
+                        ),
+                        "outcome": row["outcome"],
+                        "detail": row["detail"],
+                    }
+                    for row in rows
+                ],
+            }
+        )
+    return traces
+
+
+def get_stage_report(db_conn, limit=200):
+    """
+    Son `limit` denemede aşama başına toplam/ortalama/p95 süre ve hata sayısı;
+    toplam süreye göre azalan sırada ("zaman nereye gidiyor").
+    """
+    rows = db_conn.execute(
+        """
+        SELECT stage, depth, ended_at - started_at AS duration, outcome FROM job_traces
+        WHERE job_id IN (
+            SELECT job_id FROM job_traces WHERE depth = 0 ORDER BY started_at DESC LIMIT ?
+        )
+        """,
+        (limit,),
+    ).fetchall()
+    stages = {}
+    jobs_total = 0.0
+    for row in rows:
+        if row["depth"] == 0:
+            jobs_total += row["duration"]
+        stats = stages.setdefault(
+            row["stage"], {"stage": row["stage"], "depth": row["depth"], "durations": [], "errors": 0}
+        )
+        stats["durations"].append(row["duration"])
+        if row["outcome"] == "error":
+            stats["errors"] += 1
+    report = []
+    for stats in stages.values():
+        durations = sorted(stats.pop("durations"))
+        total = sum(durations)
+        report.append(
+            dict(
+                stats,
+                count=len(durations),
+                total=total,
+                mean=total / len(durations),
+                p95=durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+                share=total / jobs_total * 100 if jobs_total else 0.0,
+            )
+        )
+    report.sort(key=lambda s: s["total"], reverse=True)
+    return report
@@ -0,0 +1,161 @@
+# @author: MembaCo.
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from database import get_setting, pooled_connection
+
+logger = logging.getLogger(__name__)
+
+
+def episode_list_hash(series_data):
+    """Ayrıştırılmış sezon/bölüm listesinin özeti; sayfa değişmediyse aynı kalır."""
+    episodes = [
+        (season["season_number"], e["episode_number"], e["title"], e["url"])
+        for season in series_data["seasons"]
+        for e in season["episodes"]
+    ]
+    return hashlib.sha1(
+        json.dumps(episodes, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def refresh_interval(db_conn=None):
+    """Takip edilen bir dizinin iki kontrolü arasındaki süre (sn)."""
+    try:
+        hours = float(get_setting("WATCHLIST_INTERVAL_HOURS", db_conn) or 0)
+    except (ValueError, TypeError):
+        hours = 0
+    return max(hours, config.WATCHLIST_MIN_INTERVAL_HOURS) * 3600
+
+
+def next_check_time(interval, now=None, first=False):
+    """
+    Bir sonraki kontrol zamanı. Takibe yeni alınan diziler tüm aralığa, kontrol
+    edilenler aralığın ±%10'una dağıtılır; aynı anda eklenen yüzlerce dizi aynı
+    anda yenilenmez.
+    """
+    now = time.time() if now is None else now
+    if first:
+        return now + random.uniform(0, interval)
+    return now + interval * random.uniform(0.9, 1.1)
+
+
+class WatchlistRefresher:
+    """
+    Takip edilen dizileri zamanı geldikçe yeniler. Yenilemeler sınırlı sayıda iş
+    parçacığında yürür (her biri havuzdan bir tarayıcı kiralar); iş parçacığı bir
+    sonraki dizinin zamanı gelene ya da takip listesi değişene kadar uyur.
+    """
+
+    def __init__(self, app, refresh, concurrency=None):
+        self.app = app
+        self.refresh = refresh
+        self.concurrency = max(1, concurrency or config.WATCHLIST_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="watchlist"
+        )
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="watchlist-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def notify(self):
+        self._wake.set()
+
+    def _due_series(self, conn, now, limit):
+        with self._lock:
+            running = set(self._running)
+        # Yenilenmekte olanlar hâlâ vadesi gelmiş görünür; fazladan satır alıp eleyin
+        rows = conn.execute(
+            "SELECT id FROM series WHERE watched = 1 AND next_check_at <= ? "
+            "ORDER BY next_check_at LIMIT ?",
+            (now, limit + len(running)),
+        )
+        return [row[0] for row in rows if row[0] not in running][:limit]
+
+    def _next_timeout(self, conn, now):
+        due = conn.execute(
+            "SELECT MIN(next_check_at) FROM series WHERE watched = 1 AND next_check_at > ?",
+            (now,),
+        ).fetchone()[0]
+        timeout = config.SCHEDULER_RESCAN_INTERVAL
+        if due is not None:
+            timeout = min(timeout, due - now)
+        return timeout
+
+    def _run(self):
+        logger.info("Takip listesi yenileyicisi başlatıldı.")
+        while True:
+            timeout = config.SCHEDULER_RESCAN_INTERVAL
+            try:
+                now = time.time()
+                with self._lock:
+                    free = self.concurrency - len(self._running)
+                with pooled_connection() as conn:
+                    if free > 0:
+                        for series_id in self._due_series(conn, now, free):
+                            with self._lock:
+                                self._running.add(series_id)
+                            self._executor.submit(self._refresh_one, series_id)
+                        free = self.concurrency - len(self._running)
+                    if free > 0:
+                        timeout = self._next_timeout(conn, now)
+            except Exception as e:
+                logger.error(f"Takip listesi yenileyicisinde hata: {e}", exc_info=True)
+            # Slotlar doluysa bir yenileme bitene (notify) kadar beklenir
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _refresh_one(self, series_id):
+        try:
+            with self.app.app_context():
+                self.refresh(series_id)
+        except Exception as e:
+            logger.error(f"Dizi {series_id} yenilenirken hata: {e}", exc_info=True)
+            # Hatalı dizi hemen yeniden seçilip döngüye girmesin
+            try:
+                with pooled_connection() as conn:
+                    conn.execute(
+                        "UPDATE series SET next_check_at = ? WHERE id = ?",
+                        (next_check_time(refresh_interval(conn)), series_id),
+                    )
+                    conn.commit()
+            except Exception:
+                logger.error(f"Dizi {series_id} için sonraki kontrol zamanı yazılamadı.")
+        finally:
+            with self._lock:
+                self._running.discard(series_id)
+            self.notify()
+
+
+_refresher = None
+
+
+def start_watchlist(app, refresh):
+    """Uygulamanın takip listesi yenileyicisini oluşturup başlatır."""
+    global _refresher
+    if _refresher is None:
+        _refresher = WatchlistRefresher(app, refresh)
+        _refresher.start()
+    return _refresher
+
+
+def notify():
+    """Yenileyici çalışıyorsa takip listesinin değiştiğini bildirir."""
+    if _refresher is not None:
+        _refresher.notify()
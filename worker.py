@@ -8,22 +8,39 @@ import os
 import sys
 import logging
 import glob
-import shutil
 import base64
+import threading
+from contextlib import ExitStack
 from hashlib import md5
+from urllib.parse import urljoin, urlparse
 
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
+import requests
+from requests.adapters import HTTPAdapter
 
-from seleniumwire import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
 
+import adaptive
+import bandwidth
 import config
+import metrics
+import retries
+import tracing
+from browser_pool import get_driver_pool
+from hls_downloader import DownloadJournal, HLSDownloader, HLSDownloadError, parse_rate
 from logging_config import setup_logging
-from database import get_all_settings as get_all_settings_from_db
+from progress import ProgressReporter
+from source_cache import (
+    REJECTED_HTTP_CODES,
+    get_cached_source,
+    invalidate_source,
+    store_source,
+    validate_source,
+)
+from database import get_all_settings as get_all_settings_from_db, get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -58,51 +75,190 @@ def decrypt_aes(encrypted_data, password):
 
 # --- ŞİFRE ÇÖZME SONU ---
 
+CRYPTO_PAYLOAD_RE = re.compile(
+    r'CryptoJS\.AES\.decrypt\("([^"]+)",\s*"([^"]+)"\)', re.DOTALL
+)
+YT_DLP_SIZE_RE = re.compile(r"of\s+~?\s*([0-9.]+\s*[KMG]i?B)")
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".json", ".tmp")
+HTTP_ERROR_RE = re.compile(r"HTTP Error (\d{3})")
+VIDEO_SRC_RE = re.compile(r'src="([^"]+\.(?:m3u8|mp4))"')
+# Tembel yüklenen iframe'lerde src yer tutucudur (about:blank), asıl adres
+# data-src'dedir; bu yüzden etiketteki tüm src/data-src değerlerine bakılır.
+IFRAME_TAG_RE = re.compile(r"<iframe\b[^>]*>", re.IGNORECASE)
+IFRAME_SRC_RE = re.compile(
+    r"\s(?:data-)?src\s*=\s*[\"']([^\"']+)[\"']", re.IGNORECASE
+)
+FIRST_IFRAME_MARKERS = ("king.php", "stream")
+SECOND_IFRAME_MARKERS = ("molystream", "cehennemstream")
+
+_http_session = None
+_http_session_pid = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Bu prosese ait, bağlantı havuzlu requests oturumunu döndürür."""
+    global _http_session, _http_session_pid
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=config.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=config.HTTP_POOL_MAXSIZE,
+                max_retries=1,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(
+                {
+                    "User-Agent": config.USER_AGENT,
+                    "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+                }
+            )
+            _http_session = session
+            _http_session_pid = os.getpid()
+        return _http_session
+
+
+def _find_iframe_url(html, markers, base_url):
+    """HTML içindeki iframe'lerden belirtilen işaretleri içeren ilkini döndürür."""
+    for tag in IFRAME_TAG_RE.findall(html):
+        for src in IFRAME_SRC_RE.findall(tag):
+            if any(marker in src for marker in markers):
+                return urljoin(base_url, src.strip())
+    return None
+
+
+def _extract_video_url(page_source):
+    """CryptoJS yükünü çözer ve içindeki asıl video linkini döndürür."""
+    match = CRYPTO_PAYLOAD_RE.search(page_source)
+    if not match:
+        return None
+    decrypted_html = decrypt_aes(match.group(1), match.group(2))
+    if not decrypted_html:
+        return None
+    source_match = VIDEO_SRC_RE.search(decrypted_html)
+    if not source_match:
+        logger.error("Çözülmüş HTML içinde video linki bulunamadı.")
+        return None
+    return source_match.group(1)
+
 
 def _update_status_worker(
     conn, item_id, item_type, status=None, progress=None, filepath=None
 ):
-    """Veritabanındaki indirme durumunu günceller."""
+    """Veritabanındaki indirme durumunu tek bir UPDATE ile günceller."""
     table = "episodes"
+    columns = {"status": status, "progress": progress, "filepath": filepath}
+    assignments = [
+        (column, value)
+        for column, value in columns.items()
+        if value is not None and (column != "status" or value)
+    ]
+    if not assignments:
+        return
+    set_clause = ", ".join(f"{column} = ?" for column, _ in assignments)
     try:
-        cursor = conn.cursor()
-        if status:
-            cursor.execute(
-                f"UPDATE {table} SET status = ? WHERE id = ?", (status, item_id)
-            )
-        if progress is not None:
-            cursor.execute(
-                f"UPDATE {table} SET progress = ? WHERE id = ?", (progress, item_id)
+        with metrics.sqlite_write("worker"):
+            conn.execute(
+                f"UPDATE {table} SET {set_clause} WHERE id = ?",
+                [value for _, value in assignments] + [item_id],
             )
-        if filepath is not None:
-            cursor.execute(
-                f"UPDATE {table} SET filepath = ? WHERE id = ?", (filepath, item_id)
-            )
-        conn.commit()
+            conn.commit()
     except sqlite3.Error as e:
         logger.error(f"ID {item_id} için DB güncellemesinde hata: {e}", exc_info=True)
 
 
-def find_video_source(target_url, user_data_dir):
+def find_video_source_fast(target_url, timeout=15):
+    """
+    Tarayıcı açmadan, iframe zincirini (king.php -> molystream/cehennemstream ->
+    CryptoJS yükü) doğru Referer başlıklarıyla HTTP üzerinden takip eder.
+    """
+    session = get_http_session()
+    try:
+        origin = "{0.scheme}://{0.netloc}/".format(urlparse(target_url))
+        with tracing.span("page_load"):
+            response = session.get(
+                target_url, headers={"Referer": origin}, timeout=timeout
+            )
+            response.raise_for_status()
+        iframe1_url = _find_iframe_url(response.text, FIRST_IFRAME_MARKERS, target_url)
+        if not iframe1_url:
+            logger.info("Hızlı yol: ilk iframe HTML içinde bulunamadı.")
+            return None, None
+
+        with tracing.span("iframe1"):
+            response = session.get(
+                iframe1_url, headers={"Referer": target_url}, timeout=timeout
+            )
+            response.raise_for_status()
+        iframe2_url = _find_iframe_url(
+            response.text, SECOND_IFRAME_MARKERS, iframe1_url
+        )
+        if not iframe2_url:
+            logger.info("Hızlı yol: ikinci iframe HTML içinde bulunamadı.")
+            return None, None
+
+        with tracing.span("iframe2"):
+            response = session.get(
+                iframe2_url, headers={"Referer": iframe1_url}, timeout=timeout
+            )
+            response.raise_for_status()
+        with tracing.span("decrypt"):
+            final_video_url = _extract_video_url(response.text)
+        if not final_video_url:
+            logger.info("Hızlı yol: şifreleme verisi bulunamadı.")
+            return None, None
+
+        logger.info(f"Video linki tarayıcısız çözüldü: {final_video_url}")
+        return final_video_url, iframe2_url
+    except requests.RequestException as e:
+        logger.info(f"Hızlı yol HTTP hatası nedeniyle başarısız oldu: {e}")
+        return None, None
+
+
+def find_video_source(target_url, driver_pool=None):
+    """
+    Video kaynağını önce HTTP üzerinden, başarısız olursa Selenium ile bulur.
+    driver_pool verilmezse prosesin ortak tarayıcı havuzu kullanılır.
+    """
+    if config.FAST_RESOLVER_ENABLED:
+        with tracing.span("fast_resolve") as span:
+            video_url, referer = find_video_source_fast(target_url)
+            if not video_url:
+                tracing.set_outcome(span, "error")
+        if video_url:
+            return video_url, referer
+        logger.info("Hızlı çözümleme başarısız, tarayıcı yoluna geçiliyor.")
+    with tracing.span("browser_resolve") as span:
+        video_url, referer = find_video_source_selenium(target_url, driver_pool)
+        if not video_url:
+            tracing.set_outcome(span, "error")
+    return video_url, referer
+
+
+def find_video_source_selenium(target_url, driver_pool=None):
     """Selenium ile iframe zincirini takip ederek video kaynağını ve şifresini bulur."""
-    options = uc.ChromeOptions()
-    options.add_argument("--window-size=1280,720")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--ignore-certificate-errors")
-    options.add_argument("--mute-audio")
-    options.add_argument(f"--user-agent={config.USER_AGENT}")
-
-    driver = None
     try:
-        logger.info(f"Chrome başlatılıyor...")
-        driver = uc.Chrome(user_data_dir=user_data_dir, options=options)
+        with ExitStack() as stack:
+            # Profil hazırlığı ve Chrome açılışı kiralama sırasında gerçekleşir
+            with tracing.span("browser_lease"):
+                driver = stack.enter_context((driver_pool or get_driver_pool()).lease())
+            return _resolve_with_driver(driver, target_url)
+    except Exception as e:
+        logger.error(
+            f"Video kaynağı aranırken genel bir hata oluştu: {e}", exc_info=True
+        )
+        return None, None
 
-        # 1. Adım: Ana dizi sayfasına git
-        logger.info(f"Ana sayfa yükleniyor: {target_url}")
+
+def _resolve_with_driver(driver, target_url):
+    """Kiralanan tarayıcı ile iframe zincirini takip eder."""
+    # 1. Adım: Ana dizi sayfasına git
+    logger.info(f"Ana sayfa yükleniyor: {target_url}")
+    wait = WebDriverWait(driver, 30)
+    with tracing.span("page_load"):
         driver.get(target_url)
-        wait = WebDriverWait(driver, 30)
 
         # 2. Adım: İlk iframe'i bul ve URL'sini al (örneğin king.php)
         logger.info("İlk video iframe'i aranıyor...")
@@ -113,8 +269,9 @@ def find_video_source(target_url, user_data_dir):
         )
         iframe1_url = iframe1.get_attribute("src")
 
-        # 3. Adım: İlk iframe'in sayfasına git
-        logger.info(f"İlk iframe'e gidiliyor: {iframe1_url}")
+    # 3. Adım: İlk iframe'in sayfasına git
+    logger.info(f"İlk iframe'e gidiliyor: {iframe1_url}")
+    with tracing.span("iframe1"):
         driver.get(iframe1_url)
 
         # 4. Adım: İkinci iframe'i bul (molystream/cehennemstream)
@@ -129,66 +286,88 @@ def find_video_source(target_url, user_data_dir):
         )
         iframe2_url = iframe2.get_attribute("src")
 
-        # 5. Adım: İkinci ve son iframe'in sayfasına git
-        logger.info(f"Son video iframe'ine gidiliyor: {iframe2_url}")
+    # 5. Adım: İkinci ve son iframe'in sayfasına git
+    logger.info(f"Son video iframe'ine gidiliyor: {iframe2_url}")
+    with tracing.span("iframe2"):
         driver.get(iframe2_url)
 
-        # 6. Adım: Şifreleme verisini ara
-        logger.info("Şifreleme verisi aranıyor...")
+    # 6. Adım: Şifreleme verisini ara
+    logger.info("Şifreleme verisi aranıyor...")
+    with tracing.span("wait"):
         time.sleep(5)  # Sayfanın tam yüklenmesi için kısa bir bekleme
         page_source = driver.page_source
-        match = re.search(
-            r'CryptoJS\.AES\.decrypt\("([^"]+)",\s*"([^"]+)"\)', page_source, re.DOTALL
-        )
 
-        if not match:
-            # --- HATA AYIKLAMA ÖZELLİĞİ ---
-            debug_folder = "debug_logs"
-            os.makedirs(debug_folder, exist_ok=True)
-            filename = f"error_page_source_{int(time.time())}.html"
-            filepath = os.path.join(debug_folder, filename)
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(page_source)
-            logger.error(
-                f"Sayfa kaynağında şifreleme verisi bulunamadı. Sayfa içeriği şuraya kaydedildi: {filepath}"
-            )
-            # --- HATA AYIKLAMA SONU ---
-            return None, None
+    if not CRYPTO_PAYLOAD_RE.search(page_source):
+        # --- HATA AYIKLAMA ÖZELLİĞİ ---
+        debug_folder = "debug_logs"
+        os.makedirs(debug_folder, exist_ok=True)
+        filename = f"error_page_source_{int(time.time())}.html"
+        filepath = os.path.join(debug_folder, filename)
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(page_source)
+        logger.error(
+            f"Sayfa kaynağında şifreleme verisi bulunamadı. Sayfa içeriği şuraya kaydedildi: {filepath}"
+        )
+        # --- HATA AYIKLAMA SONU ---
+        return None, None
 
-        encrypted_data = match.group(1)
-        password = match.group(2)
-        logger.info("Şifreleme verisi ve parola başarıyla bulundu.")
+    logger.info("Şifreleme verisi ve parola başarıyla bulundu.")
 
-        decrypted_html = decrypt_aes(encrypted_data, password)
-        if not decrypted_html:
-            return None, None
-
-        # 7. Adım: Şifresi çözülmüş HTML'den asıl video linkini çıkar
-        source_match = re.search(r'src="([^"]+\.(?:m3u8|mp4))"', decrypted_html)
-        if not source_match:
-            logger.error("Çözülmüş HTML içinde video linki bulunamadı.")
-            return None, None
+    # 7. Adım: Şifresi çözülmüş HTML'den asıl video linkini çıkar
+    with tracing.span("decrypt"):
+        final_video_url = _extract_video_url(page_source)
+    if not final_video_url:
+        return None, None
+    referer_url = iframe2_url
 
-        final_video_url = source_match.group(1)
-        referer_url = iframe2_url
+    logger.info(f"Asıl video linki başarıyla çözüldü: {final_video_url}")
+    return final_video_url, referer_url
 
-        logger.info(f"Asıl video linki başarıyla çözüldü: {final_video_url}")
-        return final_video_url, referer_url
 
-    except Exception as e:
-        logger.error(
-            f"Video kaynağı aranırken genel bir hata oluştu: {e}", exc_info=True
+def download_with_yt_dlp(
+    conn,
+    item_id,
+    item_type,
+    video_url,
+    referer,
+    output_template,
+    reporter=None,
+    host_sample=None,
+):
+    """
+    Verilen video linkini yt-dlp ile indirir. yt-dlp'nin hızı çalışırken
+    değiştirilemediğinden bu işçinin o anki bant genişliği payı sabitlenir.
+    """
+    reporter = reporter or ProgressReporter(conn, item_id)
+    with bandwidth.get_share().fixed_rate() as speed_limit:
+        started = time.monotonic()
+        success, result = _run_yt_dlp(
+            conn, item_id, video_url, referer, output_template, speed_limit, reporter
         )
-        return None, None
-    finally:
-        if driver:
-            driver.quit()
+    # Kaynağın süresinin dolması, küçük dosya veya dolu disk sunucu hakkında bilgi
+    # vermez; bu denemeler uyarlanabilir denetleyiciye örnek olarak gitmez
+    if host_sample and (success or _is_host_failure(result)):
+        http_status = None if success else _http_status(result)
+        # --continue ile devam edildiyse diskte zaten olan kısım bu çalışmaya sayılmaz
+        transferred = (
+            max(0, os.path.getsize(result) - reporter.resumed_bytes)
+            if success
+            else reporter.transferred_bytes
+        )
+        host_sample(
+            {
+                "bytes": transferred,
+                "seconds": time.monotonic() - started,
+                "requests": 1,
+                "errors": 0 if success else 1,
+                "throttled": http_status in (429, 503),
+                "success": success,
+            }
+        )
+    return success, result
 
 
-def download_with_yt_dlp(
-    conn, item_id, item_type, video_url, referer, output_template, speed_limit
-):
-    """Verilen video linkini yt-dlp ile indirir."""
+def _run_yt_dlp(conn, item_id, video_url, referer, output_template, speed_limit, reporter):
     final_output = f"{output_template}.%(ext)s"
     cmd = [
         "yt-dlp",
@@ -197,6 +376,7 @@ def download_with_yt_dlp(
         "--progress",
         "--verbose",
         "--hls-use-mpegts",
+        "--continue",
         "--merge-output-format",
         "mp4",
         "--format",
@@ -206,13 +386,16 @@ def download_with_yt_dlp(
     ]
 
     if speed_limit:
-        cmd.extend(["--limit-rate", speed_limit])
+        cmd.extend(["--limit-rate", str(int(speed_limit))])
 
     if referer:
         cmd.extend(["--referer", referer])
 
     cmd.append(video_url)
 
+    reporter = reporter or ProgressReporter(conn, item_id)
+    # yt-dlp kendi .part dosyasından devam ederse ilk bildirdiği boyut devam noktasıdır
+    reporter.begin_transfer()
     logger.info(f"yt-dlp ile indirme başlatılıyor...")
     try:
         process = subprocess.Popen(
@@ -223,7 +406,7 @@ def download_with_yt_dlp(
             errors="ignore",
         )
 
-        output, last_progress = "", 0
+        output = ""
         for line in iter(process.stdout.readline, ""):
             if not line:
                 break
@@ -233,30 +416,278 @@ def download_with_yt_dlp(
                 if progress_match:
                     try:
                         progress = float(progress_match.group(1))
-                        if progress > last_progress:
-                            _update_status_worker(
-                                conn, item_id, item_type, progress=progress
-                            )
-                            last_progress = progress
-                    except:
+                        size_match = YT_DLP_SIZE_RE.search(line)
+                        bytes_done = (
+                            int(parse_rate(size_match.group(1)) * progress / 100)
+                            if size_match
+                            else None
+                        )
+                        reporter.update(progress, bytes_done)
+                    except (ValueError, TypeError):
                         pass
         process.wait()
 
         if process.returncode == 0:
-            possible_files = glob.glob(f"{output_template}.*")
-            if possible_files and os.path.getsize(possible_files[0]) > 1024 * 1024:
-                return True, possible_files[0]
-            else:
+            with tracing.span("file_check") as span:
+                possible_files = [
+                    f
+                    for f in glob.glob(f"{output_template}.*")
+                    if not f.endswith(PARTIAL_SUFFIXES)
+                ]
+                if possible_files and os.path.getsize(possible_files[0]) > 1024 * 1024:
+                    return True, possible_files[0]
                 file_size = os.path.getsize(possible_files[0]) if possible_files else 0
+                tracing.set_outcome(span, "error")
                 return False, f"Hata: İndirilen dosya çok küçük ({file_size} bytes)"
         else:
             logger.error(f"yt-dlp hatası (kod: {process.returncode}): {output[-500:]}")
+            if retries.DISK_FULL_RE.search(output):
+                return False, "Hata: Disk dolu"
+            http_match = HTTP_ERROR_RE.search(output)
+            if http_match:
+                return (
+                    False,
+                    f"İndirme hatası (kod: {process.returncode}, HTTP {http_match.group(1)})",
+                )
             return False, f"İndirme hatası (kod: {process.returncode})"
 
     except Exception as e:
         return False, f"Process hatası: {str(e)}"
 
 
+def download_with_native_hls(
+    conn,
+    item_id,
+    item_type,
+    video_url,
+    referer,
+    output_template,
+    connections,
+    reporter=None,
+    host_sample=None,
+):
+    """Verilen m3u8 linkini yerleşik paralel HLS indiricisi ile indirir."""
+    # yt-dlp'nin --hls-use-mpegts davranışıyla aynı: MPEG-TS içerik .mp4 uzantısıyla yazılır.
+    # Yarım dosya, yt-dlp'nin kendi .part dosyasıyla karışmaması için ayrı adlandırılır.
+    final_path = f"{output_template}.mp4"
+    part_path = _native_part_path(output_template)
+    reporter = reporter or ProgressReporter(conn, item_id)
+    # İndirici ilk olarak günlükteki devam noktasını bildirir
+    reporter.begin_transfer()
+
+    downloader = HLSDownloader(
+        get_http_session(),
+        video_url,
+        referer,
+        connections=connections,
+        limiter=bandwidth.get_share(),
+        progress_callback=reporter.update,
+    )
+    logger.info(f"Yerleşik HLS indiricisi ile indirme başlatılıyor ({connections} bağlantı)...")
+    started = time.monotonic()
+    error = None
+    try:
+        segments = downloader.resolve_segments()
+        total_bytes = downloader.download(part_path, segments, resume=True)
+    except HLSDownloadError as e:
+        if e.http_status:
+            error = f"İndirme hatası (HTTP {e.http_status})"
+        else:
+            error = f"İndirme hatası: {e}"
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else "?"
+        error = f"İndirme hatası (HTTP {status})"
+    except (requests.RequestException, OSError) as e:
+        error = f"İndirme hatası: {e}"
+    if host_sample:
+        host_sample(
+            {
+                "bytes": downloader.bytes_written - downloader.resumed_bytes,
+                "seconds": time.monotonic() - started,
+                "requests": downloader.requests,
+                "errors": downloader.errors,
+                "throttled": downloader.throttled > 0,
+                "success": error is None,
+            }
+        )
+    if error:
+        return False, error
+
+    with tracing.span("file_check") as span:
+        if total_bytes <= 1024 * 1024:
+            tracing.set_outcome(span, "error")
+            return False, f"Hata: İndirilen dosya çok küçük ({total_bytes} bytes)"
+        os.replace(part_path, final_path)
+    return True, final_path
+
+
+def _native_part_path(output_template):
+    return f"{output_template}.native.part"
+
+
+def _remove_native_partial(output_template):
+    """Yerleşik indiricinin yarım dosyasını ve devam günlüğünü siler."""
+    part_path = _native_part_path(output_template)
+    DownloadJournal(part_path).clear()
+    try:
+        os.remove(part_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Yarım dosya silinemedi ({part_path}): {e}")
+
+
+def download_video(
+    conn,
+    item_id,
+    item_type,
+    video_url,
+    referer,
+    output_template,
+    settings,
+    reporter=None,
+):
+    """
+    Ayarlardaki indirme motorunu kullanır; yerleşik motor başarısız olursa yt-dlp'ye
+    döner. (başarı, sonuç, son çalışan motor) döndürür.
+    """
+    if not bandwidth.is_installed():
+        # Havuz dışında tek başına çalışıyor; toplam limitin tamamı bu indirmenin
+        bandwidth.get_share().set_rate(bandwidth.current_rate(settings))
+    try:
+        max_connections = int(settings.get("HLS_CONNECTIONS") or 4)
+    except ValueError:
+        max_connections = 4
+    host = adaptive.host_of(video_url)
+    host_sample = None
+    if settings.get("ADAPTIVE_CONCURRENCY") == "1" and reporter is not None:
+        try:
+            max_jobs = int(settings.get("CONCURRENT_DOWNLOADS") or 1)
+        except ValueError:
+            max_jobs = 1
+
+        def host_sample(sample):
+            reporter.host_sample(
+                dict(
+                    sample,
+                    host=host,
+                    max_jobs=max_jobs,
+                    max_connections=max_connections,
+                )
+            )
+
+    if settings.get("DOWNLOAD_ENGINE") == "native" and ".m3u8" in video_url:
+        connections = max_connections
+        if host_sample:
+            connections = adaptive.connections_for(conn, host, max_connections)
+        with tracing.span("native_hls") as span:
+            success, result = download_with_native_hls(
+                conn,
+                item_id,
+                item_type,
+                video_url,
+                referer,
+                output_template,
+                connections,
+                reporter,
+                host_sample,
+            )
+            if not success:
+                tracing.set_outcome(span, "error", result)
+        if success or _is_source_rejected(result):
+            return success, result, "native"
+        logger.warning(f"Yerleşik HLS indiricisi başarısız ({result}), yt-dlp deneniyor.")
+    with tracing.span("yt-dlp") as span:
+        success, result = download_with_yt_dlp(
+            conn,
+            item_id,
+            item_type,
+            video_url,
+            referer,
+            output_template,
+            reporter,
+            host_sample,
+        )
+        if not success:
+            tracing.set_outcome(span, "error", result)
+    if success:
+        # yt-dlp yedeği tamamladıysa yerleşik motorun yarım dosyasına artık gerek yok
+        _remove_native_partial(output_template)
+    return success, result, "yt-dlp"
+
+
+def _http_status(message):
+    """İndirme hata mesajındaki HTTP durum kodu; yoksa None."""
+    match = re.search(r"HTTP (\d{3})", message or "")
+    return int(match.group(1)) if match else None
+
+
+def _is_source_rejected(message):
+    """İndirme hatasının kaynağın süresinin dolduğunu (yetki/404) gösterip göstermediği."""
+    return _http_status(message) in REJECTED_HTTP_CODES
+
+
+def _is_host_failure(message):
+    """Hatanın sunucudan kaynaklandığı (bağlantı, zaman aşımı, 429/5xx) durumlar."""
+    return (
+        not _is_source_rejected(message)
+        and retries.classify_failure(message) == retries.NETWORK
+    )
+
+
+def resolve_source(conn, episode_url, ttl):
+    """Önce önbelleğe bakar, geçerli kayıt yoksa kaynağı çözüp önbelleğe yazar."""
+    if ttl > 0:
+        with tracing.span("cache_check") as span:
+            cached = get_cached_source(conn, episode_url, ttl)
+            if cached:
+                if validate_source(get_http_session(), *cached):
+                    logger.info(f"Video kaynağı önbellekten kullanılıyor: {cached[0]}")
+                    return cached
+                logger.info("Önbellekteki kaynak geçersiz, yeniden çözülecek.")
+                invalidate_source(conn, episode_url)
+            tracing.set_outcome(span, "miss")
+
+    video_url, referer = find_video_source(episode_url)
+    if video_url and ttl > 0:
+        store_source(conn, episode_url, video_url, referer)
+    return video_url, referer
+
+
+def _record_failure(conn, item_id, item_type, retry_count, message, exc=None):
+    """
+    Başarısız denemeyi sınıflandırıp kaydeder. Geçici hatalar artan bekleme
+    süresiyle yeniden sıraya alınır; diğerleri hata durumunda kalır. Yazılan
+    durumu döndürür.
+    """
+    failure_class = retries.classify_failure(message, exc)
+    metrics.inc("failures_total", **{"class": failure_class})
+    if failure_class == retries.DISK_FULL:
+        message = "Hata: Disk dolu"
+    if retries.should_retry(failure_class, retry_count):
+        delay = retries.backoff_delay(retry_count)
+        status = "Sırada"
+        logger.warning(
+            f"ID {item_id} geçici hata ({message}); {retry_count + 1}. yeniden deneme "
+            f"{delay:.0f} sn sonra."
+        )
+        values = (status, retry_count + 1, time.time() + delay, message, item_id)
+    else:
+        status = message
+        logger.error(f"ID {item_id} hata ({failure_class}): {message}")
+        values = (status, retry_count, None, message, item_id)
+    try:
+        with metrics.sqlite_write("worker"):
+            conn.execute(
+                "UPDATE episodes SET status = ?, retry_count = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                values,
+            )
+            conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"ID {item_id} için DB güncellemesinde hata: {e}", exc_info=True)
+    return status
+
+
 def to_ascii_safe(text):
     """Dosya adları için güvenli karakter dönüşümü."""
     if not text:
@@ -282,92 +713,131 @@ def to_ascii_safe(text):
     return text.strip()
 
 
-def process_video(item_id, item_type):
+def process_video(item_id, item_type, progress_queue=None):
     """Ana video işleme süreci."""
     global logger
     if not logger.handlers:
         logger = setup_logging()
 
     conn = None
-    profile_dir = os.path.abspath(os.path.join("chrome_profiles", f"user_{item_id}"))
-    if os.path.exists(profile_dir):
-        shutil.rmtree(profile_dir)
-    os.makedirs(profile_dir, exist_ok=True)
-
+    reporter = None
+    item = None
+    final_status = None
+    trace = tracing.start(item_id)
     try:
-        conn = sqlite3.connect(config.DATABASE)
-        conn.row_factory = sqlite3.Row
-        settings = get_all_settings_from_db(conn)
-        item = conn.execute(
-            "SELECT e.*, s.season_number, ser.title as series_title FROM episodes e JOIN seasons s ON e.season_id = s.id JOIN series ser ON s.series_id = ser.id WHERE e.id = ?",
-            (item_id,),
-        ).fetchone()
-        if not item:
-            logger.error(f"Episode ID {item_id} bulunamadı")
-            return
-
-        base_folder = settings.get("DOWNLOADS_FOLDER", "downloads")
-        filename_template = settings.get("SERIES_FILENAME_TEMPLATE")
-        file_path = filename_template.format(
-            series_title=to_ascii_safe(item["series_title"]),
-            season_number=item["season_number"],
-            episode_number=item["episode_number"],
-            episode_title=to_ascii_safe(
-                item["title"] or f"Episode_{item['episode_number']}"
-            ),
-        )
-        full_path = os.path.join(base_folder, *file_path.split(os.path.sep))
-        final_dir = os.path.dirname(full_path)
-        os.makedirs(final_dir, exist_ok=True)
-        output_template = os.path.join(final_dir, os.path.basename(full_path))
-
-        _update_status_worker(conn, item_id, item_type, status="Kaynak aranıyor...")
-        video_url, referer = find_video_source(item["url"], profile_dir)
+        # Aynı işçi prosesteki sonraki işler de bu bağlantıyı yeniden kullanır
+        conn = get_connection()
+        reporter = ProgressReporter(conn, item_id, progress_queue)
+
+        def update_status(**fields):
+            _update_status_worker(conn, item_id, item_type, **fields)
+            reporter.status_changed(**fields)
+
+        with tracing.span("setup"):
+            settings = get_all_settings_from_db(conn)
+            item = conn.execute(
+                "SELECT e.*, s.season_number, ser.title as series_title FROM episodes e JOIN seasons s ON e.season_id = s.id JOIN series ser ON s.series_id = ser.id WHERE e.id = ?",
+                (item_id,),
+            ).fetchone()
+            if not item:
+                logger.error(f"Episode ID {item_id} bulunamadı")
+                return
+            trace.attempt = item["retry_count"]
+
+            base_folder = settings.get("DOWNLOADS_FOLDER", "downloads")
+            filename_template = settings.get("SERIES_FILENAME_TEMPLATE")
+            file_path = filename_template.format(
+                series_title=to_ascii_safe(item["series_title"]),
+                season_number=item["season_number"],
+                episode_number=item["episode_number"],
+                episode_title=to_ascii_safe(
+                    item["title"] or f"Episode_{item['episode_number']}"
+                ),
+            )
+            full_path = os.path.join(base_folder, *file_path.split(os.path.sep))
+            final_dir = os.path.dirname(full_path)
+            os.makedirs(final_dir, exist_ok=True)
+            output_template = os.path.join(final_dir, os.path.basename(full_path))
+
+        update_status(status="Kaynak aranıyor...")
+        try:
+            cache_ttl = int(settings.get("SOURCE_CACHE_TTL") or 0)
+        except ValueError:
+            cache_ttl = 0
+        with metrics.timed("resolve_seconds"), tracing.span("resolve") as span:
+            video_url, referer = resolve_source(conn, item["url"], cache_ttl)
 
         if not video_url:
-            _update_status_worker(
-                conn, item_id, item_type, status="Hata: Video kaynağı bulunamadı"
+            tracing.set_outcome(span, "error")
+            final_status = _record_failure(
+                conn,
+                item_id,
+                item_type,
+                item["retry_count"],
+                "Hata: Video kaynağı bulunamadı",
             )
+            reporter.status_changed(status=final_status)
             return
 
-        _update_status_worker(conn, item_id, item_type, status="İndiriliyor")
-        success, result = download_with_yt_dlp(
-            conn,
-            item_id,
-            item_type,
-            video_url,
-            referer,
-            output_template,
-            settings.get("SPEED_LIMIT"),
-        )
-
-        if success:
-            _update_status_worker(
+        update_status(status="İndiriliyor")
+        download_started = time.monotonic()
+        with tracing.span("download") as span:
+            success, result, engine = download_video(
                 conn,
                 item_id,
                 item_type,
-                status="Tamamlandı",
-                progress=100,
-                filepath=result,
+                video_url,
+                referer,
+                output_template,
+                settings,
+                reporter,
             )
+            if not success:
+                tracing.set_outcome(span, "error", result)
+        metrics.observe(
+            "download_seconds",
+            time.monotonic() - download_started,
+            engine=engine,
+            result="ok" if success else "error",
+        )
+
+        if success:
+            conn.execute(
+                "UPDATE episodes SET retry_count = 0, next_attempt_at = NULL, last_error = NULL WHERE id = ?",
+                (item_id,),
+            )
+            final_status = "Tamamlandı"
+            update_status(status=final_status, progress=100, filepath=result)
             logger.info(
                 f"ID {item_id} tamamlandı: {result} ({os.path.getsize(result) / 1024 / 1024:.1f}MB)"
             )
         else:
-            _update_status_worker(conn, item_id, item_type, status=result)
-            logger.error(f"ID {item_id} hata: {result}")
+            if _is_source_rejected(result):
+                invalidate_source(conn, item["url"])
+            final_status = _record_failure(
+                conn, item_id, item_type, item["retry_count"], result
+            )
+            reporter.status_changed(status=final_status)
 
     except Exception as e:
         logger.exception(f"ID {item_id} genel hata: {e}")
         if conn:
-            _update_status_worker(
-                conn, item_id, item_type, status="Hata: Sistem hatası"
-            )
+            if conn.in_transaction:
+                conn.rollback()
+            status = "Hata: Sistem hatası"
+            if item is not None:
+                status = _record_failure(
+                    conn, item_id, item_type, item["retry_count"], status, exc=e
+                )
+            else:
+                _update_status_worker(conn, item_id, item_type, status=status)
+            if reporter:
+                reporter.status_changed(status=status)
+            final_status = status
     finally:
-        if conn:
-            conn.close()
-        if profile_dir and os.path.exists(profile_dir):
-            try:
-                shutil.rmtree(profile_dir)
-            except:
-                pass
+        if reporter:
+            reporter.close()
+        if conn and conn.in_transaction:
+            conn.rollback()
+        # Veritabanında bulunamayan bölüm için aşama kaydı tutulmaz
+        tracing.finish(conn if item is not None else None, final_status)
@@ -0,0 +1,378 @@
+# @author: MembaCo.
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+
+import bandwidth
+import config
+import metrics
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# İşçi bu durumlardayken ölürse bölüm yarıda kalmış sayılır
+ACTIVE_STATUSES = ("Kaynak aranıyor...", "İndiriliyor")
+CRASH_MESSAGE = "İndirme hatası: İşçi prosesi beklenmedik şekilde sonlandı"
+
+# İşçiler fork ile değil forkserver ile açılır. Ebeveyn proseste zamanlayıcı,
+# izleme listesi ve içe aktarma thread'leri çalışırken fork edilen bir çocuk,
+# o an başka bir thread'in tuttuğu kilitleri (ör. bir modülün import kilidi)
+# hiç bırakılmamış olarak devralır. forkserver sunucusu temiz bir prosesten
+# başlar ve tek thread'liyken ana modülü ve işçi modülünü bir kez yükler;
+# işçiler bu sunucudan fork edilir. İşçiye giden kuyruk ve paylaşılan
+# değerler de aynı bağlamdan oluşturulmalıdır.
+mp_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if mp_context.get_start_method() == "forkserver":
+    mp_context.set_forkserver_preload(["__main__", "worker"])
+
+
+def _current_rss_mb():
+    """Prosesin o anki bellek kullanımı (MB); ölçülemiyorsa None."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _worker_main(conn, progress_queue, bandwidth_share):
+    """
+    İşçi prosesin ana döngüsü. Ağır modüller (selenium-wire, yt-dlp yardımcıları)
+    forkserver sunucusunda yüklü gelir; loglama bir kez kurulur, ardından iş kuyruğundan gelen
+    bölümler sırayla işlenir.
+    """
+    if hasattr(os, "setsid"):
+        # Durdurma isteğinde yt-dlp ve Chrome alt prosesleriyle birlikte tek
+        # grup halinde sonlandırılabilmek için kendi oturumumuzu açıyoruz
+        os.setsid()
+
+    bandwidth.install(bandwidth_share)
+
+    import worker
+
+    worker.logger = worker.setup_logging()
+    if config.WORKER_WARM_BROWSER:
+        worker.get_driver_pool().warm_up()
+
+    jobs_done = 0
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        item_id, item_type = job
+        try:
+            # Ayarlar sayfasından istenmişse bu iş cProfile ile profillenir
+            with profiling.job_capture(worker.get_connection(), item_id):
+                worker.process_video(item_id, item_type, progress_queue)
+        except Exception as e:
+            worker.logger.exception(f"İşçi prosesinde beklenmeyen hata: {e}")
+        # Bu işte biriken metrikler ebeveyndeki /metrics kaydına eklenir
+        try:
+            progress_queue.put_nowait(("metrics", item_id, metrics.get_registry().drain()))
+        except (queue.Full, OSError, ValueError):
+            pass
+        jobs_done += 1
+        try:
+            conn.send(("done", item_id, jobs_done, _current_rss_mb()))
+        except (OSError, ValueError):
+            break
+
+
+class PoolWorker:
+    def __init__(self, progress_queue):
+        self.conn, child_conn = mp_context.Pipe()
+        self.bandwidth = bandwidth.BandwidthShare()
+        # daemon değil: indirme sırasında alt prosesler (yt-dlp, Chrome) açılabilmeli;
+        # kapanışta havuz atexit ile kapatılır
+        self.process = mp_context.Process(
+            target=_worker_main, args=(child_conn, progress_queue, self.bandwidth)
+        )
+        self.process.start()
+        child_conn.close()
+        self.pid = self.process.pid
+        self.item_id = None
+        self.jobs_done = 0
+        self.baseline_rss = None
+        self.retiring = False
+
+
+class WorkerPool:
+    """
+    Uzun ömürlü indirme işçileri. Her bölüm için yeni proses açmak yerine işler
+    boştaki işçiye borudan gönderilir; işçiler belirli sayıda işten veya bellek
+    büyümesinden sonra yenilenir. Çalışan bölümlerin takibi de burada tutulur.
+    """
+
+    def __init__(self, progress_queue, size=1, max_jobs=None, max_rss_growth_mb=None):
+        self.progress_queue = progress_queue
+        self.size = max(1, size)
+        self.max_jobs = max_jobs or config.WORKER_MAX_JOBS
+        self.max_rss_growth_mb = max_rss_growth_mb or config.WORKER_MAX_RSS_GROWTH_MB
+        self._workers = []
+        self._lock = threading.RLock()
+        self._closed = False
+        self.allocator = bandwidth.BandwidthAllocator()
+
+    def _spawn(self):
+        worker = PoolWorker(self.progress_queue)
+        self._workers.append(worker)
+        logger.info(f"İndirme işçisi başlatıldı (PID: {worker.pid}).")
+        return worker
+
+    def start(self):
+        with self._lock:
+            self._refill()
+
+    def _live_workers(self):
+        return [w for w in self._workers if not w.retiring]
+
+    def resize(self, size):
+        """Hedef işçi sayısını ayarlar; fazla işçiler boşa çıktıklarında emekli edilir."""
+        with self._lock:
+            self.size = max(1, size)
+            self._retire_surplus()
+            self._refill()
+
+    def submit(self, item_id, item_type="episode"):
+        """İşi boştaki bir işçiye verir ve işçinin PID'sini döndürür."""
+        with self._lock:
+            if self._closed or self.pid_for(item_id):
+                return None
+            worker = next(
+                (w for w in self._live_workers() if w.item_id is None), None
+            )
+            if worker is None:
+                # Manuel başlatmalar limitin üstüne çıkabilir; geçici bir işçi aç
+                worker = self._spawn()
+            worker.item_id = item_id
+            # Yeni indirmenin payı iş işçiye ulaşmadan önce ayrılır
+            self._rebalance()
+            try:
+                worker.conn.send((item_id, item_type))
+            except (OSError, ValueError):
+                self._discard(worker)
+                worker = self._spawn()
+                worker.item_id = item_id
+                self._rebalance()
+                worker.conn.send((item_id, item_type))
+            return worker.pid
+
+    def cancel(self, item_id):
+        """Bölümü işleyen işçiyi proses grubuyla birlikte sonlandırır."""
+        with self._lock:
+            worker = next((w for w in self._workers if w.item_id == item_id), None)
+            if worker is None:
+                return False
+            self._kill(worker)
+            self._discard(worker)
+            self._refill()
+            self._rebalance()
+            return True
+
+    def _kill(self, worker):
+        try:
+            if sys.platform != "win32":
+                os.killpg(worker.pid, signal.SIGTERM)
+            else:
+                subprocess.run(
+                    ["taskkill", "/F", "/T", "/PID", str(worker.pid)],
+                    check=True,
+                    capture_output=True,
+                )
+        except (ProcessLookupError, PermissionError, subprocess.CalledProcessError):
+            pass
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=1)
+
+    def _discard(self, worker):
+        if worker in self._workers:
+            self._workers.remove(worker)
+        worker.conn.close()
+
+    def _retire(self, worker):
+        worker.retiring = True
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+
+    def _retire_surplus(self):
+        idle = [w for w in self._live_workers() if w.item_id is None]
+        surplus = len(self._live_workers()) - self.size
+        for worker in idle[: max(0, surplus)]:
+            self._retire(worker)
+
+    def _refill(self):
+        # Kapanış başladıktan sonra zamanlayıcının poll() çağrısı yeni işçi
+        # açmamalı; aksi halde çıkışta multiprocessing bu boştaki işçileri
+        # sonsuza dek bekler
+        while not self._closed and len(self._live_workers()) < self.size:
+            self._spawn()
+
+    def waitables(self):
+        """Zamanlayıcının bekleyeceği nesneler: işçi boruları ve proses sentinel'leri."""
+        with self._lock:
+            return [w.conn for w in self._workers if not w.retiring] + [
+                w.process.sentinel for w in self._workers
+            ]
+
+    def poll(self):
+        """Biten işleri ve ölen işçileri işler; biten bölüm ID'lerini döndürür."""
+        finished = []
+        with self._lock:
+            for worker in list(self._workers):
+                if not worker.retiring:
+                    try:
+                        while worker.conn.poll():
+                            _, item_id, jobs_done, rss = worker.conn.recv()
+                            finished.append(item_id)
+                            worker.item_id = None
+                            worker.jobs_done = jobs_done
+                            if worker.baseline_rss is None:
+                                worker.baseline_rss = rss
+                            self._maybe_recycle(worker, rss)
+                    except (EOFError, OSError):
+                        pass
+                if not worker.process.is_alive():
+                    worker.process.join(timeout=0)
+                    if worker.item_id is not None:
+                        logger.warning(
+                            f"İşçi (PID: {worker.pid}) ID {worker.item_id} işlenirken sonlandı."
+                        )
+                        self._record_crash(worker.item_id)
+                        finished.append(worker.item_id)
+                    self._discard(worker)
+            self._retire_surplus()
+            self._refill()
+            if finished:
+                self._rebalance()
+        return finished
+
+    def _record_crash(self, item_id):
+        """
+        Ölen işçinin yarıda kalan bölümünü başarısız deneme olarak kaydeder; aksi
+        halde bölüm "İndiriliyor" durumunda asılı kalır. Hata geçici sayıldığından
+        bölüm yeniden deneme politikasına göre tekrar sıraya alınır.
+        """
+        import events
+        import worker
+        from database import pooled_connection
+        from progress import get_progress_channel
+
+        try:
+            with pooled_connection() as conn:
+                row = conn.execute(
+                    "SELECT status, retry_count FROM episodes WHERE id = ?", (item_id,)
+                ).fetchone()
+                # İşçi sonucu yazdıktan sonra ölmüşse dokunulmaz
+                if row is None or row["status"] not in ACTIVE_STATUSES:
+                    return
+                get_progress_channel().forget(item_id)
+                status = worker._record_failure(
+                    conn, item_id, "episode", row["retry_count"] or 0, CRASH_MESSAGE
+                )
+        except sqlite3.Error as e:
+            logger.error(f"ID {item_id} için işçi hatası kaydedilemedi: {e}", exc_info=True)
+            return
+        events.publish("episode", {"id": item_id, "status": status})
+
+    def _rebalance(self):
+        self.allocator.rebalance(
+            [w.bandwidth for w in self._workers if w.item_id is not None]
+        )
+
+    def set_bandwidth_limit(self, total):
+        """Toplam hız limitini (bayt/sn, 0 = limitsiz) değiştirir ve payları yeniden dağıtır."""
+        with self._lock:
+            if self.allocator.total != total:
+                logger.info(
+                    "Toplam hız limiti: "
+                    + (f"{total / 1024 / 1024:.2f} MB/s" if total else "limitsiz")
+                )
+            self.allocator.total = float(total or 0)
+            self._rebalance()
+
+    def bandwidth_snapshot(self):
+        with self._lock:
+            return self.allocator.snapshot(
+                [w.bandwidth for w in self._workers if w.item_id is not None]
+            )
+
+    def _maybe_recycle(self, worker, rss):
+        reason = None
+        if worker.jobs_done >= self.max_jobs:
+            reason = f"{worker.jobs_done} iş tamamlandı"
+        elif (
+            rss is not None
+            and worker.baseline_rss is not None
+            and rss - worker.baseline_rss > self.max_rss_growth_mb
+        ):
+            reason = f"bellek {worker.baseline_rss:.0f}MB -> {rss:.0f}MB"
+        if reason:
+            logger.info(f"İşçi (PID: {worker.pid}) yenileniyor: {reason}.")
+            self._retire(worker)
+
+    def pid_for(self, item_id):
+        with self._lock:
+            worker = next((w for w in self._workers if w.item_id == item_id), None)
+            return worker.pid if worker else None
+
+    def busy_count(self):
+        with self._lock:
+            return sum(1 for w in self._workers if w.item_id is not None)
+
+    def worker_count(self):
+        with self._lock:
+            return len(self._live_workers())
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            for worker in list(self._workers):
+                if worker.item_id is not None:
+                    self._kill(worker)
+                else:
+                    self._retire(worker)
+            for worker in list(self._workers):
+                worker.process.join(timeout=5)
+                self._discard(worker)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Bu prosese ait işçi havuzunu döndürür (gerekirse oluşturur)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            from progress import get_progress_channel
+
+            _pool = WorkerPool(get_progress_channel().queue)
+            _pool_pid = os.getpid()
+            atexit.register(_pool.shutdown)
+        return _pool